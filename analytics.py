@@ -0,0 +1,439 @@
+"""
+Columnar analytics over the history of played games.
+
+Histories are ingested into two tables of NumPy columns, one row per seat:
+
+- hands: game, set, hand, seat, position (in the bidding: 0 for the lead player, 3 for the dealer), player, bid,
+  tricks and score (of the hand);
+- sets: game, set, seat, player, bonus (the set bonus, 0 if none) and total (the cumulative score after the set).
+
+Games, players and the source files are numbered in the order they are met; the tables keep the list of player names
+and game ids, so that 'player' is a small int column. Two sources can be ingested:
+
+- results logs (JSON Lines, see results_log.py): every finished game;
+- game table files ('game_data.json', see Game.write_table_to_json): one game each, whose rows hold "bid: score"
+  strings. The tricks are derived from the bid and the score; the one ambiguous case (a bid of 0 scoring 50 is either
+  made, or missed with five tricks) is stored as -1.
+
+Ingested tables are saved as one .npy file per column and loaded memory-mapped, so a query only reads the columns it
+uses. Queries are vectorized: where() filters rows, group_by() groups them on one or more columns and aggregate()
+computes count, sum, mean, var, min, max and rate per group with bincount (sorting only groups or values too
+many to count densely).
+
+    python analytics.py ingest --output history game_results.jsonl game_data.json
+    python analytics.py query history --group-by bid position --aggregate mean:score count:score
+    python analytics.py query history --table sets --group-by player --aggregate rate:bonus
+"""
+import argparse
+import json
+import os
+import sys
+from array import array
+import numpy as np
+from constants import CARDS_PER_PLAYER, NUMBER_OF_PLAYERS, HANDS_PER_SET
+from scoring import SCORE_TABLE
+
+# Columns of every table and their dtype, in storage order
+HAND_COLUMNS = {'game': np.int32, 'set': np.int8, 'hand': np.int8, 'seat': np.int8, 'position': np.int8, 'player': np.int32,
+                'bid': np.int8, 'tricks': np.int8, 'score': np.int16}
+SET_COLUMNS = {'game': np.int32, 'set': np.int8, 'seat': np.int8, 'player': np.int32, 'bonus': np.int16, 'total': np.int32}
+TABLES = {'hands': HAND_COLUMNS, 'sets': SET_COLUMNS}
+METADATA_FILE = 'history.json'
+
+# Aggregate functions of GroupBy.aggregate ('rate' is the share of non-zero values)
+AGGREGATES = ('count', 'sum', 'mean', 'var', 'min', 'max', 'rate')
+# Largest number of possible key combinations grouped with a dense bincount; above it, keys are sorted instead
+DENSE_GROUPS = 1 << 22
+
+def tricks_by_score() -> list:
+    """
+    Returns, for every bid, the number of tricks of every possible hand score (-1 if several numbers of tricks give it).
+    """
+    inverse = []
+    for bid in range(CARDS_PER_PLAYER + 1):
+        tricks = {}
+        for taken, score in enumerate(SCORE_TABLE[bid]):
+            tricks[score] = taken if score not in tricks else -1
+        inverse.append(tricks)
+    return inverse
+
+TRICKS_BY_SCORE = tricks_by_score()
+
+class ColumnTable:
+    """
+    A table of equal-length NumPy columns.
+
+    Attributes:
+        1) columns (dict): Column name -> ndarray (possibly memory-mapped).
+        2) players (list): The player names the 'player' column indexes.
+        3) games (list): The game ids (or source files) the 'game' column indexes.
+    """
+
+    def __init__(self, columns: dict, players: list = (), games: list = ()):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('The columns of a table must have the same length.')
+        self.columns = columns
+        self.players = list(players)
+        self.games = list(games)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def with_column(self, name: str, values: object) -> 'ColumnTable':
+        """
+        Returns the table with one more (derived) column, e.g. table.with_column('made', table['bid'] == table['tricks']).
+        """
+        columns = dict(self.columns)
+        columns[name] = np.broadcast_to(np.asarray(values), (len(self),))
+        return ColumnTable(columns, self.players, self.games)
+
+    def filter(self, mask: np.ndarray) -> 'ColumnTable':
+        """
+        Returns the rows selected by a boolean mask.
+        """
+        return ColumnTable({name: values[mask] for name, values in self.columns.items()}, self.players, self.games)
+
+    def where(self, **conditions) -> 'ColumnTable':
+        """
+        Returns the rows matching every condition: a column equal to a value, or in a list, tuple, set or range of values.
+        Players can be given by name.
+
+        Raises:
+            ValueError: If a condition names an unknown column or player.
+        """
+        mask = np.ones(len(self), dtype = bool)
+        for name, wanted in conditions.items():
+            values = self.column(name)
+            if isinstance(wanted, (list, tuple, set, range)):
+                mask &= np.isin(values, [self.code(name, value) for value in wanted])
+            else:
+                mask &= values == self.code(name, wanted)
+        return self.filter(mask)
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self.columns:
+            raise ValueError(f'Unknown column: {name} (the columns are {", ".join(self.columns)}).')
+        return self.columns[name]
+
+    def code(self, name: str, value: object) -> int:
+        """
+        Returns the stored value of a condition: the index of a player given by name, or the value itself.
+        """
+        if name == 'player' and isinstance(value, str):
+            if value not in self.players:
+                raise ValueError(f'Unknown player: {value}.')
+            return self.players.index(value)
+        return value
+
+    def group_by(self, *keys: str) -> 'GroupBy':
+        return GroupBy(self, keys)
+
+    def rows(self) -> list:
+        """
+        Returns the rows as lists, with player names instead of their indexes.
+        """
+        columns = [values.tolist() for values in self.columns.values()]
+        if 'player' in self.columns:
+            position = list(self.columns).index('player')
+            columns[position] = [self.players[player] for player in columns[position]]
+        return [list(row) for row in zip(*columns)]
+
+class GroupBy:
+    """
+    The rows of a table grouped on key columns.
+
+    Attributes:
+        1) table (ColumnTable): The grouped table.
+        2) keys (tuple): The key column names.
+        3) group_keys (list): The key values of every non-empty group, one array per key column.
+        4) inverse (ndarray): The group of every row.
+        5) counts (ndarray): The number of rows of every group.
+    """
+
+    def __init__(self, table: ColumnTable, keys: tuple):
+        if not keys:
+            raise ValueError('Group on at least one column.')
+        self.table = table
+        self.keys = keys
+        columns = [np.asarray(table.column(key), dtype = np.int64) for key in keys]
+        lows = [int(values.min()) if len(values) else 0 for values in columns]
+        sizes = [int(values.max()) - low + 1 if len(values) else 1 for values, low in zip(columns, lows)]
+        # Every combination of keys as one int: dense ids when they are few, sorted ids otherwise
+        combined = np.zeros(len(table), dtype = np.int64)
+        for values, low, size in zip(columns, lows, sizes):
+            combined *= size
+            combined += values - low
+        total = int(np.prod(sizes, dtype = np.float64))
+        if total <= DENSE_GROUPS:
+            counts = np.bincount(combined, minlength = total)
+            present = np.flatnonzero(counts)
+            dense = np.zeros(total, dtype = np.int64)
+            dense[present] = np.arange(len(present))
+            self.inverse = dense[combined]
+            self.counts = counts[present]
+            unique = present
+        else:
+            unique, self.inverse, self.counts = np.unique(combined, return_inverse = True, return_counts = True)
+        self.group_keys = []
+        for low, size in reversed(list(zip(lows, sizes))):
+            self.group_keys.append(unique % size + low)
+            unique = unique // size
+        self.group_keys.reverse()
+
+    def aggregate(self, **aggregates) -> ColumnTable:
+        """
+        Computes aggregates per group, e.g. aggregate(mean_score = ('score', 'mean'), hands = ('score', 'count')).
+
+        Returns:
+            ColumnTable: The key columns and one column per aggregate, one row per non-empty group.
+
+        Raises:
+            ValueError: If an aggregate function or column is unknown.
+        """
+        columns = {key: values for key, values in zip(self.keys, self.group_keys)}
+        groups = len(self.counts)
+        for name, (column, function) in aggregates.items():
+            if function not in AGGREGATES:
+                raise ValueError(f'Unknown aggregate: {function} (the aggregates are {", ".join(AGGREGATES)}).')
+            values = self.table.column(column)
+            if function == 'count':
+                columns[name] = self.counts
+            elif function in ('sum', 'mean', 'rate'):
+                weights = values != 0 if function == 'rate' else values
+                sums = np.bincount(self.inverse, weights = weights, minlength = groups)
+                columns[name] = sums if function == 'sum' else sums / self.counts
+            elif function == 'var':
+                means = np.bincount(self.inverse, weights = values, minlength = groups) / self.counts
+                squares = np.bincount(self.inverse, weights = np.square(values, dtype = np.float64), minlength = groups) / self.counts
+                columns[name] = squares - np.square(means)
+            else:
+                columns[name] = self.extreme(values, function == 'max')
+        return ColumnTable(columns, self.table.players, self.table.games)
+
+    def extreme(self, values: np.ndarray, largest: bool) -> np.ndarray:
+        """
+        Returns the min (or max) of a column per group.
+        """
+        groups = len(self.counts)
+        if not groups:
+            return np.zeros(0, dtype = values.dtype)
+        values = np.asarray(values)
+        low = int(values.min())
+        span = int(values.max()) - low + 1
+        if groups * span <= DENSE_GROUPS:
+            # Small ints: count every (group, value) pair, and take the first (or last) value present in each group
+            present = np.bincount(self.inverse * span + (values.astype(np.int64) - low), minlength = groups * span).reshape(groups, span) > 0
+            if largest:
+                return (span - 1 - present[:, ::-1].argmax(axis = 1) + low).astype(values.dtype)
+            return (present.argmax(axis = 1) + low).astype(values.dtype)
+        order = np.argsort(self.inverse, kind = 'stable')
+        starts = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+        return (np.maximum if largest else np.minimum).reduceat(values[order], starts)
+
+class HistoryBuilder:
+    """
+    Accumulates ingested games into growable columns, and converts them into tables.
+
+    Attributes:
+        1) hands (dict): Column name -> array.array of the hands table.
+        2) sets (dict): Column name -> array.array of the sets table.
+        3) players (dict): Player name -> index.
+        4) games (list): The id of every game ingested.
+    """
+
+    def __init__(self):
+        self.hands = {name: array('q') for name in HAND_COLUMNS}
+        self.sets = {name: array('q') for name in SET_COLUMNS}
+        self.players = {}
+        self.games = []
+
+    def player_codes(self, names: list) -> list:
+        return [self.players.setdefault(name, len(self.players)) for name in names]
+
+    def add_hand(self, game: int, set_number: int, hand_number: int, codes: list, bids: list, tricks: list, scores: list):
+        columns = self.hands
+        for seat, player in enumerate(codes):
+            columns['game'].append(game)
+            columns['set'].append(set_number)
+            columns['hand'].append(hand_number)
+            columns['seat'].append(seat)
+            # The lead player of the n-th hand of a set is the seat n - 1 (see PlaySet.play_hands)
+            columns['position'].append((seat - (hand_number - 1)) % NUMBER_OF_PLAYERS)
+            columns['player'].append(player)
+            columns['bid'].append(bids[seat])
+            columns['tricks'].append(tricks[seat])
+            columns['score'].append(scores[seat])
+
+    def add_set(self, game: int, set_number: int, codes: list, bonuses: list, totals: list):
+        columns = self.sets
+        for seat, player in enumerate(codes):
+            for name, value in (('game', game), ('set', set_number), ('seat', seat), ('player', player), ('bonus', bonuses[seat]), ('total', totals[seat])):
+                columns[name].append(value)
+
+    def add_results_log(self, path: str) -> int:
+        """
+        Ingests the finished games of a results log (see results_log.py), and returns their number.
+        """
+        # Imported here: only this source needs it
+        from results_log import read_games
+        count = 0
+        for game in read_games(path):
+            index = len(self.games)
+            self.games.append(game['game_id'])
+            codes = self.player_codes(game['players'])
+            for record in game['hands']:
+                seats = record['players']
+                self.add_hand(index, record['set'], record['hand'], codes, [seat['bid'] for seat in seats], [seat['tricks_won'] for seat in seats], [seat['score'] for seat in seats])
+            for record in game['sets']:
+                seats = record['players']
+                self.add_set(index, record['set'], codes, [seat['bonus'] for seat in seats], [seat['total'] for seat in seats])
+            count += 1
+        return count
+
+    def add_game_table(self, path: str) -> int:
+        """
+        Ingests a game table file (see Game.write_table_to_json): rows of "bid: score" per player, and a row of
+        cumulative scores after every set. Returns the number of games ingested (one).
+
+        Raises:
+            ValueError: If the file is not a game table.
+        """
+        with open(path, encoding = 'utf-8') as file:
+            rows = json.load(file)
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            raise ValueError(f'{path} is not a game table.')
+        names = list(rows[0])
+        codes = self.player_codes(names)
+        index = len(self.games)
+        self.games.append(path)
+        set_number, hand_number = 1, 0
+        set_scores = [0] * len(names)
+        totals = [0] * len(names)
+        for row in rows:
+            cells = [row[name] for name in names]
+            if all(isinstance(cell, str) for cell in cells):
+                hand_number += 1
+                bids, scores = zip(*((int(part) for part in cell.split(':')) for cell in cells))
+                tricks = [TRICKS_BY_SCORE[bid].get(score, -1) for bid, score in zip(bids, scores)]
+                self.add_hand(index, set_number, hand_number, codes, bids, tricks, scores)
+                set_scores = [total + score for total, score in zip(set_scores, scores)]
+            else:
+                # The set row: whatever the hands do not account for is the set bonus
+                bonuses = [cell - total for cell, total in zip(cells, set_scores)]
+                self.add_set(index, set_number, codes, bonuses, cells)
+                totals = cells
+                set_scores = list(totals)
+                set_number, hand_number = set_number + 1, 0
+            if hand_number > HANDS_PER_SET:
+                raise ValueError(f'{path} has a set of more than {HANDS_PER_SET} hands.')
+        return 1
+
+    def tables(self) -> dict:
+        """
+        Returns the 'hands' and 'sets' tables of everything ingested.
+        """
+        players = sorted(self.players, key = self.players.get)
+        return {name: ColumnTable({column: np.array(built[column], dtype = dtype) for column, dtype in TABLES[name].items()}, players, self.games)
+                for name, built in (('hands', self.hands), ('sets', self.sets))}
+
+def ingest(paths: list) -> dict:
+    """
+    Ingests results logs (.jsonl) and game table files (.json).
+
+    Returns:
+        dict: The 'hands' and 'sets' tables.
+    """
+    builder = HistoryBuilder()
+    for path in paths:
+        if path.endswith('.jsonl'):
+            builder.add_results_log(path)
+        else:
+            builder.add_game_table(path)
+    return builder.tables()
+
+def save_history(directory: str, tables: dict):
+    """
+    Saves tables as one .npy file per column, with the player names and game ids in history.json.
+    """
+    os.makedirs(directory, exist_ok = True)
+    for name, table in tables.items():
+        for column, values in table.columns.items():
+            np.save(os.path.join(directory, f'{name}.{column}.npy'), values)
+    first = next(iter(tables.values()))
+    with open(os.path.join(directory, METADATA_FILE), 'w', encoding = 'utf-8') as file:
+        json.dump({'tables': {name: list(table.columns) for name, table in tables.items()}, 'players': first.players, 'games': first.games}, file, ensure_ascii = False)
+
+def load_history(directory: str, mmap: bool = True) -> dict:
+    """
+    Loads saved tables, memory-mapped by default: only the columns a query reads are paged in.
+
+    Returns:
+        dict: The tables, by name.
+    """
+    with open(os.path.join(directory, METADATA_FILE), encoding = 'utf-8') as file:
+        metadata = json.load(file)
+    mode = 'r' if mmap else None
+    return {name: ColumnTable({column: np.load(os.path.join(directory, f'{name}.{column}.npy'), mmap_mode = mode) for column in columns},
+                              metadata['players'], metadata['games'])
+            for name, columns in metadata['tables'].items()}
+
+def parse_condition(text: str) -> tuple:
+    """
+    Parses a command-line condition 'column=value' or 'column=value,value,...' (values are ints, or player names).
+    """
+    name, _, values = text.partition('=')
+    parsed = [int(value) if value.lstrip('-').isdigit() else value for value in values.split(',')]
+    return name, parsed if len(parsed) > 1 else parsed[0]
+
+def main():
+    """
+    Ingests histories, or runs a query over an ingested history, from the command line.
+    """
+    parser = argparse.ArgumentParser(description = 'Columnar analytics over the history of played games.')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+    ingest_parser = subparsers.add_parser('ingest', help = 'convert results logs (.jsonl) and game tables (.json) into columns')
+    ingest_parser.add_argument('paths', nargs = '+', help = 'the files to ingest')
+    ingest_parser.add_argument('--output', required = True, help = 'directory of the columns')
+    query = subparsers.add_parser('query', help = 'group and aggregate an ingested history')
+    query.add_argument('history', help = 'directory of the columns')
+    query.add_argument('--table', choices = sorted(TABLES), default = 'hands', help = 'the table to query')
+    query.add_argument('--where', nargs = '*', default = [], metavar = 'COLUMN=VALUE', help = 'keep the rows where a column has a value (or one of comma-separated values)')
+    query.add_argument('--group-by', nargs = '+', required = True, help = 'the columns to group on')
+    query.add_argument('--aggregate', nargs = '+', default = ['count:game'], metavar = 'FUNCTION:COLUMN', help = f'aggregates ({", ".join(AGGREGATES)})')
+    args = parser.parse_args()
+
+    import time
+    start = time.perf_counter()
+    if args.command == 'ingest':
+        tables = ingest(args.paths)
+        save_history(args.output, tables)
+        print(f'{len(tables["hands"]):,} hand rows and {len(tables["sets"]):,} set rows of {len(tables["hands"].games):,} games '
+              f'written to {args.output} in {time.perf_counter() - start:.2f} s.')
+        return
+
+    try:
+        table = load_history(args.history)[args.table]
+        table = table.where(**dict(parse_condition(condition) for condition in args.where))
+        aggregates = {}
+        for text in args.aggregate:
+            function, _, column = text.partition(':')
+            aggregates[f'{function} {column}'] = (column, function)
+        result = table.group_by(*args.group_by).aggregate(**aggregates)
+    except ValueError as error:
+        sys.exit(str(error))
+    elapsed = time.perf_counter() - start
+
+    # Imported here, as in bench.py: only the printed result needs it
+    from prettytable import PrettyTable
+    printed = PrettyTable(list(result.columns))
+    for row in result.rows():
+        printed.add_row([f'{value:.2f}' if isinstance(value, float) else value for value in row])
+    print(printed)
+    print(f'{len(table):,} rows scanned in {elapsed * 1000:.1f} ms.')
+
+if __name__ == '__main__':
+    main()
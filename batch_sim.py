@@ -0,0 +1,296 @@
+import argparse
+import numpy as np
+from constants import SUITS, RANKS, NUMBER_OF_PLAYERS, CARDS_PER_PLAYER
+from card_masks import NUMBER_OF_CARDS, SUIT_ORDER, SUIT_MASKS, JOKER_MASK, CARD_SUITS
+from decisions import SimpleDecisions, SIMPLE_PLAY_ORDER, SIMPLE_BID_MASK
+from scoring import SCORE_TABLE
+from cards import Deck
+from deals import DEAL_POSITIONS, DealGenerator
+from trick_resolution import JOKER_PLAY_STRENGTH, card_strength, joker_lead_strength
+
+# Trump index used for "no trump" (suits are indexed in SUIT_ORDER)
+NO_TRUMP = len(SUIT_ORDER)
+
+# SUIT_ROWS[suit index] marks the card ids of the suit (Jokers excluded); the NO_TRUMP row is empty
+SUIT_ROWS = np.array([[bool(SUIT_MASKS[suit] >> card_id & 1) for card_id in range(NUMBER_OF_CARDS)] for suit in SUIT_ORDER + ['None']])
+JOKER_ROW = np.array([bool(JOKER_MASK >> card_id & 1) for card_id in range(NUMBER_OF_CARDS)])
+BID_ROW = np.array([bool(SIMPLE_BID_MASK >> card_id & 1) for card_id in range(NUMBER_OF_CARDS)])
+# Per card id: suit index (NO_TRUMP for Jokers), and position in the SimpleDecisions card order
+CARD_SUIT_INDEX = np.array([NO_TRUMP if suit == 'JOKER' else SUIT_ORDER.index(suit) for suit in CARD_SUITS])
+PLAY_ORDER = np.array(SIMPLE_PLAY_ORDER)
+SCORES = np.array(SCORE_TABLE)
+# Strengths of trick_resolution.py by suit index (NO_TRUMP: no trump, or no suit required after a 'High' Joker lead):
+# CARD_STRENGTH[trump, suit required, card id] for a card not played as a Joker, and JOKER_LEAD_STRENGTH[led 'High',
+# trump, suit wanted] for a Joker lead
+SUIT_NAMES = SUIT_ORDER + ['None']
+CARD_STRENGTH = np.array([[[card_strength(card_id, trump_suit, suit_required) for card_id in range(NUMBER_OF_CARDS)]
+                           for suit_required in SUIT_NAMES] for trump_suit in SUIT_NAMES])
+JOKER_LEAD_STRENGTH = np.array([[[joker_lead_strength(action, suit_wanted, trump_suit) for suit_wanted in SUIT_NAMES]
+                                 for trump_suit in SUIT_NAMES] for action in ('Low', 'High')])
+
+class BatchSimulator:
+    """
+    Plays a batch of independent hands in parallel with NumPy arrays, under the SimpleDecisions policy.
+
+    Every step (dealing, choosing the trump suit, bidding, playing each card, resolving each trick and scoring) is a
+    handful of array operations across the batch axis, so large batches cost little more than a single hand per step.
+    The results are identical to playing the same deals with PlayHand and SimpleDecisions (see compare_with_scalar).
+
+    Attributes:
+        1) n_games (int): The number of hands in the batch.
+        2) deal_generator (DealGenerator): The generator of the deals (see deals.py).
+        3) lead_seat (int): The seat that chooses the trump suit, bids first and leads the first trick.
+        4) dealer_seat (int): The seat that deals and bids last.
+        5) deck_orders (ndarray): (n_games, 36) card ids of each shuffled deck, in the order PlayHand deals from.
+        6) hands (ndarray): (n_games, 4, 36) booleans marking the cards each seat still holds.
+        7) trumps (ndarray): (n_games,) trump suit index, NO_TRUMP for no trump.
+        8) bids (ndarray): (n_games, 4) bid of each seat.
+        9) cards_played (ndarray): (n_games, 9, 4) card id played by each seat in each trick.
+        10) trick_leaders (ndarray): (n_games, 9) seat leading each trick.
+        11) tricks_won (ndarray): (n_games, 4) tricks won by each seat.
+        12) scores (ndarray): (n_games, 4) score of each seat for the hand.
+    """
+
+    def __init__(self, n_games: int, seed: int = None, lead_seat: int = 0, deck_orders: np.ndarray = None):
+        """
+        Initializes a BatchSimulator instance.
+
+        Args:
+            n_games (int): The number of hands to play.
+            seed (int): Seed of the random number generator, so that a batch can be reproduced.
+            lead_seat (int): The lead seat of every hand; the dealer is the seat before it, as in PlaySet.
+            deck_orders (ndarray): (n_games, 36) card ids of the decks to deal, instead of generating them.
+        """
+        self.n_games = n_games
+        self.deal_generator = DealGenerator(seed)
+        self.lead_seat = lead_seat
+        self.dealer_seat = (lead_seat - 1) % NUMBER_OF_PLAYERS
+        self.deck_orders = deck_orders
+        self.hands = None
+        self.trumps = None
+        self.bids = None
+        self.cards_played = np.zeros((n_games, CARDS_PER_PLAYER, NUMBER_OF_PLAYERS), dtype = np.int8)
+        self.trick_leaders = np.zeros((n_games, CARDS_PER_PLAYER), dtype = np.int8)
+        self.tricks_won = np.zeros((n_games, NUMBER_OF_PLAYERS), dtype = np.int64)
+        self.scores = None
+
+    def run(self) -> 'BatchSimulator':
+        """
+        Plays the whole batch: deals, chooses the trump suits, places the bids, plays the nine tricks and scores the hands.
+        """
+        self.deal()
+        self.choose_trumps()
+        self.place_bids()
+        self.play_tricks()
+        self.score_hands()
+        return self
+
+    def deal(self):
+        """
+        Shuffles a deck per hand (unless the decks are given) and deals nine cards to each seat.
+        """
+        if self.deck_orders is None:
+            self.deck_orders = self.deal_generator.generate(self.n_games)
+        dealt = self.deck_orders[:, DEAL_POSITIONS]
+        self.hands = np.zeros((self.n_games, NUMBER_OF_PLAYERS, NUMBER_OF_CARDS), dtype = bool)
+        rows = np.arange(self.n_games)[:, None, None]
+        seats = np.arange(NUMBER_OF_PLAYERS)[None, :, None]
+        self.hands[rows, seats, dealt] = True
+
+    def choose_trumps(self):
+        """
+        The lead seat chooses the suit of at least two of its first three cards, otherwise no trump.
+        """
+        first_three = self.deck_orders[:, DEAL_POSITIONS[self.lead_seat, :3]]
+        suits = CARD_SUIT_INDEX[first_three]
+        suit_counts = (suits[:, :, None] == np.arange(len(SUIT_ORDER))).sum(axis = 1)
+        self.trumps = np.where(suit_counts.max(axis = 1) >= 2, suit_counts.argmax(axis = 1), NO_TRUMP)
+
+    def place_bids(self):
+        """
+        Every seat bids its number of Aces and Jokers; the dealer adds one if that bid would make the bids sum to nine.
+        """
+        self.bids = (self.hands & BID_ROW).sum(axis = 2)
+        other_bids = self.bids.sum(axis = 1) - self.bids[:, self.dealer_seat]
+        self.bids[:, self.dealer_seat] += (self.bids[:, self.dealer_seat] == CARDS_PER_PLAYER - other_bids)
+
+    def play_tricks(self):
+        """
+        Plays the nine tricks of every hand, one card position at a time across the whole batch.
+        """
+        rows = np.arange(self.n_games)
+        leaders = np.full(self.n_games, self.lead_seat)
+
+        for trick in range(CARDS_PER_PLAYER):
+            self.trick_leaders[:, trick] = leaders
+            played = np.zeros((self.n_games, NUMBER_OF_PLAYERS), dtype = np.int64)
+
+            for position in range(NUMBER_OF_PLAYERS):
+                seats = (leaders + position) % NUMBER_OF_PLAYERS
+                hands = self.hands[rows, seats]
+
+                if position == 0:
+                    # The leader plays its highest card; a Joker is led 'High', asking for the trump suit (♦ without trump)
+                    cards = np.where(hands, PLAY_ORDER, -1).argmax(axis = 1)
+                    joker_lead = JOKER_ROW[cards]
+                    high_lead = joker_lead
+                    suits_required = np.where(joker_lead, np.where(self.trumps == NO_TRUMP, 0, self.trumps), CARD_SUIT_INDEX[cards])
+                else:
+                    legal = self.get_legal_cards(hands, suits_required, high_lead)
+                    cards = np.where(legal, PLAY_ORDER, NUMBER_OF_CARDS * 2).argmin(axis = 1)
+
+                self.hands[rows, seats, cards] = False
+                played[:, position] = cards
+                self.cards_played[rows, trick, seats] = cards
+
+            winners = (leaders + self.get_winning_positions(played, joker_lead, high_lead, suits_required)) % NUMBER_OF_PLAYERS
+            self.tricks_won[rows, winners] += 1
+            leaders = winners
+
+    def get_legal_cards(self, hands: np.ndarray, suits_required: np.ndarray, high_lead: np.ndarray) -> np.ndarray:
+        """
+        Returns the legal cards of the following seats, with the rules of legal_moves.legal_cards.
+
+        Args:
+            hands (ndarray): (n_games, 36) cards held by the seats about to play.
+            suits_required (ndarray): (n_games,) lead suit, or suit wanted after a Joker lead.
+            high_lead (ndarray): (n_games,) whether a Joker has been led 'High'.
+
+        Returns:
+            ndarray: (n_games, 36) booleans marking the legal cards.
+        """
+        rows = np.arange(self.n_games)
+        required = hands & SUIT_ROWS[suits_required]
+        # After a 'High' Joker lead, only the highest card of the wanted suit may be played
+        highest = np.zeros_like(required)
+        highest[rows, NUMBER_OF_CARDS - 1 - required[:, ::-1].argmax(axis = 1)] = True
+        required = np.where(high_lead[:, None], required & highest, required)
+
+        trump_cards = hands & SUIT_ROWS[self.trumps]
+        jokers = hands & JOKER_ROW
+        return np.where(required.any(axis = 1)[:, None], required | jokers,
+                        np.where(trump_cards.any(axis = 1)[:, None], trump_cards | jokers, hands))
+
+    def get_winning_positions(self, played: np.ndarray, joker_lead: np.ndarray, high_lead: np.ndarray, suits_required: np.ndarray) -> np.ndarray:
+        """
+        Resolves the tricks with the rules of PlayHand.determine_trick_winner, by giving every card its strength (see
+        trick_resolution.py) and taking the strongest. Jokers played after the lead are played to win ('Play').
+
+        Args:
+            played (ndarray): (n_games, 4) card ids in playing order.
+            joker_lead (ndarray): (n_games,) whether a Joker has been led.
+            high_lead (ndarray): (n_games,) whether the Joker has been led 'High'.
+            suits_required (ndarray): (n_games,) lead suit, or suit wanted after a Joker lead.
+
+        Returns:
+            ndarray: (n_games,) position (0 for the leader) of the winning card.
+        """
+        jokers = JOKER_ROW[played]
+        positions = np.arange(NUMBER_OF_PLAYERS)
+
+        # After a 'High' Joker lead, cards of the suit wanted cannot beat the Joker
+        required = np.where(high_lead, NO_TRUMP, suits_required)
+        strength = CARD_STRENGTH[self.trumps[:, None], required[:, None], played]
+        strength = np.where(jokers & (positions > 0), JOKER_PLAY_STRENGTH + positions, strength)
+        lead_joker_strength = JOKER_LEAD_STRENGTH[high_lead.astype(np.int8), self.trumps, suits_required]
+        strength[:, 0] = np.where(joker_lead, lead_joker_strength, strength[:, 0])
+        return strength.argmax(axis = 1)
+
+    def resolve_tricks(self):
+        """
+        Recounts the tricks won from the cards played, the trick leaders and the trump suits, with the Joker choices of
+        the SimpleDecisions policy (led 'High' asking for the trump suit, played to win when following).
+        """
+        rows = np.arange(self.n_games)
+        self.tricks_won[:] = 0
+        for trick in range(CARDS_PER_PLAYER):
+            leaders = self.trick_leaders[:, trick]
+            seats = (leaders[:, None] + np.arange(NUMBER_OF_PLAYERS)) % NUMBER_OF_PLAYERS
+            played = self.cards_played[rows[:, None], trick, seats]
+            joker_lead = JOKER_ROW[played[:, 0]]
+            suits_required = np.where(joker_lead, np.where(self.trumps == NO_TRUMP, 0, self.trumps), CARD_SUIT_INDEX[played[:, 0]])
+            winners = (leaders + self.get_winning_positions(played, joker_lead, joker_lead, suits_required)) % NUMBER_OF_PLAYERS
+            self.tricks_won[rows, winners] += 1
+
+    def score_hands(self):
+        """
+        Scores every seat with the rules of PlaySet.update_hand_scores.
+        """
+        self.scores = SCORES[self.bids, self.tricks_won]
+
+class PresetDeck(Deck):
+    """
+    A deck whose shuffle puts the cards in a given order of card ids, so that PlayHand deals a known hand.
+    """
+
+    def __init__(self, order: list):
+        super().__init__(RANKS, SUITS)
+        self.order = order
+
+    def shuffle(self):
+        cards_by_id = {card.card_id: card for card in self.cards}
+        self.cards = [cards_by_id[card_id] for card_id in self.order]
+
+def compare_with_scalar(simulator: BatchSimulator, n_games: int = None) -> list:
+    """
+    Replays the deals of a batch with PlayHand and SimpleDecisions, and compares every card, trick and score.
+
+    Args:
+        simulator (BatchSimulator): A batch that has been run.
+        n_games (int): The number of hands to compare (all of them when omitted).
+
+    Returns:
+        list: The indices of the hands whose results differ (empty if the engines agree).
+    """
+    from player import Player
+    from game_hand import PlayHand
+    from scoring import hand_score
+
+    mismatches = []
+    for game in range(simulator.n_games if n_games is None else n_games):
+        players = [Player(f'Seat {seat + 1}', SimpleDecisions()) for seat in range(NUMBER_OF_PLAYERS)]
+        game_hand = PlayHand(players)
+        game_hand.deck = PresetDeck([int(card_id) for card_id in simulator.deck_orders[game]])
+        game_hand.deal_cards_and_place_bids(simulator.lead_seat, simulator.dealer_seat)
+
+        # The card each seat played in a trick is the bit that has left its hand mask
+        cards_played = []
+        for _ in range(CARDS_PER_PLAYER):
+            hands_before = [player.hand for player in players]
+            game_hand.play_trick()
+            cards_played.append([(hand & ~player.hand).bit_length() - 1 for hand, player in zip(hands_before, players)])
+
+        expected_trump = SUIT_ORDER[simulator.trumps[game]] if simulator.trumps[game] != NO_TRUMP else 'None'
+        same = (game_hand.trump_suit == expected_trump
+                and cards_played == simulator.cards_played[game].tolist()
+                and [player.bid for player in players] == simulator.bids[game].tolist()
+                and [player.tricks_won for player in players] == simulator.tricks_won[game].tolist()
+                and [hand_score(player.bid, player.tricks_won) for player in players] == simulator.scores[game].tolist())
+        if not same:
+            mismatches.append(game)
+    return mismatches
+
+def main():
+    """
+    Runs a batch from the command line and prints how often bids of each size succeed.
+    """
+    parser = argparse.ArgumentParser(description = 'Play a batch of hands in parallel with the SimpleDecisions policy.')
+    parser.add_argument('--games', type = int, default = 100000, help = 'number of hands to play')
+    parser.add_argument('--seed', type = int, default = None, help = 'seed of the deals')
+    parser.add_argument('--verify', type = int, default = 0, help = 'number of hands to replay with the scalar engine and compare')
+    args = parser.parse_args()
+
+    simulator = BatchSimulator(args.games, args.seed).run()
+    for bid in range(CARDS_PER_PLAYER + 1):
+        bid_made = simulator.bids == bid
+        if bid_made.any():
+            success_rate = (simulator.tricks_won[bid_made] == bid).mean()
+            print(f'Bid {bid}: placed {bid_made.sum()} times, succeeded {success_rate:.1%} of the time.')
+    print(f'Mean score per seat: {simulator.scores.mean():.1f}')
+
+    if args.verify:
+        mismatches = compare_with_scalar(simulator, args.verify)
+        print(f'Compared {args.verify} hands with the scalar engine: {len(mismatches)} mismatches.')
+
+if __name__ == '__main__':
+    main()
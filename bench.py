@@ -0,0 +1,438 @@
+"""
+Benchmark suite of the rules engine.
+
+Every benchmark times one operation of the engine many times and reports its throughput (operations per second) and
+the percentiles of the time per operation. Results can be saved as a JSON baseline, and a later run compared with it:
+the run fails (exit status 1) when a benchmark's throughput has dropped by more than the threshold.
+
+    python bench.py --save bench_baseline.json
+    python bench.py --compare bench_baseline.json --threshold 0.1
+
+Every benchmark prepares its inputs from a fixed seed, so that runs measure the same work. A benchmark may have a
+target time per operation (see TARGETS_US), which is reported and saved with the results; a missed target is
+reported, not failed, as it records a goal rather than a regression.
+
+--startup measures the cold start of a short-lived worker instead: the time a fresh interpreter takes to import the
+engine and deal a first hand, beyond the interpreter's own start, and the import time of every module it loads. With
+--startup-budget the run fails when the cold start exceeds the budget.
+
+    python bench.py --startup --startup-budget 30
+"""
+import argparse
+import compileall
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from prettytable import PrettyTable
+from constants import RANKS, SUITS, NUMBER_OF_PLAYERS
+from cards import Deck
+from card_masks import JOKER_MASK
+from legal_moves import LEAD_JOKER_ACTIONS, FOLLOW_JOKER_ACTIONS
+from decisions import RandomDecisions, SimpleDecisions, SUIT_CHOICES, TRUMP_CHOICES
+from player import Player
+from game_hand import PlayHand
+from game_set import PlaySet
+from game import Game
+from score_table import ScoreTable, IncrementalTableRenderer, render_full_table
+
+# Number of precomputed cases the trick resolution benchmarks cycle through
+TRICK_CASES = 2000
+
+# Benchmark name -> target median time per operation, in microseconds. A full headless game (576 cards played) was
+# meant to take well under a millisecond; with headless hands (see PlayHand.play_headless_trick) it takes about 1.5 to
+# 2 ms, of which about 0.7 ms outside the tricks (the 16 shuffles alone take 0.2 to 0.3 ms).
+TARGETS_US = {'full_game': 1000.0}
+
+# Benchmark name -> setup function; a setup function receives a random number generator and returns the operation to time
+BENCHMARKS = {}
+
+def benchmark(name: str):
+    """
+    Registers a benchmark setup function under a name.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+@benchmark('deck')
+def setup_deck(rng: random.Random):
+    """
+    Deck.create_deck followed by Deck.shuffle.
+    """
+    deck = Deck(RANKS, SUITS, rng)
+    def operation():
+        deck.create_deck()
+        deck.shuffle()
+    return operation
+
+@benchmark('deal')
+def setup_deal(rng: random.Random):
+    """
+    PlayHand.deal_cards (which creates and shuffles the deck), with the players' hands cleared beforehand.
+    """
+    players = [Player(f'Player {seat + 1}', SimpleDecisions()) for seat in range(NUMBER_OF_PLAYERS)]
+    game_hand = PlayHand(players, rng = rng)
+    def operation():
+        for player in players:
+            player.reset_for_another_hand()
+        game_hand.deal_cards()
+    return operation
+
+def make_trick_cases(rng: random.Random, joker_lead: bool, count: int) -> tuple[PlayHand, list]:
+    """
+    Builds random complete tricks, with legal cards, for the trick resolution benchmarks.
+
+    Args:
+        rng (random.Random): The random number generator of the deals and plays.
+        joker_lead (bool): Whether the tricks are led by a Joker.
+        count (int): The number of tricks.
+
+    Returns:
+        Tuple[PlayHand, list]: The hand the tricks are resolved with, and (lead player index, lead card, trump suit,
+        suit wanted, lead Joker action, cards played) of each trick.
+    """
+    players = [Player(f'Player {seat + 1}', RandomDecisions(rng)) for seat in range(NUMBER_OF_PLAYERS)]
+    game_hand = PlayHand(players, rng = rng)
+    cases = []
+    while len(cases) < count:
+        for player in players:
+            player.reset_for_another_hand()
+        game_hand.deal_cards()
+        game_hand.trump_suit = rng.choice(TRUMP_CHOICES)
+        game_hand.lead_player_index = rng.randrange(NUMBER_OF_PLAYERS)
+        lead_player = players[game_hand.lead_player_index]
+        # Only keep deals where the lead player holds a card of the kind wanted
+        lead_cards = [card for card in lead_player.cards if bool(card.bit & JOKER_MASK) == joker_lead]
+        if not lead_cards:
+            continue
+        game_hand.lead_card = rng.choice(lead_cards)
+        game_hand.lead_joker_action = rng.choice(LEAD_JOKER_ACTIONS) if joker_lead else None
+        game_hand.suit_wanted = rng.choice(SUIT_CHOICES) if joker_lead else None
+
+        cards_played = {lead_player: (game_hand.lead_card, 'NotApplicable')}
+        for player in game_hand.get_following_players():
+            card = rng.choice(game_hand.get_playable_cards(player))
+            cards_played[player] = (card, rng.choice(FOLLOW_JOKER_ACTIONS) if card.bit & JOKER_MASK else 'NotApplicable')
+        cases.append((game_hand.lead_player_index, game_hand.lead_card, game_hand.trump_suit, game_hand.suit_wanted, game_hand.lead_joker_action, cards_played))
+    return game_hand, cases
+
+def trick_operation(game_hand: PlayHand, cases: list, resolve: object):
+    """
+    Returns an operation that loads the next trick case into the hand and resolves it with 'resolve'.
+    """
+    position = [0]
+    def operation():
+        case = cases[position[0]]
+        position[0] = (position[0] + 1) % len(cases)
+        game_hand.lead_player_index, game_hand.lead_card, game_hand.trump_suit, game_hand.suit_wanted, game_hand.lead_joker_action, game_hand.cards_played = case
+        resolve()
+    return operation
+
+@benchmark('trick_non_joker_lead')
+def setup_trick_non_joker_lead(rng: random.Random):
+    """
+    PlayHand.determine_winner_for_non_joker_lead over random legal tricks.
+    """
+    game_hand, cases = make_trick_cases(rng, False, TRICK_CASES)
+    return trick_operation(game_hand, cases, game_hand.determine_winner_for_non_joker_lead)
+
+@benchmark('trick_joker_lead')
+def setup_trick_joker_lead(rng: random.Random):
+    """
+    PlayHand.determine_winner_for_joker_lead over random legal tricks ('High' and 'Low', every suit wanted).
+    """
+    game_hand, cases = make_trick_cases(rng, True, TRICK_CASES)
+    return trick_operation(game_hand, cases, game_hand.determine_winner_for_joker_lead)
+
+@benchmark('hand_scores')
+def setup_hand_scores(rng: random.Random):
+    """
+    PlaySet.update_hand_scores for random bids and tricks won, with the players' scores cleared afterwards.
+    """
+    players = [Player(f'Player {seat + 1}', SimpleDecisions()) for seat in range(NUMBER_OF_PLAYERS)]
+    game_set = PlaySet(players, rng = rng)
+    for player in players:
+        player.bid = rng.randint(0, 4)
+        player.tricks_won = rng.randint(0, 4)
+    def operation():
+        game_set.update_hand_scores()
+        for player in players:
+            player.score = 0
+            player.reset_for_another_set()
+    return operation
+
+@benchmark('full_game')
+def setup_full_game(rng: random.Random):
+    """
+    A full headless game (four sets of four hands) between SimpleDecisions bots, from a fixed seed per game.
+    """
+    seeds = [rng.getrandbits(32) for _ in range(64)]
+    position = [0]
+    def operation():
+        seed = seeds[position[0]]
+        position[0] = (position[0] + 1) % len(seeds)
+        players = [Player(f'Player {seat + 1}', SimpleDecisions()) for seat in range(NUMBER_OF_PLAYERS)]
+        Game(players, results_file = None, rng = random.Random(seed)).play_set()
+    return operation
+
+@benchmark('full_game_instrumented')
+def setup_full_game_instrumented(rng: random.Random):
+    """
+    The full game benchmark with the instrumentation enabled (see instrumentation.py), to measure its overhead.
+    """
+    import instrumentation
+    play_game = setup_full_game(rng)
+    metrics = instrumentation.Metrics()
+    def operation():
+        instrumentation.enable(metrics)
+        try:
+            play_game()
+        finally:
+            instrumentation.disable()
+    return operation
+
+def make_table_rows(rng: random.Random) -> list:
+    """
+    Returns the rows of a game table, with their dividers, as a game adds them: four hands then the set scores, per set.
+    """
+    rows = []
+    totals = [0] * NUMBER_OF_PLAYERS
+    for _ in range(4):
+        for hand in range(4):
+            rows.append(([f'{rng.randint(0, 9)}: {rng.choice([-500, 10, 20, 50, 100, 200])}' for _ in range(NUMBER_OF_PLAYERS)], hand == 3))
+        totals = [total + rng.randint(-500, 500) for total in totals]
+        rows.append((list(totals), True))
+    return rows
+
+def table_rendering_operation(rows: list, render: object):
+    """
+    Returns an operation that builds a game table row by row and renders it after every row, as the console does.
+    """
+    def operation():
+        table = ScoreTable([f'Player {seat + 1}' for seat in range(NUMBER_OF_PLAYERS)])
+        for row, divider in rows:
+            table.add_row(row, divider = divider)
+            render(table)
+    return operation
+
+@benchmark('table_incremental')
+def setup_table_incremental(rng: random.Random):
+    """
+    The game table of a whole game rendered after every row by IncrementalTableRenderer (new rows only).
+    """
+    renderer = IncrementalTableRenderer()
+    return table_rendering_operation(make_table_rows(rng), renderer.render)
+
+@benchmark('table_full')
+def setup_table_full(rng: random.Random):
+    """
+    The game table of a whole game reprinted in full by PrettyTable after every row.
+    """
+    return table_rendering_operation(make_table_rows(rng), render_full_table)
+
+def measure(operation: object, samples: int = 30, min_sample_time: float = 0.01) -> dict:
+    """
+    Times an operation.
+
+    The operation is repeated in samples of equal size, calibrated so that a sample lasts at least 'min_sample_time'
+    seconds, and the time per operation of each sample is recorded.
+
+    Returns:
+        dict: 'ops_per_sec' (from the fastest sample), 'p50_us', 'p90_us', 'p99_us' (time per operation in microseconds,
+        over the samples), and 'number' (operations per sample).
+    """
+    # Calibrate the number of operations per sample (this also warms up the operation)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        if time.perf_counter() - start >= min_sample_time:
+            break
+        number *= 2
+
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        times.append((time.perf_counter() - start) / number)
+
+    quantiles = statistics.quantiles(times, n = 100, method = 'inclusive')
+    median = statistics.median(times)
+    # The fastest sample is the least disturbed by the rest of the machine, so throughput is taken from it
+    return {
+        'ops_per_sec': 1 / min(times),
+        'p50_us': median * 1e6,
+        'p90_us': quantiles[89] * 1e6,
+        'p99_us': quantiles[98] * 1e6,
+        'number': number,
+    }
+
+# What a headless worker does before its first deal: import the engine, seat bot players and deal a hand
+STARTUP_PROBE = """
+import random
+from player import Player
+from decisions import SimpleDecisions
+from game import Game
+from game_set import PlaySet
+players = [Player(f'Player {seat + 1}', SimpleDecisions()) for seat in range(4)]
+game_set = PlaySet(players, rng = random.Random(0))
+game_set.game_hand.deal_cards()
+"""
+
+def run_interpreter(code: str, options: list = ()) -> tuple[float, str]:
+    """
+    Runs code in a fresh interpreter, from the directory of the engine.
+
+    Returns:
+        Tuple[float, str]: The wall time of the run in seconds, and what it wrote to stderr.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, *options, '-c', code], cwd = directory, capture_output = True, text = True, check = True)
+    return time.perf_counter() - start, process.stderr
+
+def measure_startup(runs: int = 20) -> dict:
+    """
+    Measures the cold start of the engine: the median wall time of a fresh interpreter running STARTUP_PROBE, minus the
+    median wall time of an interpreter doing nothing.
+
+    The engine is compiled to bytecode first, as it is in any installed copy, so that the sources are not compiled on
+    every run when bytecode is not written (PYTHONDONTWRITEBYTECODE).
+
+    Returns:
+        dict: 'cold_start_ms', 'interpreter_ms', and 'modules': (module, self time, cumulative time) in milliseconds of
+        every module imported by the probe, as reported by 'python -X importtime'.
+    """
+    compileall.compile_dir(os.path.dirname(os.path.abspath(__file__)), maxlevels = 0, quiet = 1)
+    interpreter = statistics.median(run_interpreter('pass')[0] for _ in range(runs))
+    probe = statistics.median(run_interpreter(STARTUP_PROBE)[0] for _ in range(runs))
+
+    # Import times of the probe, on top of what the interpreter imports at start (site and its dependencies)
+    _, baseline_report = run_interpreter('pass', ['-X', 'importtime'])
+    _, report = run_interpreter(STARTUP_PROBE, ['-X', 'importtime'])
+    already_imported = {line.rsplit('|', 1)[1].strip() for line in baseline_report.splitlines() if line.startswith('import time:')}
+    modules = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, name = line[len('import time:'):].split('|')
+        if name.strip() not in already_imported:
+            modules.append((name.strip(), int(self_time) / 1000, int(cumulative_time) / 1000))
+    return {'cold_start_ms': (probe - interpreter) * 1000, 'interpreter_ms': interpreter * 1000, 'modules': modules}
+
+def run_benchmarks(names: list = None, seed: int = 0, samples: int = 30, min_sample_time: float = 0.01) -> dict:
+    """
+    Runs benchmarks and returns their results by name.
+
+    Args:
+        names (list): The benchmarks to run (all of them when omitted).
+        seed (int): The seed every benchmark prepares its inputs from.
+        samples (int): The number of timed samples per benchmark.
+        min_sample_time (float): The minimum duration of a sample, in seconds.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        operation = BENCHMARKS[name](random.Random(seed))
+        results[name] = measure(operation, samples, min_sample_time)
+        if name in TARGETS_US:
+            results[name]['target_us'] = TARGETS_US[name]
+            results[name]['meets_target'] = results[name]['p50_us'] <= TARGETS_US[name]
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compares results with a baseline.
+
+    Returns:
+        list: (name, ratio of throughputs) of every benchmark slower than the baseline by more than 'threshold'.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name in baseline:
+            ratio = result['ops_per_sec'] / baseline[name]['ops_per_sec']
+            if ratio < 1 - threshold:
+                regressions.append((name, ratio))
+    return regressions
+
+def check_startup(runs: int, budget: float = None):
+    """
+    Prints the cold start and the import time of the slowest modules, and exits with status 1 if it exceeds the budget.
+    """
+    startup = measure_startup(runs)
+    table = PrettyTable(['module', 'self (ms)', 'cumulative (ms)'])
+    table.align = 'r'
+    table.align['module'] = 'l'
+    for name, self_time, cumulative_time in sorted(startup['modules'], key = lambda module: -module[2])[:15]:
+        table.add_row([name, f'{self_time:.2f}', f'{cumulative_time:.2f}'])
+    print(table)
+    print(f"Cold start to the first deal: {startup['cold_start_ms']:.1f} ms (on top of {startup['interpreter_ms']:.1f} ms of interpreter start).")
+    if budget is not None:
+        if startup['cold_start_ms'] > budget:
+            print(f'Cold start exceeds the budget of {budget:.0f} ms.')
+            sys.exit(1)
+        print(f'Within the budget of {budget:.0f} ms.')
+
+def main():
+    """
+    Runs the benchmark suite from the command line, prints the results, and saves or checks a baseline.
+    """
+    parser = argparse.ArgumentParser(description = 'Benchmark the rules engine.')
+    parser.add_argument('names', nargs = '*', help = f"benchmarks to run (all by default): {', '.join(BENCHMARKS)}")
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the benchmark inputs')
+    parser.add_argument('--samples', type = int, default = 30, help = 'timed samples per benchmark')
+    parser.add_argument('--min-sample-time', type = float, default = 0.01, help = 'minimum duration of a sample, in seconds')
+    parser.add_argument('--save', default = None, help = 'save the results as a JSON baseline to this file')
+    parser.add_argument('--compare', default = None, help = 'compare the results with the JSON baseline in this file')
+    parser.add_argument('--threshold', type = float, default = 0.10, help = 'largest allowed throughput drop against the baseline (0.10 = 10%%)')
+    parser.add_argument('--startup', action = 'store_true', help = 'measure the cold start to a first deal and the import time of every module, instead of the benchmarks')
+    parser.add_argument('--startup-runs', type = int, default = 20, help = 'interpreter runs the cold start is the median of')
+    parser.add_argument('--startup-budget', type = float, default = None, help = 'fail when the cold start exceeds this many milliseconds (implies --startup)')
+    args = parser.parse_args()
+
+    if args.startup or args.startup_budget is not None:
+        check_startup(args.startup_runs, args.startup_budget)
+        return
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run_benchmarks(args.names, args.seed, args.samples, args.min_sample_time)
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    table = PrettyTable(['benchmark', 'ops/sec', 'p50 (µs)', 'p90 (µs)', 'p99 (µs)', 'target (µs)', 'vs baseline'])
+    table.align = 'r'
+    table.align['benchmark'] = 'l'
+    for name, result in results.items():
+        change = f"{result['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1:+.1%}" if baseline and name in baseline else ''
+        target = f"{result['target_us']:.0f} ({'met' if result['meets_target'] else 'missed'})" if 'target_us' in result else ''
+        table.add_row([name, f"{result['ops_per_sec']:,.0f}", f"{result['p50_us']:.2f}", f"{result['p90_us']:.2f}", f"{result['p99_us']:.2f}", target, change])
+    print(table)
+    for name, result in results.items():
+        if not result.get('meets_target', True):
+            print(f"Target missed: {name} takes {result['p50_us']:,.0f} µs per operation at the median, against a target of {result['target_us']:,.0f} µs.")
+
+    if args.save is not None:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent = 4)
+        print(f'Baseline saved to {args.save}.')
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions:
+            print(f'Regression: {name} runs at {ratio:.1%} of the baseline throughput (threshold {args.threshold:.0%}).')
+        if regressions:
+            sys.exit(1)
+        print('No regression against the baseline.')
+
+if __name__ == '__main__':
+    main()
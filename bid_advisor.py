@@ -0,0 +1,166 @@
+"""
+Monte Carlo bid advisor with cached hand-strength estimates.
+
+Given a seat's nine cards, the trump suit, the seat's position in the bidding (0 for the lead player, 3 for the dealer)
+and the bids already placed, the advisor deals the unseen cards at random, plays every deal out with the bid-aware
+playout policy of the search (see ismcts.Deal.play_out: the seats that have bid play for their bid, the others and the
+advised seat for every trick), and counts the tricks the seat takes. The result is the probability of every number of
+tricks, and the bid with the best expected score under SCORE_TABLE. The dealer is never advised the bid
+PlayHand.validate_dealer_bid would reject.
+
+Distributions are cached in an LRU keyed by the canonical index of the hand (see canonical_hands.py), with the position
+and the bids placed: hands that only differ by a relabelling of interchangeable suits share an entry, and a repeated
+query costs a few microseconds. A distribution is simulated from the canonical representative of its class, with a
+seed derived from its key, so it does not depend on which hand of the class was asked first.
+
+    python bid_advisor.py A♦ K♦ Q♦ 7♦ A♥ 9♠ A♣ 10♣ "RED JOKER" --trump ♦ --position 3 --bids 2 1 3
+"""
+import argparse
+import functools
+import hashlib
+import random
+import sys
+import time
+from constants import SUITS, CARDS_PER_PLAYER, NUMBER_OF_PLAYERS
+from cards import parse_card
+from scoring import SCORE_TABLE
+from canonical_hands import hand_index, hand_from_index
+from decisions import SimpleDecisions
+
+# Deals played out per distribution, and distributions kept in the cache
+DEFAULT_SAMPLES = 400
+DEFAULT_CACHE_SIZE = 16384
+# Queries timed by the command line, once the advice is cached
+CACHED_QUERIES = 1000
+
+def expected_scores(distribution: tuple) -> list:
+    """
+    Returns the expected hand score of every bid, from 0 to 9, over a distribution of tricks taken.
+    """
+    return [sum(probability * SCORE_TABLE[bid][taken] for taken, probability in enumerate(distribution)) for bid in range(CARDS_PER_PLAYER + 1)]
+
+class BidAdvisor:
+    """
+    Advises bids from simulated distributions of tricks taken, cached by canonical hand (see the module docstring).
+
+    Attributes:
+        1) samples (int): The deals played out per distribution.
+        2) seed (int): The seed every distribution's seed is derived from.
+        3) cached_advice (functools._lru_cache_wrapper): The LRU cache of the advice (see advise), by (hand index,
+           position, bids placed); cached_advice.cache_info() gives its hits and misses.
+    """
+
+    def __init__(self, samples: int = DEFAULT_SAMPLES, cache_size: int = DEFAULT_CACHE_SIZE, seed: int = 0):
+        if samples < 1:
+            raise ValueError(f'A distribution needs at least one sample, not {samples}.')
+        self.samples = samples
+        self.seed = seed
+        self.cached_advice = functools.lru_cache(maxsize = cache_size)(self.simulate)
+
+    def simulate(self, index: int, position: int, bids_placed: tuple) -> tuple[int, float, tuple]:
+        """
+        Plays out deals of the canonical representative of a hand class, and returns the advice (see advise) from the
+        distribution of its tricks.
+        """
+        # Imported here, so that the console game only loads the search when bid hints are asked for
+        from ismcts import estimate_tricks
+        hand, trump_suit = hand_from_index(index)
+        digest = hashlib.blake2b(f'{self.seed}:{index}:{position}:{bids_placed}'.encode(), digest_size = 8).digest()
+        # The seats are numbered from the lead player; the seats yet to bid play for every trick
+        bids = list(bids_placed) + [CARDS_PER_PLAYER] * (NUMBER_OF_PLAYERS - position)
+        tricks = estimate_tricks(position, hand, [trump_suit], 0, random.Random(int.from_bytes(digest, 'big')), samples = self.samples, bids = bids)[trump_suit]
+        counts = [0] * (CARDS_PER_PLAYER + 1)
+        for taken in tricks:
+            counts[taken] += 1
+        distribution = tuple(count / len(tricks) for count in counts)
+        forbidden_bid = CARDS_PER_PLAYER - sum(bids_placed) if position == NUMBER_OF_PLAYERS - 1 else None
+        scores = expected_scores(distribution)
+        bid = max((bid for bid in range(CARDS_PER_PLAYER + 1) if bid != forbidden_bid), key = scores.__getitem__)
+        return bid, scores[bid], distribution
+
+    def advise(self, hand: int, trump_suit: str, position: int, bids_placed: list = ()) -> tuple[int, float, tuple]:
+        """
+        Returns the bid with the best expected score for a seat, and the probability that it takes 0 to 9 tricks. The
+        dealer, who bids last, is never advised the bid that would make the bids add up to nine.
+
+        Args:
+            hand (int): The bitmask of the seat's nine cards (see card_masks.hand_mask).
+            trump_suit (str): The trump suit, or 'None'.
+            position (int): The seat's position in the bidding: 0 for the lead player, up to 3 for the dealer.
+            bids_placed (list): The bids of the seats before it, in bidding order.
+
+        Returns:
+            Tuple[int, float, tuple]: The bid, its expected score, and the distribution of tricks taken.
+
+        Raises:
+            ValueError: If the hand does not hold nine cards, or the position and the bids placed do not match.
+        """
+        if hand.bit_count() != CARDS_PER_PLAYER:
+            raise ValueError(f'A bid is placed on a hand of {CARDS_PER_PLAYER} cards.')
+        if not 0 <= position < NUMBER_OF_PLAYERS or len(bids_placed) != position:
+            raise ValueError(f'The seat at position {position} bids after {position} bids, not {len(bids_placed)}.')
+        if any(not 0 <= bid <= CARDS_PER_PLAYER for bid in bids_placed):
+            raise ValueError(f'Bids are between 0 and {CARDS_PER_PLAYER}.')
+        return self.cached_advice(hand_index(hand, trump_suit), position, tuple(bids_placed))
+
+    def advise_player(self, player: object, game_hand: object) -> tuple[int, float, tuple]:
+        """
+        Returns the advice (see advise) for a player about to bid in a hand.
+        """
+        players = game_hand.players
+        leader = game_hand.lead_player_index
+        position = (players.index(player) - leader) % NUMBER_OF_PLAYERS
+        bids_placed = [players[(leader + offset) % NUMBER_OF_PLAYERS].bid for offset in range(position)]
+        return self.advise(player.hand, game_hand.trump_suit, position, bids_placed)
+
+class AdvisorDecisions(SimpleDecisions):
+    """
+    SimpleDecisions, with the bids placed by a bid advisor.
+
+    Attributes:
+        1) advisor (BidAdvisor): The bid advisor.
+    """
+
+    def __init__(self, advisor: BidAdvisor = None):
+        self.advisor = advisor if advisor is not None else BidAdvisor()
+
+    def place_bid(self, player: object, game_hand: object) -> int:
+        return self.advisor.advise_player(player, game_hand)[0]
+
+def main():
+    """
+    Prints the advice for a hand from the command line, and the time of a cached query.
+    """
+    parser = argparse.ArgumentParser(description = 'Advise a bid from simulated playouts of a hand.')
+    parser.add_argument('cards', nargs = CARDS_PER_PLAYER, help = 'the nine cards of the hand, e.g. A♦ KD "RED JOKER"')
+    parser.add_argument('--trump', default = 'None', help = 'the trump suit (♦, D, ...) or None')
+    parser.add_argument('--position', type = int, default = 0, help = 'position in the bidding: 0 for the lead player, 3 for the dealer')
+    parser.add_argument('--bids', type = int, nargs = '*', default = [], help = 'the bids already placed, in bidding order')
+    parser.add_argument('--samples', type = int, default = DEFAULT_SAMPLES, help = 'deals played out')
+    args = parser.parse_args()
+
+    hand = 0
+    for text in args.cards:
+        card = parse_card(text)
+        if card is None:
+            sys.exit(f'Unknown card: {text}')
+        hand |= card.bit
+    trump_suit = SUITS.get(args.trump.upper(), args.trump)
+    advisor = BidAdvisor(args.samples)
+    try:
+        start = time.perf_counter()
+        bid, expected_score, distribution = advisor.advise(hand, trump_suit, args.position, args.bids)
+        simulated = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(CACHED_QUERIES):
+            advisor.advise(hand, trump_suit, args.position, args.bids)
+        cached = (time.perf_counter() - start) / CACHED_QUERIES
+    except ValueError as error:
+        sys.exit(str(error))
+    for taken, probability in enumerate(distribution):
+        print(f'{taken} tricks: {probability:6.1%}')
+    print(f'Suggested bid: {bid} (expected score {expected_score:.1f})')
+    print(f'Simulated in {simulated * 1000:.1f} ms, answered from the cache in {cached * 1e6:.1f} µs.')
+
+if __name__ == '__main__':
+    main()
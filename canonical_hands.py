@@ -0,0 +1,221 @@
+"""
+Canonical indexing of hands under the suit symmetries of the deck.
+
+Two hands that differ only by a relabelling of suits the game cannot tell apart play the same way, so a cache keyed on
+hands (hand strength, bid advice, solver results) should key them once. The deck has fewer symmetries than four
+interchangeable suits, because the black Sixes are the Jokers (see card_masks.py):
+
+- ♦ and ♥ have nine cards each and can be swapped; so can ♠ and ♣, which have eight plain cards each (7 to Ace);
+- a red suit cannot be swapped with a black one, as only the black suits lack their Six;
+- the two Jokers play alike (a Joker's strength comes from its position in the trick and its action, not from its
+  colour), so only their number matters;
+- a trump suit is fixed by every symmetry: with ♥ or ♣ trump, the hand is relabelled so that the trump is ♦ or ♠, and
+  its colour partner can no longer be swapped with it.
+
+A hand of a given size and its trump choice map to a dense index: every class of equivalent (hand, trump) pairs has
+one index, from 0 to index_size(size) - 1, so a cache can be a flat array. The index orders the classes by trump
+context (no trump, red trump, black trump), number of Jokers, number of red cards, then the red and black suit
+patterns, each ranked with the combinatorial number system. Up to eight (hand, trump) pairs share an index (the suit
+swaps, times the swap of the Jokers): nine-card hands with a trump choice fall from 470,716,400 pairs to 96,150,324
+classes. hand_from_index gives back the canonical representative of a class.
+"""
+import math
+from constants import RANKS, CARDS_PER_PLAYER
+from card_masks import NUMBER_OF_CARDS, SUIT_ORDER, RED_JOKER_ID, BLACK_JOKER_ID
+
+# Trump contexts in index order, and the trump suit of their canonical representative
+TRUMP_CONTEXTS = ('None', 'red', 'black')
+CANONICAL_TRUMPS = {'None': 'None', 'red': SUIT_ORDER[0], 'black': SUIT_ORDER[2]}
+TRUMP_CONTEXT_OF = {'None': 'None', SUIT_ORDER[0]: 'red', SUIT_ORDER[1]: 'red', SUIT_ORDER[2]: 'black', SUIT_ORDER[3]: 'black'}
+
+# Ranks of a red suit, and plain ranks of a black suit (its Six is a Joker)
+RED_RANKS = len(RANKS)
+BLACK_RANKS = len(RANKS) - 1
+JOKERS = 2
+
+def colex_ranks(bits: int) -> tuple[list, list]:
+    """
+    Returns the rank of every pattern of 'bits' cards among the patterns of the same size (combinatorial number system),
+    and the patterns of every size in rank order.
+    """
+    ranks = [0] * (1 << bits)
+    by_size = [[] for _ in range(bits + 1)]
+    for pattern in range(1 << bits):
+        rank = 0
+        chosen = 0
+        for position in range(bits):
+            if pattern >> position & 1:
+                chosen += 1
+                rank += math.comb(position, chosen)
+        ranks[pattern] = rank
+    for pattern in sorted(range(1 << bits), key = ranks.__getitem__):
+        by_size[pattern.bit_count()].append(pattern)
+    return ranks, by_size
+
+COLEX_RANKS = {bits: colex_ranks(bits) for bits in (RED_RANKS, BLACK_RANKS)}
+
+def pair_sizes(bits: int, cards: int, ordered: bool) -> list:
+    """
+    Returns the (size of the first suit, size of the second suit) splits of 'cards' between two suits of 'bits' cards,
+    in index order. An unordered pair puts its larger suit first.
+    """
+    sizes = [(first, cards - first) for first in range(min(bits, cards) + 1) if cards - first <= bits]
+    return sizes if ordered else [(first, second) for first, second in sizes if first >= second]
+
+def pair_block(bits: int, first: int, second: int, ordered: bool) -> int:
+    """
+    Returns the number of pairs of patterns with the given sizes (an unordered pair of equal sizes is counted once).
+    """
+    if ordered or first != second:
+        return math.comb(bits, first) * math.comb(bits, second)
+    return math.comb(bits, first) * (math.comb(bits, first) + 1) // 2
+
+def pair_count(bits: int, cards: int, ordered: bool) -> int:
+    return sum(pair_block(bits, first, second, ordered) for first, second in pair_sizes(bits, cards, ordered))
+
+def pair_starts(bits: int, ordered: bool) -> list:
+    """
+    Returns, for every number of cards and size of the first suit, the index of the first pair with those sizes.
+    """
+    starts = []
+    for cards in range(2 * bits + 1):
+        index = 0
+        starts.append({})
+        for first, second in pair_sizes(bits, cards, ordered):
+            starts[cards][first] = index
+            index += pair_block(bits, first, second, ordered)
+    return starts
+
+PAIR_STARTS = {(bits, ordered): pair_starts(bits, ordered) for bits in (RED_RANKS, BLACK_RANKS) for ordered in (False, True)}
+
+def pair_index(bits: int, first_pattern: int, second_pattern: int, ordered: bool) -> int:
+    """
+    Returns the index of two suit patterns among the pairs with as many cards. An unordered pair is first put in
+    canonical order: the larger pattern (by size, then rank) first.
+    """
+    ranks = COLEX_RANKS[bits][0]
+    first_size, first_rank = first_pattern.bit_count(), ranks[first_pattern]
+    second_size, second_rank = second_pattern.bit_count(), ranks[second_pattern]
+    if not ordered and (first_size, first_rank) < (second_size, second_rank):
+        first_size, first_rank, second_size, second_rank = second_size, second_rank, first_size, first_rank
+    index = PAIR_STARTS[(bits, ordered)][first_size + second_size][first_size]
+    if ordered or first_size != second_size:
+        return index + first_rank * math.comb(bits, second_size) + second_rank
+    return index + first_rank * (first_rank + 1) // 2 + second_rank
+
+def pair_from_index(bits: int, cards: int, index: int, ordered: bool) -> tuple[int, int]:
+    """
+    Returns the two suit patterns with the given index (see pair_index).
+    """
+    by_size = COLEX_RANKS[bits][1]
+    for first, second in pair_sizes(bits, cards, ordered):
+        block = pair_block(bits, first, second, ordered)
+        if index < block:
+            break
+        index -= block
+    if ordered or first != second:
+        first_rank, second_rank = divmod(index, math.comb(bits, second))
+    else:
+        # Largest first rank whose triangle number does not exceed the index
+        first_rank = (math.isqrt(8 * index + 1) - 1) // 2
+        second_rank = index - first_rank * (first_rank + 1) // 2
+    return by_size[first][first_rank], by_size[second][second_rank]
+
+def index_blocks(size: int) -> list:
+    """
+    Returns the blocks of the index of hands of 'size' cards, in order: (trump context, Jokers, red cards, first index,
+    number of black configurations).
+    """
+    blocks = []
+    offset = 0
+    for context in TRUMP_CONTEXTS:
+        for jokers in range(min(JOKERS, size) + 1):
+            for red_cards in range(size - jokers + 1):
+                red = pair_count(RED_RANKS, red_cards, context == 'red')
+                black = pair_count(BLACK_RANKS, size - jokers - red_cards, context == 'black')
+                if red and black:
+                    blocks.append((context, jokers, red_cards, offset, black))
+                    offset += red * black
+    blocks.append((None, None, None, offset, None))
+    return blocks
+
+INDEX_BLOCKS = [index_blocks(size) for size in range(CARDS_PER_PLAYER + 1)]
+BLOCK_OFFSETS = [{block[:3]: block[3:] for block in blocks[:-1]} for blocks in INDEX_BLOCKS]
+
+def index_size(size: int = CARDS_PER_PLAYER) -> int:
+    """
+    Returns the number of classes of (hand, trump choice) pairs for hands of 'size' cards.
+    """
+    return INDEX_BLOCKS[size][-1][3]
+
+def suit_pattern(hand: int, suit_index: int) -> int:
+    """
+    Returns the ranks of a hand's cards in a suit as a pattern: nine bits for a red suit, eight for the plain cards of a black suit.
+    """
+    if suit_index < 2:
+        return hand >> (suit_index * len(RANKS)) & ((1 << RED_RANKS) - 1)
+    return hand >> (suit_index * len(RANKS) + 1) & ((1 << BLACK_RANKS) - 1)
+
+def hand_index(hand: int, trump_suit: str = 'None') -> int:
+    """
+    Returns the index of the class of a hand with a trump choice.
+
+    Args:
+        hand (int): The bitmask of the hand (see card_masks.py), of at most nine cards.
+        trump_suit (str): The trump suit, or 'None'.
+
+    Raises:
+        ValueError: If the hand is not a set of at most nine cards of the deck, or the trump suit is unknown.
+    """
+    size = hand.bit_count()
+    if hand >> NUMBER_OF_CARDS or size > CARDS_PER_PLAYER:
+        raise ValueError(f'A hand is made of at most {CARDS_PER_PLAYER} cards of the deck.')
+    if trump_suit not in TRUMP_CONTEXT_OF:
+        raise ValueError(f'Unknown trump suit: {trump_suit}.')
+    context = TRUMP_CONTEXT_OF[trump_suit]
+    diamonds, hearts, spades, clubs = (suit_pattern(hand, suit_index) for suit_index in range(len(SUIT_ORDER)))
+    # Relabel so that the trump suit is ♦ or ♠
+    if trump_suit == SUIT_ORDER[1]:
+        diamonds, hearts = hearts, diamonds
+    elif trump_suit == SUIT_ORDER[3]:
+        spades, clubs = clubs, spades
+    jokers = (hand >> RED_JOKER_ID & 1) + (hand >> BLACK_JOKER_ID & 1)
+    red_cards = diamonds.bit_count() + hearts.bit_count()
+    offset, black = BLOCK_OFFSETS[size][(context, jokers, red_cards)]
+    red_index = pair_index(RED_RANKS, diamonds, hearts, context == 'red')
+    return offset + red_index * black + pair_index(BLACK_RANKS, spades, clubs, context == 'black')
+
+def hand_from_index(index: int, size: int = CARDS_PER_PLAYER) -> tuple[int, str]:
+    """
+    Returns the canonical representative of the class with the given index (see hand_index): the trump suit is ♦, ♠ or
+    'None', a single Joker is the RED JOKER, and the larger of two interchangeable suits comes first.
+
+    Returns:
+        Tuple[int, str]: The hand's bitmask and the trump suit.
+
+    Raises:
+        ValueError: If the size or the index is out of range.
+    """
+    if not 0 <= size <= CARDS_PER_PLAYER:
+        raise ValueError(f'A hand is made of at most {CARDS_PER_PLAYER} cards, not {size}.')
+    if not 0 <= index < index_size(size):
+        raise ValueError(f'A hand index of {size} cards must be between 0 and {index_size(size) - 1}, not {index}.')
+    blocks = INDEX_BLOCKS[size]
+    # Find the last block starting at or below the index (there are a few dozen)
+    block = max((block for block in blocks[:-1] if block[3] <= index), key = lambda block: block[3])
+    context, jokers, red_cards, offset, black = block
+    red_index, black_index = divmod(index - offset, black)
+    diamonds, hearts = pair_from_index(RED_RANKS, red_cards, red_index, context == 'red')
+    spades, clubs = pair_from_index(BLACK_RANKS, size - jokers - red_cards, black_index, context == 'black')
+    hand = diamonds | hearts << len(RANKS) | spades << (2 * len(RANKS) + 1) | clubs << (3 * len(RANKS) + 1)
+    if jokers:
+        hand |= 1 << RED_JOKER_ID
+    if jokers == 2:
+        hand |= 1 << BLACK_JOKER_ID
+    return hand, CANONICAL_TRUMPS[context]
+
+def canonical_hand(hand: int, trump_suit: str = 'None') -> tuple[int, str]:
+    """
+    Returns the canonical representative of a hand with a trump choice (see hand_from_index).
+    """
+    return hand_from_index(hand_index(hand, trump_suit), hand.bit_count())
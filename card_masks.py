@@ -0,0 +1,109 @@
+"""
+Bitmask representation of cards and hands.
+
+Each of the 36 cards of the deck is a bit of an int. Card ids follow the order in which Deck.create_deck builds the deck:
+suits in the order of SUITS (♦, ♥, ♠, ♣), and ranks in ascending order within each suit, so that id = suit index * 9 + rank index.
+A hand is the int with the bits of its cards set, which makes suit checks, removals and Joker tests single bitwise operations.
+
+The two black Sixes are the Jokers: 6♠ (id 18) is the RED JOKER and 6♣ (id 27) is the BLACK JOKER. They are not part of
+the mask of their suit.
+"""
+from constants import SUITS, RANKS
+
+NUMBER_OF_CARDS = len(SUITS) * len(RANKS)
+FULL_DECK_MASK = (1 << NUMBER_OF_CARDS) - 1
+
+# Suit symbols in card id order
+SUIT_ORDER = list(SUITS.values())
+
+RED_JOKER_ID = SUIT_ORDER.index('♠') * len(RANKS)
+BLACK_JOKER_ID = SUIT_ORDER.index('♣') * len(RANKS)
+JOKER_MASK = (1 << RED_JOKER_ID) | (1 << BLACK_JOKER_ID)
+
+# Card id of every (suit symbol, rank), and index of every suit symbol in card id order ('JOKER' comes last), for constant-time lookups
+CARD_IDS = {(suit, rank): i * len(RANKS) + value for i, suit in enumerate(SUIT_ORDER) for value, rank in enumerate(RANKS)}
+SUIT_INDEXES = {suit: i for i, suit in enumerate(SUIT_ORDER)}
+SUIT_INDEXES['JOKER'] = len(SUIT_ORDER)
+
+# Mask of every card of a suit, Jokers excluded. 'None' (no trump) maps to an empty mask, so the trump suit can be looked up directly.
+SUIT_MASKS = {suit: (((1 << len(RANKS)) - 1) << (i * len(RANKS))) & ~JOKER_MASK for i, suit in enumerate(SUIT_ORDER)}
+SUIT_MASKS['None'] = 0
+
+# For each card id: its suit symbol ('JOKER' for Jokers) and its rank value (-1 for Jokers), as in cards.Card
+CARD_SUITS = ['JOKER' if (1 << card_id) & JOKER_MASK else SUIT_ORDER[card_id // len(RANKS)] for card_id in range(NUMBER_OF_CARDS)]
+CARD_VALUES = [-1 if (1 << card_id) & JOKER_MASK else card_id % len(RANKS) for card_id in range(NUMBER_OF_CARDS)]
+
+def card_id_for(suit: str, rank: str) -> int:
+    """
+    Returns the id of the card with the given suit symbol and rank.
+
+    Args:
+        suit (str): The suit symbol of the card (e.g., '♦').
+        rank (str): The rank of the card (e.g., '10').
+
+    Returns:
+        int: The card id, between 0 and 35.
+    """
+    return CARD_IDS[(suit, rank)]
+
+def hand_mask(cards: list) -> int:
+    """
+    Returns the bitmask of a list of Card objects.
+    """
+    mask = 0
+    for card in cards:
+        mask |= card.bit
+    return mask
+
+def has_suit(hand: int, suit: str) -> bool:
+    """
+    Checks whether a hand holds a card of the suit ('None' never matches).
+    """
+    return hand & SUIT_MASKS[suit] != 0
+
+def has_joker(hand: int) -> bool:
+    """
+    Checks whether a hand holds a Joker card.
+    """
+    return hand & JOKER_MASK != 0
+
+def is_joker(card_id: int) -> bool:
+    """
+    Checks whether the card id is one of the two Jokers.
+    """
+    return (1 << card_id) & JOKER_MASK != 0
+
+def highest_card(mask: int) -> int:
+    """
+    Returns the id of the highest card in a mask, or -1 if it is empty. Within a suit this is the highest-ranking card.
+    """
+    return mask.bit_length() - 1
+
+def lowest_card(mask: int) -> int:
+    """
+    Returns the id of the lowest card in a mask, or -1 if it is empty. Within a suit this is the lowest-ranking card.
+    """
+    return (mask & -mask).bit_length() - 1
+
+def highest_of_suit(hand: int, suit: str) -> int:
+    """
+    Returns the id of the highest-ranking card of the suit in the hand, or -1 if the hand holds none.
+    """
+    return (hand & SUIT_MASKS[suit]).bit_length() - 1
+
+def card_count(mask: int) -> int:
+    """
+    Returns the number of cards in a mask.
+    """
+    return mask.bit_count()
+
+def card_ids(mask: int) -> list:
+    """
+    Returns the ids of the cards in a mask, in ascending order.
+    """
+    ids = []
+    while mask:
+        low_bit = mask & -mask
+        ids.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return ids
@@ -1,23 +1,34 @@
 import random
 from constants import SUITS, RANKS
+from card_masks import NUMBER_OF_CARDS, SUIT_ORDER, SUIT_INDEXES, CARD_IDS, RED_JOKER_ID, BLACK_JOKER_ID
 
 class Card:
     """
     Represents a single playing card.
-    
+
+    The 36 cards exist once: they are created when the module is imported (see CARDS), and Card(suit, rank) returns the
+    existing card instead of building a new one. Cards are immutable, so the same objects can be shared by every deck,
+    hand and game, and compared by identity.
+
     Attributes: 
         1) suit (str): The suit of the card (e.g., '♠', '♣', '♥', '♦', or 'JOKER' for Jokers)
         2) rank (str): The rank of the card (e.g., '2', '3', ..., '10', 'J', 'Q', 'K', 'A', and 'RED', 'BLACK' for Jokers).
         3) value (int): The index value of the card rank for comparison purposes.
+        4) card_id (int): The position of the card in the deck (0-35), as used by card_masks.
+        5) bit (int): The bitmask of the card (1 << card_id), so that hands can be represented as ints.
+        6) suit_index (int): The index of the suit in SUIT_ORDER (4 for Jokers).
+        7) label (str): The string representation of the card, e.g. 'A♦' or 'RED JOKER'.
         
     Returns:
         str: A string representation of the card in the format '{rank}{suit}'.
         
     """
-    
-    def __init__(self, suit: str, rank: str):
+
+    __slots__ = ('suit', 'rank', 'value', 'card_id', 'bit', 'suit_index', 'label')
+
+    def __new__(cls, suit: str, rank: str):
         """
-        Initializes a Card instance.
+        Returns the card with the given suit and rank.
 
         Args:
             suit (str): The suit of the card.
@@ -27,43 +38,74 @@ class Card:
             Special cards: 
             - '6♠' is replaced by 'RED JOKER'.
             - '6♣' is replaced by 'BLACK JOKER'.
-            
+
+        Raises:
+            ValueError: If the suit or the rank is invalid.
         """
-        
-        try:
-            # Replace '6♠' with RED JOKER and assign it a unique value (-1)
-            if rank == '6' and suit == '♠':
-                self.suit = 'JOKER'
-                self.rank = 'RED '
-                self.value = -1
-            # Replace '6♣' with BLACK JOKER and assign it a unique value (-1)
-            elif rank == '6' and suit == '♣':
-                self.suit = 'JOKER'
-                self.rank = 'BLACK '
-                self.value = -1
-            else:
-                # Ensure the 'suit' is valid to prevent errors
-                if suit in SUITS.values():
-                    self.suit = suit
-                else:
-                    raise ValueError(f'Invalid suit has been passed: {suit}')
-                
-                # Ensure the 'rank' is valid to prevent errors
-                if rank in RANKS:
-                    self.rank = rank
-                    # In RANKS, ranks of the cards are stored in ascending order, 
-                    # so the higher the index, the higher the value of the card.
-                    self.value = RANKS.index(rank)
-                else:
-                    raise ValueError(f'Invalid rank has been passed: {rank}')
-        except ValueError as error:
-            print(f'Error: {error}')
+        card_id = CARD_IDS.get((suit, rank))
+        if card_id is None:
+            if suit not in SUIT_ORDER:
+                raise ValueError(f'Invalid suit has been passed: {suit}')
+            raise ValueError(f'Invalid rank has been passed: {rank}')
+        return CARDS[card_id]
+
+    @classmethod
+    def build(cls, card_id: int) -> 'Card':
+        """
+        Builds the card with the given id. Only used to create CARDS, once.
+        """
+        card = object.__new__(cls)
+        # Replace '6♠' with RED JOKER and '6♣' with BLACK JOKER, and assign them a unique value (-1)
+        if card_id == RED_JOKER_ID:
+            suit, rank, value = 'JOKER', 'RED ', -1
+        elif card_id == BLACK_JOKER_ID:
+            suit, rank, value = 'JOKER', 'BLACK ', -1
+        else:
+            # In RANKS, ranks of the cards are stored in ascending order, 
+            # so the higher the index, the higher the value of the card.
+            suit, rank, value = SUIT_ORDER[card_id // len(RANKS)], RANKS[card_id % len(RANKS)], card_id % len(RANKS)
+        for name, attribute in (('suit', suit), ('rank', rank), ('value', value), ('card_id', card_id), ('bit', 1 << card_id),
+                                ('suit_index', SUIT_INDEXES[suit]), ('label', f'{rank}{suit}')):
+            object.__setattr__(card, name, attribute)
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Card objects are immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError('Card objects are immutable.')
+
+    def __reduce__(self):
+        # Copies and unpickled cards are the singletons themselves
+        return (card_for_id, (self.card_id,))
+
+    def __repr__(self):
+        return f'Card({self.label!r})'
         
     def __str__(self):
         """
         Returns the string representation of the card.
         """
-        return f'{self.rank}{self.suit}'
+        return self.label
+
+# The 36 cards, by card id
+CARDS = [Card.build(card_id) for card_id in range(NUMBER_OF_CARDS)]
+
+# Every string a player may enter for a card (upper case), e.g. 'A♦' and 'AD', or 'RED JOKER'
+CARD_INPUTS = {card.label: card for card in CARDS}
+CARD_INPUTS.update({f'{card.rank}{letter}': card for card in CARDS for letter, symbol in SUITS.items() if card.suit == symbol})
+
+def card_for_id(card_id: int) -> Card:
+    """
+    Returns the card with the given id.
+    """
+    return CARDS[card_id]
+
+def parse_card(text: str) -> Card:
+    """
+    Returns the card a player has entered (e.g. 'A♦', 'ad', '10H' or 'red joker'), or None if the input is not a card.
+    """
+    return CARD_INPUTS.get(text.strip().upper())
 
 class Deck:
     """
@@ -73,35 +115,41 @@ class Deck:
         1) ranks (list): A list containing the card ranks (e.g., '2', '3', ..., '10', 'J', 'Q', 'K', 'A').
         2) suits (list): A list containing the card suits (e.g., '♠', '♣', '♥', '♦')
         3) cards (list): An empty list to store the card combinations.
+        4) rng (random.Random): The random number generator used for shuffling.
+        5) deck_cards (list): The Card singletons of the deck, in deck order; each hand starts from a copy of this list.
         
     Returns:
         list: A list of Card instances.
         
     """
     
-    def __init__(self, ranks: list, suits: dict):
+    def __init__(self, ranks: list, suits: dict, rng: random.Random = None):
         """
         Initializes a Deck object with the specified ranks and suits.
 
         Args:
             1) ranks (list): A list containing the card ranks (e.g., '2', '3', ..., '10', 'J', 'Q', 'K', 'A').
             2) suits (dict): A dictionary that maps the first letter of each card suit ('D' for Diamonds, 'H' for Hearts, 'S' for Spades, and 'C' for Clubs) to its corresponding symbol ('♦', '♥', '♠', and '♣').
+            3) rng (random.Random): Optional random number generator, so that deals can be reproduced from a seed. The global 'random' module is used when omitted.
             
         """
         self.ranks = ranks
         self.suits = [suit for suit in suits.values()]
         self.cards = []
+        self.rng = rng if rng is not None else random
+        # The cards of the deck in deck order; as cards are shared singletons, they are looked up only once
+        self.deck_cards = [Card(suit, rank) for suit in self.suits for rank in self.ranks]
             
     def create_deck(self):
         """
         This method populates the 'cards' attribute with a list of Card instances,
         representing all possible combinations of ranks and suits.
         """
-        self.cards = [Card(suit, rank) for suit in self.suits for rank in self.ranks]
+        self.cards = self.deck_cards[:]
     
     def shuffle(self):
         """
         This method modifies the 'cards' attribute in-place, randomizing the order
         of the cards in the deck.
         """
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
@@ -0,0 +1,199 @@
+"""
+Seedable bulk deal generator, and integer indexes of deals.
+
+A deal is the order of the 36 card ids in a shuffled deck, as PlayHand deals from it: cards are popped from the end of
+the deck, one per seat and round, so seat s receives deck[35 - (4 * r + s)] in round r (see DEAL_POSITIONS). The order
+matters beyond the four hands, as the lead player chooses the trump suit from their first three cards.
+
+DealGenerator produces deals in batches as NumPy arrays, from its own random number stream, so a batch can be
+reproduced from its seed. Every deal also maps to and from an integer:
+
+- deal_index / deal_from_index: the rank of the deck order among the 36! orders (an int below 2^139), which
+  regenerates the deal exactly;
+- hands_index / hands_from_index: the rank of the four hands among the 36! / (9!)^4 ways to split the deck (an int
+  below 2^65), for uses where the order within the hands does not matter (e.g. the double-dummy solver).
+
+Requires NumPy for DealGenerator; the index functions are pure Python.
+"""
+import argparse
+import math
+import time
+import numpy as np
+from constants import NUMBER_OF_PLAYERS, CARDS_PER_PLAYER
+from card_masks import NUMBER_OF_CARDS
+
+# DEAL_POSITIONS[seat, round] is the position in the deck of the card dealt to the seat in that round
+DEAL_POSITIONS = np.array([[NUMBER_OF_CARDS - 1 - (deal_round * NUMBER_OF_PLAYERS + seat) for deal_round in range(CARDS_PER_PLAYER)] for seat in range(NUMBER_OF_PLAYERS)])
+
+# The number of deck orders, and of ways to split the deck into four hands
+NUMBER_OF_DEAL_ORDERS = math.factorial(NUMBER_OF_CARDS)
+NUMBER_OF_HAND_SPLITS = math.factorial(NUMBER_OF_CARDS) // math.factorial(CARDS_PER_PLAYER) ** NUMBER_OF_PLAYERS
+
+FACTORIALS = [math.factorial(n) for n in range(NUMBER_OF_CARDS + 1)]
+# BINOMIALS[n][k] is the number of ways to choose k of n cards
+BINOMIALS = [[math.comb(n, k) for k in range(CARDS_PER_PLAYER + 1)] for n in range(NUMBER_OF_CARDS + 1)]
+
+class DealGenerator:
+    """
+    Generates shuffled decks in bulk from its own random number stream.
+
+    Attributes:
+        1) seed (int): The seed of the stream (None for a fresh random seed).
+        2) rng (numpy.random.Generator): The random number generator of the deals.
+    """
+
+    def __init__(self, seed: int = None):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def generate(self, n_deals: int) -> np.ndarray:
+        """
+        Returns the next 'n_deals' deals of the stream.
+
+        Returns:
+            ndarray: (n_deals, 36) int8 card ids of each deck, in the order PlayHand deals from.
+        """
+        decks = np.tile(np.arange(NUMBER_OF_CARDS, dtype = np.int8), (n_deals, 1))
+        return self.rng.permuted(decks, axis = 1, out = decks)
+
+    def batches(self, n_deals: int, batch_size: int = 100000):
+        """
+        Yields 'n_deals' deals of the stream in batches of at most 'batch_size', so that any number of deals can be
+        generated in bounded memory.
+        """
+        for start in range(0, n_deals, batch_size):
+            yield self.generate(min(batch_size, n_deals - start))
+
+def deal_hands(decks: np.ndarray) -> np.ndarray:
+    """
+    Returns the cards of each seat for a batch of deals.
+
+    Returns:
+        ndarray: (n_deals, 4, 9) card ids of each seat, in the order they are dealt.
+    """
+    return decks[:, DEAL_POSITIONS]
+
+def deal_masks(decks: np.ndarray) -> np.ndarray:
+    """
+    Returns the hand bitmask of each seat (see card_masks.py) for a batch of deals.
+
+    Returns:
+        ndarray: (n_deals, 4) uint64 bitmasks.
+    """
+    bits = np.left_shift(np.uint64(1), deal_hands(decks).astype(np.uint64))
+    return np.bitwise_or.reduce(bits, axis = 2)
+
+def deal_index(deck: list) -> int:
+    """
+    Returns the index of a deck order (its rank in lexicographic order of the 36! orders).
+
+    Args:
+        deck (list): The 36 card ids of the deck, in the order PlayHand deals from.
+    """
+    index = 0
+    unused = (1 << NUMBER_OF_CARDS) - 1
+    for position, card_id in enumerate(deck):
+        card_id = int(card_id)
+        # The number of unused cards below this one is the digit of the position in the factorial number system
+        index += (unused & ((1 << card_id) - 1)).bit_count() * FACTORIALS[NUMBER_OF_CARDS - 1 - position]
+        unused &= ~(1 << card_id)
+    return index
+
+def deal_from_index(index: int) -> list:
+    """
+    Returns the deck order with the given index (see deal_index).
+
+    Raises:
+        ValueError: If the index is out of range.
+    """
+    if not 0 <= index < NUMBER_OF_DEAL_ORDERS:
+        raise ValueError(f'A deal index must be between 0 and 36! - 1, not {index}.')
+    unused = list(range(NUMBER_OF_CARDS))
+    deck = []
+    for position in range(NUMBER_OF_CARDS):
+        digit, index = divmod(index, FACTORIALS[NUMBER_OF_CARDS - 1 - position])
+        deck.append(unused.pop(digit))
+    return deck
+
+def hands_index(hands: list) -> int:
+    """
+    Returns the index of the four hands of a deal, whatever the order of the cards within each hand.
+
+    Each hand is ranked among the 9-card subsets of the cards left after the previous seats' hands (combinatorial
+    number system), and the ranks are combined as the digits of a mixed-radix number.
+
+    Args:
+        hands (list): The bitmask of each seat's nine cards.
+    """
+    index = 0
+    remaining = list(range(NUMBER_OF_CARDS))
+    for seat in range(NUMBER_OF_PLAYERS - 1):
+        hand = hands[seat]
+        rank = 0
+        chosen = 0
+        for position, card_id in enumerate(remaining):
+            if hand >> card_id & 1:
+                chosen += 1
+                rank += BINOMIALS[position][chosen]
+        index = index * BINOMIALS[len(remaining)][CARDS_PER_PLAYER] + rank
+        remaining = [card_id for card_id in remaining if not hand >> card_id & 1]
+    return index
+
+def hands_from_index(index: int) -> list:
+    """
+    Returns the four hand bitmasks with the given index (see hands_index).
+
+    Raises:
+        ValueError: If the index is out of range.
+    """
+    if not 0 <= index < NUMBER_OF_HAND_SPLITS:
+        raise ValueError(f'A hands index must be between 0 and {NUMBER_OF_HAND_SPLITS - 1}, not {index}.')
+    # Split the index into one subset rank per seat, the last seat's digit first
+    ranks = []
+    for seat in reversed(range(NUMBER_OF_PLAYERS - 1)):
+        index, rank = divmod(index, BINOMIALS[NUMBER_OF_CARDS - seat * CARDS_PER_PLAYER][CARDS_PER_PLAYER])
+        ranks.append(rank)
+    ranks.reverse()
+
+    hands = []
+    remaining = list(range(NUMBER_OF_CARDS))
+    for rank in ranks:
+        hand = 0
+        # Pick the cards from the highest position down, as in the combinatorial number system
+        position = len(remaining)
+        for chosen in range(CARDS_PER_PLAYER, 0, -1):
+            position -= 1
+            while BINOMIALS[position][chosen] > rank:
+                position -= 1
+            rank -= BINOMIALS[position][chosen]
+            hand |= 1 << remaining[position]
+        hands.append(hand)
+        remaining = [card_id for card_id in remaining if not hand >> card_id & 1]
+    hands.append(sum(1 << card_id for card_id in remaining))
+    return hands
+
+def main():
+    """
+    Generates deals from the command line and prints the generation rate and the indexes of the first deals.
+    """
+    parser = argparse.ArgumentParser(description = 'Generate deals in bulk from a seed.')
+    parser.add_argument('--deals', type = int, default = 1000000, help = 'number of deals to generate')
+    parser.add_argument('--seed', type = int, default = None, help = 'seed of the deals')
+    parser.add_argument('--show', type = int, default = 3, help = 'number of deals to print with their indexes')
+    args = parser.parse_args()
+
+    generator = DealGenerator(args.seed)
+    start = time.perf_counter()
+    first_batch = None
+    for decks in generator.batches(args.deals):
+        if first_batch is None:
+            first_batch = decks
+    elapsed = time.perf_counter() - start
+    print(f'{args.deals} deals in {elapsed:.2f} s ({args.deals / elapsed:,.0f} deals/s).')
+
+    for deck in first_batch[:args.show]:
+        hands = [sum(1 << int(card_id) for card_id in deck[DEAL_POSITIONS[seat]]) for seat in range(NUMBER_OF_PLAYERS)]
+        print(f'Deal index {deal_index(deck)}, hands index {hands_index(hands)}')
+
+if __name__ == '__main__':
+    main()
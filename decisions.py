@@ -0,0 +1,296 @@
+import random
+from constants import SUITS, RANKS, CARDS_PER_PLAYER
+from card_masks import NUMBER_OF_CARDS, SUIT_ORDER, SUIT_INDEXES, CARD_SUITS, CARD_VALUES, JOKER_MASK, RED_JOKER_ID, BLACK_JOKER_ID
+from cards import CARDS, parse_card
+
+class ConsoleDecisions:
+    """
+    Decision provider that asks a human player at the console.
+
+    Every method receives the Player object who has to decide and the PlayHand object describing the current hand,
+    and keeps prompting until a well-formed answer has been entered. Rule checks (following suit, the dealer's bid)
+    are still applied by PlayHand.
+
+    Attributes:
+        1) trump_table (TrumpTable): Optional trump-selection table (see trump_table.py) the trump suit it suggests is shown from.
+        2) bid_advisor (BidAdvisor): Optional bid advisor (see bid_advisor.py) the bid it suggests is shown from.
+    """
+
+    def __init__(self, trump_table: object = None, bid_advisor: object = None):
+        self.trump_table = trump_table
+        self.bid_advisor = bid_advisor
+
+    def choose_trump(self, player: object, game_hand: object) -> str:
+        """
+        Prompts the player to choose a trump suit or no trump, based on their first three cards.
+
+        Returns:
+            str: The chosen trump suit or "None" for no trump.
+        """
+        cards_to_choose_from = [str(card) for card in player.cards[:3]]
+        print(f"\n{player.name}'s first three cards: {', '.join(cards_to_choose_from)}")
+        if self.trump_table is not None:
+            opening = 0
+            for card in player.cards[:3]:
+                opening |= card.bit
+            print(f'Suggested trump: {self.trump_table.best_trump(opening)}')
+        trump_suit = input('Choose a trump suit ("D" for ♦, "H" for ♥, "S" for ♠, "C" for "♣") or enter "None" for no trump: ').strip().capitalize()
+
+        while trump_suit != 'None' and trump_suit not in ['D', 'H', 'S', 'C']:
+            trump_suit = input('Please enter a valid suit or "None" for no trump: ').strip().capitalize()
+
+        if trump_suit == 'None':
+            return 'None'
+        else:
+            return SUITS[trump_suit]
+
+    def place_bid(self, player: object, game_hand: object) -> int:
+        """
+        Prompts the player to place a bid between 0 and the maximum number of cards per player.
+
+        Returns:
+            int: The bid entered by the player.
+        """
+        if self.bid_advisor is not None:
+            bid, expected_score, _ = self.bid_advisor.advise_player(player, game_hand)
+            print(f'Suggested bid: {bid} (expected score {expected_score:.1f})')
+        while True:
+            try:
+                bid = int(input(f'{player.name}, place your bid: '))
+                if 0 <= bid <= CARDS_PER_PLAYER:
+                    return bid
+                else:
+                    print(f'Your bid should be between 0 and {CARDS_PER_PLAYER}.')
+            except ValueError:
+                print("Invalid input! Please enter an integer.")
+
+    def play_card(self, player: object, game_hand: object) -> object:
+        """
+        Prompts the player to play a card from their hand, until they enter a card they actually hold.
+
+        Returns:
+            Card: The Card object representing the played card.
+        """
+        labels = ', '.join(card.label for card in player.cards)
+
+        while True:
+            # Prompt the player to play a card, displaying their current cards; "A♦", "AD", "10H" and "RED JOKER" are all understood
+            card_played = parse_card(input(f"{player.name}, play a card (e.g. \"A♦\" or \"AD\") from your deck ({labels}): "))
+
+            # Check if the card played is in the player's deck
+            if card_played is not None and card_played.bit & player.hand:
+                return card_played
+            else:
+                # Display an error message if the card is not in the player's deck
+                print(f"{player.name}, you do not have this card. Please, choose a card from your deck.")
+
+    def choose_high_low(self, player: object, game_hand: object) -> str:
+        """
+        Prompts the player to choose between 'High' or 'Low' action when leading with a Joker card.
+
+        Returns:
+            str: The player's choice ('High' or 'Low').
+        """
+        action = input('"High" of "Low"? Choose one of them: ').strip().capitalize()
+        while action not in ['High', 'Low']:
+            action = input('Invalid action! Choose "High" or "Low": ').strip().capitalize()
+        return action
+
+    def choose_suit_wanted(self, player: object, game_hand: object) -> str:
+        """
+        Prompts the player to choose the suit to be played following a Joker lead (the suit they want others to play and win or the suit they want to win with).
+
+        Returns:
+            str: The suit required to be played.
+        """
+        if game_hand.lead_joker_action == 'High':
+            suit_prompt = f'Which suit would you like others to play? Enter "D" for ♦, "H" for ♥, "S" for ♠, "C" for "♣": '
+        else:
+            suit_prompt = f'Which suit would you like to win this trick? Enter "D" for ♦, "H" for ♥, "S" for ♠, "C" for "♣": '
+
+        suit_wanted = input(suit_prompt).strip().capitalize()
+        while suit_wanted not in SUITS.values() and suit_wanted not in SUITS.keys():
+            suit_wanted = input('Invalid input! Try again: ').strip().capitalize()
+
+        if suit_wanted in SUITS.keys():
+            suit_wanted = SUITS[suit_wanted]
+
+        return suit_wanted
+
+    def choose_follow_joker_action(self, player: object, game_hand: object) -> str:
+        """
+        Prompts the player to choose whether to play or give up the Joker card.
+
+        Returns:
+            str: The player's choice ('Play' or 'Give up').
+        """
+        action = input('Would you like to play the JOKER or give it up? Enter "Play" or "Give up": ').strip().capitalize()
+        while action not in ['Play', 'Give up']:
+           action = input('Invalid input! Please enter "Play" or "Give up": ').strip().capitalize()
+        return action
+
+class RandomDecisions:
+    """
+    Decision provider that picks uniformly at random among the legal answers.
+
+    Attributes:
+        rng (random.Random): The random number generator used for every decision, so that games can be reproduced from a seed.
+    """
+
+    def __init__(self, rng: random.Random = None):
+        """
+        Initializes a RandomDecisions instance.
+
+        Args:
+            rng (random.Random): Optional random number generator. The global 'random' module is used when omitted.
+        """
+        self.rng = rng if rng is not None else random
+
+    def choose_trump(self, player: object, game_hand: object) -> str:
+        return self.rng.choice(TRUMP_CHOICES)
+
+    def place_bid(self, player: object, game_hand: object) -> int:
+        forbidden_bid = game_hand.get_forbidden_bid(player)
+        bid = self.rng.randint(0, CARDS_PER_PLAYER)
+        while bid == forbidden_bid:
+            bid = self.rng.randint(0, CARDS_PER_PLAYER)
+        return bid
+
+    def play_card(self, player: object, game_hand: object) -> object:
+        return self.rng.choice(game_hand.get_playable_cards(player))
+
+    def choose_high_low(self, player: object, game_hand: object) -> str:
+        return self.rng.choice(game_hand.get_legal_joker_actions(player))
+
+    def choose_suit_wanted(self, player: object, game_hand: object) -> str:
+        return self.rng.choice(SUIT_CHOICES)
+
+    def choose_follow_joker_action(self, player: object, game_hand: object) -> str:
+        return self.rng.choice(game_hand.get_legal_joker_actions(player))
+
+class ScriptedDecisions:
+    """
+    Decision provider that replays a fixed sequence of answers.
+
+    Answers are consumed in the order the decisions are asked for, whatever their kind. Cards may be given as Card
+    objects or as their string representation (e.g. 'A♦' or 'RED JOKER').
+
+    Attributes:
+        moves (iterator): The remaining answers.
+    """
+
+    def __init__(self, moves: list):
+        self.moves = iter(moves)
+
+    def next_move(self):
+        """
+        Returns the next scripted answer.
+
+        Raises:
+            ValueError: If the script has run out of answers.
+        """
+        try:
+            return next(self.moves)
+        except StopIteration:
+            raise ValueError('The script has run out of moves.') from None
+
+    def choose_trump(self, player: object, game_hand: object) -> str:
+        return self.next_move()
+
+    def place_bid(self, player: object, game_hand: object) -> int:
+        return int(self.next_move())
+
+    def play_card(self, player: object, game_hand: object) -> object:
+        move = self.next_move()
+        card = parse_card(move) if isinstance(move, str) else move
+        if card is None or not card.bit & player.hand:
+            raise ValueError(f'{player.name} does not hold the scripted card {move}.')
+        return card
+
+    def choose_high_low(self, player: object, game_hand: object) -> str:
+        return self.next_move()
+
+    def choose_suit_wanted(self, player: object, game_hand: object) -> str:
+        return self.next_move()
+
+    def choose_follow_joker_action(self, player: object, game_hand: object) -> str:
+        return self.next_move()
+
+class SimpleDecisions:
+    """
+    Deterministic rule-of-thumb decision provider, used as the reference policy of the batch simulator (see batch_sim.py).
+
+    - Trump: the suit of at least two of the first three cards, otherwise no trump.
+    - Bid: the number of Aces and Jokers held (plus one for the dealer, if that bid is forbidden).
+    - Lead: the highest card in hand; Jokers are led 'High', asking for the trump suit (♦ without trump).
+    - Follow: the lowest legal card; a Joker played after the lead is always played to win.
+
+    Cards are ordered by SIMPLE_PLAY_ORDER: by rank, then by suit, with the Jokers above every other card.
+    """
+
+    def choose_trump(self, player: object, game_hand: object) -> str:
+        suits = [card.suit for card in player.cards[:3] if not card.bit & JOKER_MASK]
+        for suit in suits:
+            if suits.count(suit) >= 2:
+                return suit
+        return 'None'
+
+    def place_bid(self, player: object, game_hand: object) -> int:
+        bid = sum(1 for card in player.cards if card.bit & SIMPLE_BID_MASK)
+        if bid == game_hand.get_forbidden_bid(player):
+            bid += 1
+        return bid
+
+    def play_card(self, player: object, game_hand: object) -> object:
+        leading = player is game_hand.players[game_hand.lead_player_index]
+        return CARDS[self.choose_card_id(game_hand.get_legal_cards(player), leading)]
+
+    def choose_card_id(self, legal_mask: int, leading: bool) -> int:
+        """
+        Returns the id of the card to play among the legal cards: the highest by SIMPLE_PLAY_ORDER for the lead, the
+        lowest otherwise. The choice only depends on the masks, which lets headless hands play without asking for Card
+        objects (see PlayHand.play_headless_trick).
+
+        Args:
+            legal_mask (int): The bitmask of the legal cards (not empty).
+            leading (bool): Whether the player leads the trick.
+        """
+        jokers = legal_mask & JOKER_MASK
+        plain = legal_mask ^ jokers
+        # The Jokers are above every other card, the BLACK JOKER above the RED JOKER
+        if jokers and (leading or not plain):
+            if leading:
+                return BLACK_JOKER_ID if jokers >> BLACK_JOKER_ID & 1 else RED_JOKER_ID
+            return RED_JOKER_ID if jokers >> RED_JOKER_ID & 1 else BLACK_JOKER_ID
+        # Other cards are interleaved into a mask in SIMPLE_PLAY_ORDER, one suit of nine bits at a time
+        first, second, third, fourth = SIMPLE_ORDER_SPREADS
+        ordered = first[plain & SUIT_BITS] | second[plain >> SUIT_SHIFTS[1] & SUIT_BITS] | third[plain >> SUIT_SHIFTS[2] & SUIT_BITS] | fourth[plain >> SUIT_SHIFTS[3]]
+        if not leading:
+            ordered &= -ordered
+        return SIMPLE_ORDER_CARD_IDS[ordered.bit_length() - 1]
+
+    def choose_high_low(self, player: object, game_hand: object) -> str:
+        return 'High'
+
+    def choose_suit_wanted(self, player: object, game_hand: object) -> str:
+        return game_hand.trump_suit if game_hand.trump_suit != 'None' else SUIT_ORDER[0]
+
+    def choose_follow_joker_action(self, player: object, game_hand: object) -> str:
+        return 'Play'
+
+# Answers available to the automatic decision providers
+SUIT_CHOICES = list(SUITS.values())
+TRUMP_CHOICES = SUIT_CHOICES + ['None']
+
+# Card order of SimpleDecisions: rank first, then suit, with the two Jokers above every other card
+SIMPLE_PLAY_ORDER = [NUMBER_OF_CARDS + card_id if CARD_SUITS[card_id] == 'JOKER' else CARD_VALUES[card_id] * len(SUIT_ORDER) + SUIT_INDEXES[CARD_SUITS[card_id]] for card_id in range(NUMBER_OF_CARDS)]
+# Per suit, the nine rank bits of the suit (shifted down by SUIT_SHIFTS) spread to their positions in SIMPLE_PLAY_ORDER, so
+# that the cards of a hand interleave in that order (see SimpleDecisions.choose_card_id), and the card id at every position
+# of that order
+SUIT_BITS = (1 << len(RANKS)) - 1
+SUIT_SHIFTS = [suit_index * len(RANKS) for suit_index in range(len(SUIT_ORDER))]
+SIMPLE_ORDER_SPREADS = [[sum(1 << value * len(SUIT_ORDER) + suit_index for value in range(len(RANKS)) if bits >> value & 1) for bits in range(1 << len(RANKS))]
+                        for suit_index in range(len(SUIT_ORDER))]
+SIMPLE_ORDER_CARD_IDS = [SUIT_INDEXES[suit] * len(RANKS) + value for value in range(len(RANKS)) for suit in SUIT_ORDER]
+# Cards SimpleDecisions counts as a sure trick when bidding: the Aces and the Jokers
+SIMPLE_BID_MASK = JOKER_MASK | sum(1 << card_id for card_id in range(NUMBER_OF_CARDS) if CARD_VALUES[card_id] == len(RANKS) - 1)
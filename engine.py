@@ -0,0 +1,468 @@
+"""
+Line protocol for bot engines run as subprocesses, in the style of the UCI protocol of chess engines, and a driver
+playing games between them.
+
+An engine reads commands on its standard input and writes its answers on its standard output, one per line, with
+tokens separated by spaces:
+
+- 'jkp': the engine answers 'id name <name>', then 'jkpok' once it is ready.
+- 'isready': the engine answers 'readyok'.
+- 'newgame <game id>': a game starts (an engine without state can ignore it).
+- 'go <request id> <decision> <field> <value> ... movetime <ms>': asks for a decision, which the engine answers with
+  'move <request id> <answer>' within 'movetime' milliseconds.
+- 'quit': the engine exits.
+
+Lines written by the engine that start with 'info' are ignored; other lines that are not answers, or 'move' lines that
+cannot be parsed, are counted as invalid lines and skipped. Cards are card ids (see card_masks.py), suits are 'D',
+'H', 'S' and 'C', no trump is 'N', and lists are comma-separated ('-' when empty). Every 'go' has the fields 'seat'
+(the index of the deciding seat at the table) and 'trump' (except for the trump choice), and by decision:
+
+- trump: 'cards' (the first three cards); answer: a suit or 'N'.
+- bid: 'leader', 'dealer', 'hand', 'bids' (every seat's bid, 'x' for the seats yet to bid), 'forbidden' (the bid the
+  dealer may not place, '-' for the other seats); answer: the bid.
+- card: 'leader', 'hand', 'bids', 'tricks' (won by every seat), 'trick' (the cards played in the trick, in playing
+  order), 'legal'; answer: a card id of 'legal'.
+- highlow (after leading a Joker): 'hand'; answer: 'high' or 'low'.
+- suit (after leading a Joker): 'hand', 'action' ('high' or 'low'); answer: a suit.
+- joker (after playing a Joker to a trick): 'hand', 'trick', 'legal'; answer: 'play' or 'giveup'.
+
+In 'trick', a Joker is written '<id>:<action>', and a Joker lead '<id>:<high or low>:<suit wanted>'.
+
+Requests carry ids, so the driver never waits for an answer before sending another request: the games of a match run
+at once (one thread each), the requests they make of an engine at the same time are written to it together, and the
+answers are matched by id. The protocol is stateless (every request holds the whole position), so one engine process
+serves every seat and game it plays. A request not answered in time is played by SimpleDecisions and counted as a
+timeout.
+
+    python engine.py match --games 100 --concurrency 8 --seats "python engine.py bot" simple "python engine.py bot" simple
+"""
+import argparse
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from constants import SUITS, NUMBER_OF_PLAYERS, CARDS_PER_PLAYER
+from card_masks import JOKER_MASK, CARD_SUITS, card_ids
+from cards import CARDS
+from decisions import SimpleDecisions, SIMPLE_PLAY_ORDER, SIMPLE_BID_MASK
+from player import Player
+from game import Game
+from tournament import POLICIES, BonusCounter, TournamentStats, game_seed
+
+# Suit symbol -> protocol letter, and back ('N' is no trump)
+SUIT_LETTERS = {symbol: letter for letter, symbol in SUITS.items()}
+SUIT_LETTERS['None'] = 'N'
+LETTER_SUITS = {letter: symbol for symbol, letter in SUIT_LETTERS.items()}
+
+# Seconds an engine has to answer a request
+DEFAULT_MOVE_TIME = 1.0
+# Seconds an engine has to answer the handshake
+HANDSHAKE_TIMEOUT = 10.0
+# First tokens of the engine lines that are not answers and are ignored
+IGNORED_LINES = {'info', 'id', 'jkpok', 'readyok'}
+
+def id_list(ids: list) -> str:
+    return ','.join(map(str, ids)) if ids else '-'
+
+def read_lines(fd: int) -> object:
+    """
+    Yields the lines read from a file descriptor, a chunk at a time: every line already available is read with one
+    system call. Yields None at the end of each chunk, so that a reader can answer the whole chunk at once.
+    """
+    pending = b''
+    while True:
+        chunk = os.read(fd, 1 << 16)
+        if not chunk:
+            return
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode()
+        yield None
+
+def write_all(fd: int, data: bytes):
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+class EngineProcess:
+    """
+    An engine subprocess and the requests waiting for its answers.
+
+    Requests made by several threads are written together (the first thread to write also writes the lines queued
+    while it is writing), and a reader thread hands every answer to the thread waiting for it.
+
+    Attributes:
+        1) command (str): The command line the engine was started with.
+        2) process (subprocess.Popen): The engine process.
+        3) name (str): The name the engine gave in the handshake.
+        4) lock (threading.Lock): Guards the fields below.
+        5) pending (dict): Request id -> Future of the answer, for the requests not answered yet.
+        6) outbox (list): Encoded request lines waiting to be written.
+        7) writing (bool): Whether a thread is writing the outbox.
+        8) requests (int): The number of requests sent so far (also the id of the last one).
+        9) timeouts (int): The number of requests not answered in time.
+        10) lines (generator): The lines read from the engine (see read_lines).
+        11) reader (threading.Thread): The thread reading the answers.
+        12) invalid_lines (int): The number of lines read from the engine that were neither answers nor ignored lines.
+    """
+
+    def __init__(self, command: str):
+        self.command = command
+        self.process = subprocess.Popen(shlex.split(command), stdin = subprocess.PIPE, stdout = subprocess.PIPE, bufsize = 0)
+        self.name = command
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.outbox = []
+        self.writing = False
+        self.requests = 0
+        self.timeouts = 0
+        self.invalid_lines = 0
+        self.lines = read_lines(self.process.stdout.fileno())
+        self.handshake()
+        self.reader = threading.Thread(target = self.read_answers, name = f'engine-{self.process.pid}', daemon = True)
+        self.reader.start()
+
+    def handshake(self):
+        """
+        Sends 'jkp' and reads the engine's name until 'jkpok'.
+
+        Raises:
+            RuntimeError: If the engine exits or does not complete the handshake in time.
+        """
+        write_all(self.process.stdin.fileno(), b'jkp\n')
+        timer = threading.Timer(HANDSHAKE_TIMEOUT, self.process.kill)
+        timer.start()
+        try:
+            for line in self.lines:
+                if line is None:
+                    continue
+                if line.startswith('id name '):
+                    self.name = line[len('id name '):].strip()
+                elif line.strip() == 'jkpok':
+                    return
+        finally:
+            timer.cancel()
+        raise RuntimeError(f'The engine "{self.command}" did not complete the handshake.')
+
+    def read_answers(self):
+        """
+        Hands every 'move' answer to the thread waiting for it. A line that is not an answer or cannot be parsed is
+        counted in 'invalid_lines' and skipped (the request it may have answered times out). When the engine exits, the
+        requests still waiting get no answer.
+        """
+        for line in self.lines:
+            if line is None:
+                continue
+            tokens = line.split()
+            if not tokens or tokens[0] in IGNORED_LINES:
+                continue
+            request_id = int(tokens[1]) if len(tokens) == 3 and tokens[0] == 'move' and tokens[1].isdecimal() else None
+            with self.lock:
+                if request_id is None:
+                    self.invalid_lines += 1
+                    continue
+                # An answer to a request that has already timed out is dropped
+                future = self.pending.pop(request_id, None)
+            if future is not None:
+                future.set_result(tokens[2])
+        with self.lock:
+            futures, self.pending = list(self.pending.values()), {}
+        for future in futures:
+            future.set_result(None)
+
+    def send(self, line: str):
+        """
+        Queues a line to the engine, and writes the queue unless another thread is already writing it.
+        """
+        with self.lock:
+            self.outbox.append(line)
+            if self.writing:
+                return
+            self.writing = True
+        while True:
+            with self.lock:
+                if not self.outbox:
+                    self.writing = False
+                    return
+                lines, self.outbox = self.outbox, []
+            try:
+                write_all(self.process.stdin.fileno(), ''.join(lines).encode())
+            except OSError:
+                # The engine has exited: its requests time out
+                pass
+
+    def request(self, decision: str, fields: str, move_time: float) -> str:
+        """
+        Asks the engine for a decision and waits for the answer.
+
+        Returns:
+            str: The answer, or None if the engine has not answered within 'move_time' seconds.
+        """
+        future = Future()
+        with self.lock:
+            self.requests += 1
+            request_id = self.requests
+            self.pending[request_id] = future
+        self.send(f'go {request_id} {decision} {fields} movetime {int(move_time * 1000)}\n')
+        try:
+            answer = future.result(move_time)
+        except FutureTimeoutError:
+            answer = None
+        if answer is None:
+            with self.lock:
+                self.pending.pop(request_id, None)
+                self.timeouts += 1
+        return answer
+
+    def new_game(self, game_id: str):
+        self.send(f'newgame {game_id}\n')
+
+    def close(self):
+        """
+        Asks the engine to quit, and kills it if it does not.
+        """
+        self.send('quit\n')
+        try:
+            self.process.wait(HANDSHAKE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+class EngineDecisions:
+    """
+    Decision provider for a seat played by an engine: every decision is a request with the whole position. An answer
+    that comes too late or is not a legal move is replaced by the fallback provider's move.
+
+    Attributes:
+        1) engine (EngineProcess): The engine playing the seat.
+        2) move_time (float): Seconds the engine has for each decision.
+        3) fallback (object): The decision provider answering when the engine does not.
+        4) invalid_answers (int): The number of answers that were not legal moves.
+    """
+
+    def __init__(self, engine: EngineProcess, move_time: float = DEFAULT_MOVE_TIME, fallback: object = None):
+        self.engine = engine
+        self.move_time = move_time
+        self.fallback = fallback if fallback is not None else SimpleDecisions()
+        self.invalid_answers = 0
+
+    def decide(self, decision: str, fields: str, options: dict, player: object, game_hand: object, method: str) -> object:
+        """
+        Returns the value of the engine's answer among 'options' (answer -> value), or the fallback provider's answer.
+        """
+        answer = self.engine.request(decision, fields, self.move_time)
+        if answer in options:
+            return options[answer]
+        if answer is not None:
+            self.invalid_answers += 1
+        return getattr(self.fallback, method)(player, game_hand)
+
+    def position(self, player: object, game_hand: object) -> str:
+        """
+        Returns the fields every decision after the trump choice starts with: the seat, the trump suit and the hand.
+        """
+        return f'seat {game_hand.players.index(player)} trump {SUIT_LETTERS[game_hand.trump_suit]} hand {id_list(card_ids(player.hand))}'
+
+    def trick(self, game_hand: object) -> str:
+        """
+        Returns the cards played in the current trick, in the 'trick' field format.
+        """
+        plays = []
+        for card, joker_action in game_hand.cards_played.values():
+            if not card.bit & JOKER_MASK:
+                plays.append(str(card.card_id))
+            elif not plays:
+                plays.append(f'{card.card_id}:{game_hand.lead_joker_action.lower()}:{SUIT_LETTERS[game_hand.suit_wanted]}')
+            else:
+                plays.append(f'{card.card_id}:{joker_action.replace(" ", "").lower()}')
+        return ','.join(plays) if plays else '-'
+
+    def choose_trump(self, player: object, game_hand: object) -> str:
+        fields = f'seat {game_hand.players.index(player)} cards {id_list([card.card_id for card in player.cards[:3]])}'
+        return self.decide('trump', fields, LETTER_SUITS, player, game_hand, 'choose_trump')
+
+    def place_bid(self, player: object, game_hand: object) -> int:
+        players = game_hand.players
+        seat = players.index(player)
+        leader = game_hand.lead_player_index
+        # Seats bid in turn from the lead player
+        bids = [str(other.bid) if (index - leader) % NUMBER_OF_PLAYERS < (seat - leader) % NUMBER_OF_PLAYERS else 'x' for index, other in enumerate(players)]
+        forbidden_bid = game_hand.get_forbidden_bid(player)
+        fields = (f'{self.position(player, game_hand)} leader {leader} dealer {game_hand.dealer_index % NUMBER_OF_PLAYERS} '
+                  f'bids {",".join(bids)} forbidden {forbidden_bid if forbidden_bid is not None else "-"}')
+        options = {str(bid): bid for bid in range(CARDS_PER_PLAYER + 1) if bid != forbidden_bid}
+        return self.decide('bid', fields, options, player, game_hand, 'place_bid')
+
+    def play_card(self, player: object, game_hand: object) -> object:
+        players = game_hand.players
+        legal_ids = card_ids(game_hand.get_legal_cards(player))
+        fields = (f'{self.position(player, game_hand)} leader {game_hand.lead_player_index} bids {",".join(str(other.bid) for other in players)} '
+                  f'tricks {",".join(str(other.tricks_won) for other in players)} trick {self.trick(game_hand)} legal {id_list(legal_ids)}')
+        return self.decide('card', fields, {str(card_id): CARDS[card_id] for card_id in legal_ids}, player, game_hand, 'play_card')
+
+    def choose_high_low(self, player: object, game_hand: object) -> str:
+        options = {action.lower(): action for action in game_hand.get_legal_joker_actions(player)}
+        return self.decide('highlow', self.position(player, game_hand), options, player, game_hand, 'choose_high_low')
+
+    def choose_suit_wanted(self, player: object, game_hand: object) -> str:
+        fields = f'{self.position(player, game_hand)} action {game_hand.lead_joker_action.lower()}'
+        options = {letter: symbol for letter, symbol in SUITS.items()}
+        return self.decide('suit', fields, options, player, game_hand, 'choose_suit_wanted')
+
+    def choose_follow_joker_action(self, player: object, game_hand: object) -> str:
+        actions = game_hand.get_legal_joker_actions(player)
+        fields = f'{self.position(player, game_hand)} trick {self.trick(game_hand)} legal {",".join(action.replace(" ", "").lower() for action in actions)}'
+        options = {action.replace(' ', '').lower(): action for action in actions}
+        return self.decide('joker', fields, options, player, game_hand, 'choose_follow_joker_action')
+
+class SimpleEngineBot:
+    """
+    The policy of SimpleDecisions, played from the fields of the protocol: the reference engine ('python engine.py bot').
+    """
+
+    name = 'simple'
+
+    def trump(self, fields: dict) -> str:
+        suits = [CARD_SUITS[card_id] for card_id in parse_ids(fields['cards']) if not (1 << card_id) & JOKER_MASK]
+        for suit in suits:
+            if suits.count(suit) >= 2:
+                return SUIT_LETTERS[suit]
+        return 'N'
+
+    def bid(self, fields: dict) -> str:
+        bid = sum(1 for card_id in parse_ids(fields['hand']) if (1 << card_id) & SIMPLE_BID_MASK)
+        if str(bid) == fields['forbidden']:
+            bid += 1
+        return str(bid)
+
+    def card(self, fields: dict) -> str:
+        legal_ids = parse_ids(fields['legal'])
+        if fields['trick'] == '-':
+            return str(max(legal_ids, key = SIMPLE_PLAY_ORDER.__getitem__))
+        return str(min(legal_ids, key = SIMPLE_PLAY_ORDER.__getitem__))
+
+    def highlow(self, fields: dict) -> str:
+        return 'high'
+
+    def suit(self, fields: dict) -> str:
+        return fields['trump'] if fields['trump'] != 'N' else 'D'
+
+    def joker(self, fields: dict) -> str:
+        return 'play'
+
+def parse_ids(text: str) -> list:
+    return [int(card_id) for card_id in text.split(',')] if text != '-' else []
+
+def run_engine(bot: object, input_fd: int = 0, output_fd: int = 1):
+    """
+    Runs a bot as an engine: answers the commands read from 'input_fd' on 'output_fd', every chunk of commands read
+    together with a single write. 'go' requests are answered by the bot method named after the decision, called with
+    the request's fields as a dict.
+    """
+    replies = []
+    for line in read_lines(input_fd):
+        if line is None:
+            if replies:
+                write_all(output_fd, ''.join(replies).encode())
+                replies = []
+            continue
+        tokens = line.split()
+        if not tokens:
+            continue
+        command = tokens[0]
+        if command == 'go':
+            fields = dict(zip(tokens[3::2], tokens[4::2]))
+            replies.append(f'move {tokens[1]} {getattr(bot, tokens[2])(fields)}\n')
+        elif command == 'jkp':
+            replies.append(f'id name {bot.name}\njkpok\n')
+        elif command == 'isready':
+            replies.append('readyok\n')
+        elif command == 'quit':
+            break
+    if replies:
+        write_all(output_fd, ''.join(replies).encode())
+
+def play_match_game(seed: int, seats: list, engines: dict, move_time: float) -> tuple[list, list]:
+    """
+    Plays one headless game between policies (see tournament.POLICIES) and engines, as tournament.play_game.
+
+    Args:
+        seed (int): Seed of the game.
+        seats (list): Policy name or engine command of each seat.
+        engines (dict): Engine command -> EngineProcess.
+        move_time (float): Seconds an engine has for each decision.
+
+    Returns:
+        Tuple[list, list]: The final score and the number of set bonuses of each seat.
+    """
+    rng = random.Random(seed)
+    players = []
+    for seat, policy in enumerate(seats):
+        decider = EngineDecisions(engines[policy], move_time) if policy in engines else POLICIES[policy](rng)
+        players.append(Player(f'Seat {seat + 1}', decider))
+    for engine in {engines[policy] for policy in seats if policy in engines}:
+        engine.new_game(str(seed))
+    bonus_counter = BonusCounter()
+    game = Game(players, bonus_counter, results_file = None, rng = rng)
+    game.play_set()
+    return [game.set_scores[player.name] for player in players], [bonus_counter.bonuses.get(player.name, 0) for player in players]
+
+def run_match(n_games: int, seats: list, master_seed: int = 0, concurrency: int = 8, move_time: float = DEFAULT_MOVE_TIME) -> tuple[TournamentStats, dict]:
+    """
+    Plays a match between engines (and built-in policies), 'concurrency' games at a time. Seats that are not a policy
+    name are engine commands; every distinct command is started once and serves all its seats and games.
+
+    Returns:
+        Tuple[TournamentStats, dict]: The results per seat, and the engines by command (closed).
+    """
+    engines = {policy: EngineProcess(policy) for policy in dict.fromkeys(seats) if policy not in POLICIES}
+    stats = TournamentStats()
+    try:
+        with ThreadPoolExecutor(max_workers = concurrency) as executor:
+            games = [executor.submit(play_match_game, game_seed(master_seed, game_index), seats, engines, move_time) for game_index in range(n_games)]
+            for game in games:
+                stats.add_game(*game.result())
+    finally:
+        for engine in engines.values():
+            engine.close()
+    return stats, engines
+
+def main():
+    """
+    Runs the reference engine ('bot'), or a match between engines ('match'), from the command line.
+    """
+    parser = argparse.ArgumentParser(description = 'Run bot engines over the line protocol.')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+    subparsers.add_parser('bot', help = 'run the reference engine (the SimpleDecisions policy) on stdin/stdout')
+    match = subparsers.add_parser('match', help = 'play games between engines and built-in policies')
+    match.add_argument('--games', type = int, default = 100, help = 'number of games to play')
+    match.add_argument('--seed', type = int, default = 0, help = 'master seed of the match (games are seeded as in tournament.py)')
+    match.add_argument('--concurrency', type = int, default = 8, help = 'games played at once')
+    match.add_argument('--move-time', type = float, default = DEFAULT_MOVE_TIME, help = 'seconds an engine has for each decision')
+    match.add_argument('--seats', nargs = NUMBER_OF_PLAYERS, default = [f'{sys.executable} engine.py bot', 'simple'] * 2,
+                       help = f'policy ({", ".join(sorted(POLICIES))}) or engine command of each seat')
+    args = parser.parse_args()
+
+    if args.command == 'bot':
+        run_engine(SimpleEngineBot())
+        return
+
+    start = time.perf_counter()
+    stats, engines = run_match(args.games, args.seats, args.seed, args.concurrency, args.move_time)
+    elapsed = time.perf_counter() - start
+    requests = sum(engine.requests for engine in engines.values())
+    print(f'{stats.games} games in {elapsed:.2f} s ({stats.games / elapsed:.1f} games/s), {requests} engine requests '
+          f'({elapsed / max(requests, 1) * 1e6:.0f} µs of match time per request), {sum(engine.timeouts for engine in engines.values())} timeouts, '
+          f'{sum(engine.invalid_lines for engine in engines.values())} invalid lines.')
+    for seat, policy in enumerate(args.seats):
+        name = f'engine {engines[policy].name}' if policy in engines else policy
+        print(f'Seat {seat + 1} ({name}): win rate {stats.win_rate(seat):.1%}, mean score {stats.mean_score(seat):.1f}, '
+              f'variance {stats.score_variance(seat):.1f}, set bonus in {stats.bonus_rate(seat):.1%} of sets')
+
+if __name__ == '__main__':
+    main()
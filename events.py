@@ -0,0 +1,168 @@
+from constants import NUMBER_OF_SETS, HANDS_PER_SET, CARDS_PER_PLAYER, NUMBER_OF_PLAYERS
+from score_table import IncrementalTableRenderer, render_full_table
+
+# How ConsoleEvents shows the game table after every hand and set: only the new rows, the whole table, or not at all
+TABLE_OUTPUTS = ('incremental', 'full', 'off')
+# Events reported while a trick is played, which headless hands skip (see reports_tricks)
+TRICK_EVENTS = ('card_played', 'joker_led', 'card_rejected', 'trick_won')
+
+class NullEvents:
+    """
+    Event sink that discards every event.
+
+    Used for headless runs (bots, simulations, servers), where nothing should be printed. Every other event sink
+    provides the same methods, so they can be swapped freely in Game, PlaySet and PlayHand.
+    """
+
+    def welcome(self):
+        pass
+
+    def players_ordered(self, players: list):
+        pass
+
+    def set_started(self, set_number: int):
+        pass
+
+    def hand_started(self, hand_number: int):
+        pass
+
+    def trump_chosen(self, player: object, trump_suit: str):
+        pass
+
+    def cards_shown(self, player: object, cards: list, remaining: bool):
+        pass
+
+    def dealer_bid_rejected(self, dealer: object, forbidden_bid: int):
+        pass
+
+    def bids_placed(self, players: list):
+        pass
+
+    def trick_started(self, trick_number: int):
+        pass
+
+    def card_played(self, player: object, card: object, joker_action: str):
+        pass
+
+    def joker_led(self, player: object, lead_joker_action: str, suit_wanted: str):
+        pass
+
+    def card_rejected(self, player: object, message: str):
+        pass
+
+    def trick_won(self, winner: object):
+        pass
+
+    def hand_over(self, game_table: object):
+        pass
+
+    def bonuses_checked(self, bonuses: list):
+        pass
+
+    def set_over(self, game_table: object):
+        pass
+
+    def winner_announced(self, winners: list, score: int):
+        pass
+
+def reports_tricks(events: object) -> bool:
+    """
+    Checks whether an event sink handles any event of a trick (see TRICK_EVENTS), rather than discarding them as
+    NullEvents does. The tricks of a hand reported to a sink that does not may be played headless (see
+    PlayHand.play_headless_trick).
+    """
+    return any(getattr(type(events), name, None) is not getattr(NullEvents, name) for name in TRICK_EVENTS)
+
+class ConsoleEvents(NullEvents):
+    """
+    Event sink that prints every event to the console, for games played by people at the same terminal.
+
+    Attributes:
+        1) table_output (str): How the game table is shown (see TABLE_OUTPUTS): 'incremental' prints the header once and
+           then only the new rows, 'full' reprints the whole table every time, 'off' prints nothing of it.
+        2) table_renderer (IncrementalTableRenderer): The renderer of the 'incremental' output.
+    """
+
+    def __init__(self, table_output: str = 'incremental'):
+        if table_output not in TABLE_OUTPUTS:
+            raise ValueError(f"Table output must be one of {', '.join(TABLE_OUTPUTS)}, not {table_output!r}.")
+        self.table_output = table_output
+        self.table_renderer = IncrementalTableRenderer()
+
+    def show_table(self, heading: str, game_table: object):
+        """
+        Prints a heading and the game table, as configured by 'table_output'.
+        """
+        if self.table_output == 'off':
+            return
+        print(heading)
+        if self.table_output == 'full':
+            print(render_full_table(game_table))
+        else:
+            print(self.table_renderer.render(game_table))
+
+    def welcome(self):
+        print(f'Welcome to the game! \nThis game consists of {NUMBER_OF_SETS} sets, with {HANDS_PER_SET} hands per set. There will be {CARDS_PER_PLAYER} cards dealt to each player during each hand.')
+        print()
+
+    def players_ordered(self, players: list):
+        names = [player.name for player in players]
+        print(f"\nWe have {NUMBER_OF_PLAYERS} players in this order: {', '.join(names)}. Please take turns to deal the cards starting from {players[-1].name}.")
+
+    def set_started(self, set_number: int):
+        print(f"\n{'*' * 54} SET NO. {set_number} {'*' * 54}")
+
+    def hand_started(self, hand_number: int):
+        print('\nHAND NO.', hand_number)
+
+    def trump_chosen(self, player: object, trump_suit: str):
+        if trump_suit == 'None':
+            print('There is no trump suit for this hand!')
+        else:
+            print(f'Trump suit for this hand is {trump_suit}.')
+
+    def cards_shown(self, player: object, cards: list, remaining: bool):
+        # The lead player has already seen their first three cards when choosing the trump suit
+        label = 'remaining cards' if remaining else 'cards'
+        print(f"\n{player.name}'s {label}: {', '.join(str(card) for card in cards)}")
+
+    def dealer_bid_rejected(self, dealer: object, forbidden_bid: int):
+        print(f'You can place any bid between 0 and {CARDS_PER_PLAYER} except {forbidden_bid}.', end = ' ')
+
+    def bids_placed(self, players: list):
+        print('\nIn this hand, following bids have been placed:')
+        for i, player in enumerate(players):
+            if i == len(players) - 1:
+                print(f"{player.name}'s bid is {player.bid}.")
+            else:
+                print(f"{player.name}'s bid is {player.bid}", end = ', ')
+
+    def trick_started(self, trick_number: int):
+        print('\nTrick no.', trick_number)
+
+    def card_rejected(self, player: object, message: str):
+        print(message)
+
+    def trick_won(self, winner: object):
+        print(f'{winner.name} is the winner of this trick.')
+
+    def hand_over(self, game_table: object):
+        self.show_table("\nThis hand is over, let's see the results:", game_table)
+
+    def bonuses_checked(self, bonuses: list):
+        print()
+        for player, bonus_score in bonuses:
+            print(f"{player.name} earned a bonus of {bonus_score} for successfully bidding in all hands of this set.")
+
+        # If no player has successfully bid in all hands of a set
+        if not bonuses:
+            print('No player earned a bonus in this set.')
+
+    def set_over(self, game_table: object):
+        self.show_table("\nThis set is over. Let's see the results:", game_table)
+
+    def winner_announced(self, winners: list, score: int):
+        if len(winners) == 1:
+            print(f"\nThe overall winner of the game is {winners[0]} with a score of {score}!")
+        else:
+            print(f"\nThere was a tie between {', '.join(winners)} with a score of {score}.")
@@ -1,30 +1,50 @@
 import random
-import json
 from player import Player
-from constants import CARDS_PER_PLAYER, NUMBER_OF_PLAYERS, NUMBER_OF_SETS, HANDS_PER_SET
+from constants import NUMBER_OF_PLAYERS, NUMBER_OF_SETS
 from game_set import PlaySet
+from events import NullEvents
 
 class Game:
     """
     Handles the overall game flow, including managing players, sets, and determining the winner.
     
+    The game can be played headless: pass the players (each with their own decision provider), a NullEvents sink and no results file.
+    
     Attributes:
         players (list): List to store Player objects.
         set_scores (dict): Dictionary to track the cumulative scores for each player across sets.
+        events (object): The event sink receiving everything that happens during the game (see events.py).
+        results_file (str): Path of the JSON file the game table is written to at the end of the game, or None to skip writing it.
+        rng (random.Random): The random number generator used to shuffle the players and the deck.
+        results_log (ResultsLog): The append-only log every hand and set is written to as soon as it is over (see results_log.py), or None.
+        game_id (str): The id of the game in the results log.
+        game_set (PlaySet): The set being played, created when the game starts (or by restoring a snapshot).
     """
-    def __init__(self):
+    def __init__(self, players: list = None, events: object = None, results_file: str = 'game_data.json', rng: random.Random = None, results_log: object = None):
         """
         Initializes a new instance of the Game class.
+
+        Args:
+            players (list): Player objects in seating order. When omitted, players are entered at the console with get_player_names().
+            events (object): The event sink to report to. Nothing is reported when omitted.
+            results_file (str): Path of the JSON file the game table is written to, or None to skip writing it.
+            rng (random.Random): Optional random number generator, so that a game can be reproduced from a seed. The global 'random' module is used when omitted.
+            results_log (ResultsLog): Optional results log to append typed hand, set and game records to.
         """
-        self.players = []
+        self.players = list(players) if players is not None else []
         self.set_scores = {}
+        self.events = events if events is not None else NullEvents()
+        self.results_file = results_file
+        self.rng = rng if rng is not None else random
+        self.results_log = results_log
+        self.game_id = None
+        self.game_set = None
     
     def welcome(self):
         """
         Displays a welcome message with game details.
         """
-        print(f'Welcome to the game! \nThis game consists of {NUMBER_OF_SETS} sets, with {HANDS_PER_SET} hands per set. There will be {CARDS_PER_PLAYER} cards dealt to each player during each hand.')
-        print()
+        self.events.welcome()
     
     def get_player_names(self) -> list:
         """
@@ -48,32 +68,38 @@ class Game:
             self.players.append(Player(name))
         
         # Shuffle the order of players
-        random.shuffle(self.players)
+        self.rng.shuffle(self.players)
     
     def print_the_order_of_players(self):
         """
         Prints the order of players and the starting dealer.
         """
-        players = [player.name for player in self.players]
-        print(f'\nWe have {NUMBER_OF_PLAYERS} players in this order: {', '.join(players)}. Please take turns to deal the cards starting from {self.players[-1].name}.')
+        self.events.players_ordered(self.players)
         
     def play_set(self):
         """
         Plays a set of hands in the game.
         """
-        # Initialize a PlaySet instance
-        game_set = PlaySet(self.players)
+        # A game restored from a snapshot (see snapshots.py) already has its set, and continues it
+        if self.game_set is None:
+            if self.results_log is not None:
+                self.game_id = self.results_log.start_game(self.players)
+            # Initialize a PlaySet instance
+            self.game_set = PlaySet(self.players, self.events, self.rng, self.results_log, self.game_id)
+        game_set = self.game_set
+        resumed = game_set.resumed_hand_in_progress is not None
         
         # Play each set
-        for _set in range(NUMBER_OF_SETS):            
-            print(f'\n{'*' * 54} SET NO. {_set + 1} {'*' * 54}')
+        # A set in progress is continued; otherwise the next set starts (the first one, unless restored between sets)
+        for _set in range(game_set.set_number - 1 if resumed else game_set.set_number, NUMBER_OF_SETS):
+            if not resumed:
+                self.events.set_started(_set + 1)
+            resumed = False
             # Play the hands of the set
             game_set.play_hand() 
-            print()
             # Check for bonus after each set
             self.check_bonus(game_set)
-            # Print the scores after each set
-            print("\nThis set is over. Let's see the results:")
+            # Report the scores after each set
             self.update_table_after_set(game_set)
             # Reset player states for a new set
             for player in self.players:
@@ -81,17 +107,24 @@ class Game:
         
         # Update the overall set scores
         self.set_scores = game_set.set_scores
+        if self.results_log is not None:
+            self.results_log.end_game(self.game_id, self.set_scores)
         # Write the table data to a JSON file
-        self.write_table_to_json(game_set)
+        if self.results_file is not None:
+            self.write_table_to_json(game_set)
                 
-    def check_bonus(self, game_set: object):
+    def check_bonus(self, game_set: object) -> list:
         """
-        Checks if any player deserves a bonus for successfully bidding in all hands of the set.
+        Checks if any player deserves a bonus for successfully bidding in all hands of the set, and appends the set to
+        the results log before reporting the bonuses (so that a snapshot taken then does not lose the record).
 
         Args:
             game_set (PlaySet): The current PlaySet object representing the set of hands.
+
+        Returns:
+            list: (player, bonus score) of every player who earned a bonus.
         """
-        bonus_awarded = False
+        bonuses = []
         
         for player in self.players:
             # If the player has successfully bid in all hands of a set
@@ -99,12 +132,13 @@ class Game:
                 # Bonus is an additional score equal to the highest amount the player has scored on any one hand during the set
                 bonus_score = max(player.hand_scores)
                 game_set.set_scores[player.name] += bonus_score
-                print(f"{player.name} earned a bonus of {bonus_score} for successfully bidding in all hands of this set.")
-                bonus_awarded = True
+                bonuses.append((player, bonus_score))
+        game_set.bonus_checked = True
+        if self.results_log is not None:
+            self.results_log.log_set(self.game_id, game_set.set_number, self.players, {player.name: bonus_score for player, bonus_score in bonuses}, game_set.set_scores)
         
-        # If no player has successfully bid in all hands of a set
-        if not bonus_awarded:
-            print('No player earned a bonus in this set.')
+        self.events.bonuses_checked(bonuses)
+        return bonuses
     
     def update_table_after_set(self, game_set: object):
         """
@@ -118,15 +152,17 @@ class Game:
         this row from the next set.
         """
         game_set.game_table.add_row([score for score in game_set.set_scores.values()], divider = True)
-        print(game_set.game_table)
+        self.events.set_over(game_set.game_table)
     
     def write_table_to_json(self, game_set: object):
         """
         Converts the table data into a dictionary and writes it to a JSON file.
         """
+        # json is only needed here, and importing it would slow down the start of every headless worker
+        import json
         field_names = [player.name for player in self.players]
         
-        with open('game_data.json', 'w') as file:
+        with open(self.results_file, 'w') as file:
             json.dump([{field: row[i] for i, field in enumerate(field_names)} for row in game_set.game_table.rows], file, indent = 4)
     
     def determine_final_winner(self):
@@ -146,7 +182,7 @@ class Game:
                 tie = True
 
         if final_winner and not tie:
-            print(f"\nThe overall winner of the game is {final_winner} with a score of {highest_score}!")
+            self.events.winner_announced([final_winner], highest_score)
         elif tie:
             winners = [player for player, score in self.set_scores.items() if score == highest_score]
-            print(f"\nThere was a tie between {', '.join(winners)} with a score of {highest_score}.")
+            self.events.winner_announced(winners, highest_score)
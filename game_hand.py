@@ -1,5 +1,9 @@
 from constants import RANKS, SUITS, CARDS_PER_PLAYER
-from cards import Deck
+from cards import CARDS, Deck
+from card_masks import SUIT_MASKS, JOKER_MASK
+from legal_moves import legal_cards, legal_joker_actions
+from trick_resolution import LEAD_KEYS, JOKER_LEAD_KEYS, JOKER_PLAY_STRENGTH, CARD_STRENGTHS, winning_position, joker_lead_strength
+from events import NullEvents, reports_tricks
 
 class PlayHand:
     """
@@ -26,18 +30,30 @@ class PlayHand:
         7) lead_joker_action (str): The action taken when a Joker is the lead card ('High' or 'Low').
         8) lead_card (Card): The card that is leading the current trick.
         9) cards_played (dict): A dictionary to keep track of the cards played by each player, and the action taken when playing a Joker card ('Play', 'Give up', or 'NotApplicable'). 
+        10) events (object): The event sink receiving everything that happens during the hand (see events.py).
+        11) tricks_played (int): The number of tricks played so far in the current hand.
+        12) completed_tricks (list): The tricks played so far in the current hand, as (cards played, suit wanted, lead Joker action), where the cards played are the 'cards_played' dictionary of the trick, in playing order.
+        13) headless (bool): Whether the tricks of the current hand are played headless (see plays_headless), or None until the first trick.
     
+    Headless hands, whose tricks no event sink follows and whose players all choose their cards from masks, take the
+    fast path of play_headless_trick, which keeps neither 'cards_played' nor 'completed_tricks'. 'fast_path' is a class
+    switch for it, turned off by instrumentation.py so that every decision it times is still asked for.
     """
     
-    def __init__(self, players: list):
+    fast_path = True
+    
+    def __init__(self, players: list, events: object = None, rng: object = None):
         """
         Initializes a new instance of PlayHand.
 
         Args:
             players (list): A list of Player objects representing the players in the game.
+            events (object): The event sink to report to. Nothing is reported when omitted.
+            rng (random.Random): Optional random number generator used to shuffle the deck.
         """
         self.players = players
-        self.deck = Deck(RANKS, SUITS)
+        self.events = events if events is not None else NullEvents()
+        self.deck = Deck(RANKS, SUITS, rng)
         self.lead_player_index = 0
         self.dealer_index = -1
         self.trump_suit = None
@@ -45,6 +61,9 @@ class PlayHand:
         self.lead_joker_action = None
         self.lead_card = None
         self.cards_played = {}
+        self.tricks_played = 0
+        self.completed_tricks = []
+        self.headless = None
     
     def deal_cards_and_place_bids(self, lead_player_index: int, dealer_index: int):
         """
@@ -56,6 +75,9 @@ class PlayHand:
         """
         self.lead_player_index = lead_player_index
         self.dealer_index = dealer_index
+        self.tricks_played = 0
+        self.completed_tricks = []
+        self.headless = None
         self.deal_cards()
         self.print_cards_and_bid()
         self.print_player_bids()
@@ -67,10 +89,12 @@ class PlayHand:
         self.deck.create_deck() 
         self.deck.shuffle()
         
-        # Deal nine cards to each player, and append them to the Player object
-        for _ in range(CARDS_PER_PLAYER):
-            for player in self.players:
-                player.cards.append(self.deck.cards.pop())
+        # Deal nine cards to each player, one per player and round from the end of the deck: the player at index i
+        # receives the cards at positions 35 - i, 31 - i, ... of the shuffled deck, which are taken as one slice
+        cards = self.deck.cards
+        for i, player in enumerate(self.players):
+            player.add_cards(cards[len(cards) - 1 - i::-len(self.players)][:CARDS_PER_PLAYER])
+        self.deck.cards = cards[:len(cards) - CARDS_PER_PLAYER * len(self.players)]
     
     def print_cards_and_bid(self):
         """
@@ -80,21 +104,17 @@ class PlayHand:
         dealer = self.players[self.dealer_index]
         
         # Lead player chooses the trump suit of the current hand
-        self.trump_suit = lead_player.choose_trump()
-        if self.trump_suit == 'None':
-            print('There is no trump suit for this hand!')
-        else:
-            print(f'Trump suit for this hand is {self.trump_suit}.')
+        self.trump_suit = lead_player.choose_trump(self)
+        self.events.trump_chosen(lead_player, self.trump_suit)
         
-        # Print the lead player's remaining cards and prompt the player to place a bid
-        remaining_cards = [str(card) for card in lead_player.cards[3:]]
-        print(f"\n{lead_player.name}'s remaining cards: {', '.join(remaining_cards)}")
-        lead_player.place_bid()
+        # Show the lead player's remaining cards and prompt the player to place a bid
+        self.events.cards_shown(lead_player, lead_player.cards[3:], True)
+        lead_player.place_bid(self)
         
         # Prompt other users to place their bids
         for player in self.get_following_players():
-            print(f"\n{player.name}'s cards: {', '.join(str(card) for card in player.cards)}")
-            player.place_bid()
+            self.events.cards_shown(player, player.cards, False)
+            player.place_bid(self)
             # Validate the dealer's bid
             if player == dealer:
                 self.validate_dealer_bid(dealer)
@@ -106,46 +126,122 @@ class PlayHand:
         Args:
             dealer (Player): The dealer Player object.
         """
-        total_bids = sum(player.bid for player in self.players)
-        remaining_bids = CARDS_PER_PLAYER - total_bids + dealer.bid
+        remaining_bids = self.get_forbidden_bid(dealer)
         
         # Dealer of the hand has no right to place such a bid, that the sum of the bids becomes nine
         while dealer.bid == remaining_bids:
-            print(f'You can place any bid between 0 and {CARDS_PER_PLAYER} except {remaining_bids}.', end = ' ')
-            dealer.place_bid()
+            self.events.dealer_bid_rejected(dealer, remaining_bids)
+            dealer.place_bid(self)
+    
+    def get_forbidden_bid(self, player: object) -> int:
+        """
+        Returns the bid the player is not allowed to place, if any.
+
+        Only the dealer, who bids last, is restricted: they cannot place a bid that makes the sum of all bids equal to the number of tricks in the hand.
+
+        Args:
+            player (Player): The player who is about to bid.
+
+        Returns:
+            int: The forbidden bid, or None if every bid is allowed.
+        """
+        if player is not self.players[self.dealer_index]:
+            return None
+        return CARDS_PER_PLAYER - sum(other.bid for other in self.players if other is not player)
     
     def print_player_bids(self):
         """
-        Prints the bids placed by each player.
+        Reports the bids placed by each player.
         """
-        print('\nIn this hand, following bids have been placed:')
-        for i, player in enumerate(self.players):
-            if i == len(self.players) - 1:
-                print(f"{player.name}'s bid is {player.bid}.")
-            else:
-                print(f"{player.name}'s bid is {player.bid}", end = ', ')
+        self.events.bids_placed(self.players)
         
     def play_trick(self):
         """
         Plays a single trick in the current hand, determines the winner and updates the game state.
         """
+        headless = self.headless
+        if headless is None:
+            headless = self.headless = self.plays_headless()
+        if headless and self.fast_path:
+            self.play_headless_trick()
+            return
         lead_player = self.players[self.lead_player_index]
-        self.lead_card = lead_player.play_card() 
-        lead_player.cards.remove(self.lead_card) 
+        self.lead_card = lead_player.play_card(self) 
+        lead_player.remove_card(self.lead_card) 
         self.cards_played[lead_player] = (self.lead_card, 'NotApplicable')
+        self.events.card_played(lead_player, self.lead_card, 'NotApplicable')
         
         # Handle the lead card depending on whether it is a Joker or not
-        if 'JOKER' not in str(self.lead_card):
+        if not self.lead_card.bit & JOKER_MASK:
             self.handle_non_joker_lead()
         else:
             self.handle_joker_lead()
         
         winner = self.determine_trick_winner() 
-        print(f'{winner.name} is the winner of this trick.') 
+        self.events.trick_won(winner)
         # Update the lead player's index for the following trick
         self.lead_player_index = self.players.index(winner)
-        # Reset the dictionary after each trick
+        # Keep the trick in the history of the hand, and reset the dictionary after each trick
+        self.completed_tricks.append((self.cards_played, self.suit_wanted, self.lead_joker_action))
         self.cards_played = {}
+        self.tricks_played += 1
+
+    def plays_headless(self) -> bool:
+        """
+        Checks whether the tricks of the hand can be played headless: the event sink does not follow them (see
+        events.reports_tricks), and every player's decision provider chooses cards from masks ('choose_card_id', see
+        SimpleDecisions).
+        """
+        return not reports_tricks(self.events) and all(hasattr(player.decider, 'choose_card_id') for player in self.players)
+
+    def play_headless_trick(self):
+        """
+        Plays a single trick as play_trick does, without reporting its events nor keeping its cards in 'cards_played' and
+        'completed_tricks': the cards are chosen from the masks of the legal cards, and the winner is the strongest play
+        (see trick_resolution.py), with no dictionary built per trick.
+
+        Raises:
+            ValueError: If a decision provider chooses a card that is not legal.
+        """
+        players = self.players
+        number_of_players = len(players)
+        trump_suit = self.trump_suit
+        lead_player_index = self.lead_player_index
+        lead_player = players[lead_player_index]
+        lead_card_id = lead_player.decider.choose_card_id(lead_player.hand, True)
+        lead_card = self.lead_card = CARDS[lead_card_id]
+        lead_player.remove_card(lead_card)
+        if lead_card.bit & JOKER_MASK:
+            lead_joker_action = self.lead_joker_action = self.get_high_low_choice()
+            suit_wanted = self.suit_wanted = self.get_suit_wanted()
+            best = joker_lead_strength(lead_joker_action, suit_wanted, trump_suit)
+            # After a 'High' Joker lead, the cards of the suit wanted cannot beat the Joker
+            strengths = CARD_STRENGTHS[trump_suit, None if lead_joker_action == 'High' else suit_wanted]
+        else:
+            lead_joker_action, suit_wanted = self.lead_joker_action, self.suit_wanted
+            strengths = CARD_STRENGTHS[trump_suit, lead_card.suit]
+            best = strengths[lead_card_id]
+        
+        best_position = 0
+        for position in range(1, number_of_players):
+            player = players[(lead_player_index + position) % number_of_players]
+            legal_mask = legal_cards(player.hand, lead_card_id, trump_suit, suit_wanted, lead_joker_action)
+            card_id = player.decider.choose_card_id(legal_mask, False)
+            if not legal_mask >> card_id & 1:
+                raise ValueError(f'{player.name} cannot play {CARDS[card_id]} in this trick.')
+            card = CARDS[card_id]
+            player.remove_card(card)
+            if card.bit & JOKER_MASK:
+                # A Joker played after another is stronger, so that the last one played wins
+                strength = JOKER_PLAY_STRENGTH + position if self.get_follow_joker_action(player) == 'Play' else 0
+            else:
+                strength = strengths[card_id]
+            if strength > best:
+                best, best_position = strength, position
+        
+        self.lead_player_index = (lead_player_index + best_position) % number_of_players
+        players[self.lead_player_index].tricks_won += 1
+        self.tricks_played += 1
 
     def handle_non_joker_lead(self):
         """
@@ -153,8 +249,9 @@ class PlayHand:
         """
         for player in self.get_following_players():
             follow_card, follow_joker_action = self.get_follow_card_for_non_joker_lead(player) # Play a follow card
-            player.cards.remove(follow_card) # Remove it from the player's hand
+            player.remove_card(follow_card) # Remove it from the player's hand
             self.cards_played[player] = (follow_card, follow_joker_action)
+            self.events.card_played(player, follow_card, follow_joker_action)
     
     def get_follow_card_for_non_joker_lead(self, player: object) -> tuple[object, str]:
         """
@@ -166,27 +263,22 @@ class PlayHand:
         Returns:
             Tuple[Card object, str]: A tuple where the Card object represents the card played, and a string represents the action taken when playing a Joker card ('Play', 'Give up' or 'NotApplicable')
         """
-        follow_card = player.play_card()
-        player_suits = [card.suit for card in player.cards]
-        follow_joker_action = 'NotApplicable'
+        legal_mask = self.get_legal_cards(player)
+        follow_card = player.play_card(self)
         
-        # 1. When playing a Joker card
-        if 'JOKER' in str(follow_card):
-            # Prompt user to decide whether to 'Play' the Joker or not
-            follow_joker_action = self.get_follow_joker_action() 
+        # The card must be one of the legal cards: a card with the same suit as the lead card if the player has one, otherwise a trump suit card if there is a trump suit and they have it. A Joker card is always allowed.
+        while not follow_card.bit & legal_mask:
+            if player.hand & SUIT_MASKS[self.lead_card.suit]:
+                message = f'You should play a card with the same suit ({self.lead_card.suit}).'
+            else:
+                message = f'In this case, you should play the trump suit ({self.trump_suit}).'
+            self.events.card_rejected(player, message)
+            follow_card = player.play_card(self)
         
-        # 2. When playing a non-Joker card
-        else:
-            # First scenario: if there is a card with the same suit as the lead card in the player's hand, the player should not be allowed to play a card with another suit
-            while self.lead_card.suit in player_suits and follow_card.suit != self.lead_card.suit:
-                print(f'You should play a card with the same suit ({self.lead_card.suit}).')
-                follow_card = player.play_card()
-            
-            # Second scenario: if the player is not able to follow the lead suit, then they must play a trump suit, provided there is a trump suit and they have it
-            if self.trump_suit != 'None' and self.lead_card.suit not in player_suits:
-                while self.trump_suit in player_suits and follow_card.suit != self.trump_suit:
-                    print(f'In this case, you should play the trump suit ({self.trump_suit}).')
-                    follow_card = player.play_card()
+        follow_joker_action = 'NotApplicable'
+        # When playing a Joker card, prompt user to decide whether to 'Play' the Joker or not
+        if follow_card.bit & JOKER_MASK:
+            follow_joker_action = self.get_follow_joker_action(player)
         
         return follow_card, follow_joker_action
 
@@ -198,44 +290,33 @@ class PlayHand:
         self.lead_joker_action = self.get_high_low_choice()
         # Then, prompt the player to choose the suit to be played following a Joker lead
         self.suit_wanted = self.get_suit_wanted()
+        self.events.joker_led(self.players[self.lead_player_index], self.lead_joker_action, self.suit_wanted)
         
         for player in self.get_following_players():
             follow_card, follow_joker_action = self.get_follow_card_for_joker_lead(player)
-            player.cards.remove(follow_card)
+            player.remove_card(follow_card)
             self.cards_played[player] = (follow_card, follow_joker_action)
+            self.events.card_played(player, follow_card, follow_joker_action)
     
     def get_high_low_choice(self) -> str:
         """
-        Prompts the player to choose between 'High' or 'Low' action when leading with a Joker card.
+        Asks the lead player to choose between 'High' or 'Low' action when leading with a Joker card.
         
         Returns:
             str: The player's choice ('High' or 'Low').
         """
-        action = input('"High" of "Low"? Choose one of them: ').strip().capitalize()
-        while action not in ['High', 'Low']:
-            action = input('Invalid action! Choose "High" or "Low": ').strip().capitalize()
-        return action
+        lead_player = self.players[self.lead_player_index]
+        return lead_player.decider.choose_high_low(lead_player, self)
     
     def get_suit_wanted(self) -> str:
         """
-        Prompts the player to choose the suit to be played following a Joker lead (the suit they want others to play and win or the suit they want to win with).
+        Asks the lead player to choose the suit to be played following a Joker lead (the suit they want others to play and win or the suit they want to win with).
         
         Returns:
             str: The suit required to be played.
         """
-        if self.lead_joker_action == 'High':
-            suit_prompt = f'Which suit would you like others to play? Enter "D" for ♦, "H" for ♥, "S" for ♠, "C" for "♣": '
-        else:
-            suit_prompt = f'Which suit would you like to win this trick? Enter "D" for ♦, "H" for ♥, "S" for ♠, "C" for "♣": '
-            
-        suit_wanted = input(suit_prompt).strip().capitalize()
-        while suit_wanted not in SUITS.values() and suit_wanted not in SUITS.keys():
-            suit_wanted = input('Invalid input! Try again: ').strip().capitalize()
-        
-        if suit_wanted in SUITS.keys():
-            suit_wanted = SUITS[suit_wanted]
-            
-        return suit_wanted
+        lead_player = self.players[self.lead_player_index]
+        return lead_player.decider.choose_suit_wanted(lead_player, self)
     
     def get_follow_card_for_joker_lead(self, player: object) -> tuple[object, str]:
         """
@@ -247,55 +328,38 @@ class PlayHand:
         Returns:
             Tuple[Card object, str]: A tuple where the Card object represents the card played, and a string represents the action taken when playing a Joker card ('Play', 'Give up' or 'NotApplicable')
         """
-        player_suits = [card.suit for card in player.cards]
-        suit_cards = [card for card in player.cards if card.suit == self.suit_wanted]
-        follow_card = player.play_card()
-        follow_joker_action = 'NotApplicable'
+        legal_mask = self.get_legal_cards(player)
+        follow_card = player.play_card(self)
         
-        # 1. When playing a Joker card
-        if 'JOKER' in str(follow_card):
-            # Prompt user to decide whether to 'Play' the Joker or not
-            follow_joker_action = self.get_follow_joker_action()
+        # The card must be one of the legal cards: a card of the required suit if the player has one ('High': the highest-ranking of them), otherwise a trump suit card if there is a trump suit and they have it. A Joker card is always allowed.
+        while not follow_card.bit & legal_mask:
+            if not player.hand & SUIT_MASKS[self.suit_wanted]:
+                message = f'If you do not have the {self.suit_wanted} card, you should play a trump suit ({self.trump_suit}).'
+            elif self.lead_joker_action == 'High':
+                message = f'You should play the highest card with {self.suit_wanted} suit. Try again!'
+            else:
+                message = f'You should play a card with {self.suit_wanted} suit. Try again!'
+            self.events.card_rejected(player, message)
+            follow_card = player.play_card(self)
         
-        # 2. When playing a non-Joker card
-        else:     
-            if self.lead_joker_action == 'High':
-                highest_card = max(suit_cards, key = lambda card: card.value) if suit_cards else None
-                # First scenario: if the player has any cards of the required suit, they must play the highest-ranking card among those cards
-                while self.suit_wanted in player_suits and follow_card != highest_card:
-                    print(f'You should play the highest card with {self.suit_wanted} suit. Try again!')
-                    follow_card = player.play_card()
-                # Second scenario: if the player does not have any cards of the required suit, then they must play a trump suit, provided there is a trump suit and they have it
-                if self.trump_suit != 'None' and self.suit_wanted not in player_suits:
-                    while self.trump_suit in player_suits and follow_card.suit != self.trump_suit:
-                        print(f'If you do not have the {self.suit_wanted} card, you should play a trump suit ({self.trump_suit}).')
-                        follow_card = player.play_card()
-            
-            if self.lead_joker_action == 'Low':
-                # First scenario: the player must play a card of the required suit if they hold any cards of that suit
-                while self.suit_wanted in player_suits and follow_card.suit != self.suit_wanted:
-                    print(f'You should play a card with {self.suit_wanted} suit. Try again!')
-                    follow_card = player.play_card()
-                
-                # Second scenario: if the player does not have any cards of the required suit, then they must play a trump suit, provided there is a trump suit and they have it
-                if self.trump_suit != 'None' and self.suit_wanted not in player_suits:
-                    while self.trump_suit in player_suits and follow_card.suit != self.trump_suit:
-                        print(f'If you do not have the {self.suit_wanted} card, you should play a trump suit ({self.trump_suit}).')
-                        follow_card = player.play_card()
+        follow_joker_action = 'NotApplicable'
+        # When playing a Joker card, prompt user to decide whether to 'Play' the Joker or not
+        if follow_card.bit & JOKER_MASK:
+            follow_joker_action = self.get_follow_joker_action(player)
         
         return (follow_card, follow_joker_action)
     
-    def get_follow_joker_action(self) -> str:
+    def get_follow_joker_action(self, player: object) -> str:
         """
-        Prompts the player to choose whether to play or give up the Joker card.
+        Asks the player whether to play or give up the Joker card.
+
+        Args:
+            player (Player object): The player who has played the Joker card.
 
         Returns:
             str: The player's choice ('Play' or 'Give up').
         """
-        action = input('Would you like to play the JOKER or give it up? Enter "Play" or "Give up": ').strip().capitalize()
-        while action not in ['Play', 'Give up']:
-           action = input('Invalid input! Please enter "Play" or "Give up": ').strip().capitalize()
-        return action
+        return player.decider.choose_follow_joker_action(player, self)
     
     def determine_trick_winner(self) -> object:
         """
@@ -304,106 +368,41 @@ class PlayHand:
         Returns:
             Player (object): The Player object who has won the trick.
         """
-        if 'JOKER' in str(self.lead_card):
+        if self.lead_card.bit & JOKER_MASK:
             return self.determine_winner_for_joker_lead()
         else:
             return self.determine_winner_for_non_joker_lead()
 
     def determine_winner_for_non_joker_lead(self) -> object:
         """
-        Determines the winner of a trick led with a non-Joker card.
+        Determines the winner of a trick led with a non-Joker card: the last player who has chosen to 'Play' a Joker,
+        otherwise the highest trump suit card, otherwise the highest card of the lead suit.
         
         Returns:
             Player (obect): The player object who has won the trick.
         """
-        players_who_played_joker = []
-        players_who_played_trump_suit = {}
-        highest_card_player = None 
-        highest_value = -1
-        
-        for player, (card, follow_joker_action) in self.cards_played.items():
-            # If the player has chosen to 'Play' a Joker card
-            if 'JOKER' in str(card):
-                if follow_joker_action == 'Play':
-                    players_who_played_joker.append(player)
-            # If the player's card belongs to the trump suit
-            elif card.suit == self.trump_suit:
-                players_who_played_trump_suit[player] = card.value
-            # If the player's card is of the same suit as the lead card
-            elif self.lead_card.suit == card.suit:
-                if card.value > highest_value:
-                    highest_value = card.value
-                    highest_card_player = player
-        
-        # Joker card is the winner of the trick. If two Jokers are played, the player who played the last Joker wins the trick.
-        if players_who_played_joker:
-            winner = players_who_played_joker[-1]
-        # If no Joker is played, the player who played the highest trump suit card wins the trick.
-        elif players_who_played_trump_suit:
-            highest_player, _ = max(players_who_played_trump_suit.items(), key = lambda pair: pair[1])
-            winner = highest_player
-        # If the players' cards are not from the trump suit and are of the same suit as the lead card, the player with the highest-ranking card of that suit wins the trick.
-        elif highest_card_player:
-            winner = highest_card_player
-        # If the lead suit is played, and no other player has a card of the same suit (or a lower-ranking card), a Joker, or a trump suit card, the lead player wins the trick.
-        else:
-            winner = self.players[self.lead_player_index]
-        
-        winner.tricks_won += 1
-        return winner 
+        return self.award_trick(LEAD_KEYS[self.trump_suit][self.lead_card.suit])
     
     def determine_winner_for_joker_lead(self) -> object:
         """
-        Determines the winner of a trick led with a Joker card.
+        Determines the winner of a trick led with a Joker card: a player who has chosen to 'Play' their Joker, otherwise
+        - 'High': the lead player if the trump suit is wanted, otherwise the highest trump suit card, otherwise the lead player;
+        - 'Low': the highest trump suit card, otherwise the highest card of the suit wanted, otherwise the lead player.
         
         Returns:
             Player (obect): The player object who has won the trick.
         """
-        trump_suits_played = {}
-        suit_wanted_played = {}
-        
-        for player, (card, follow_joker_action) in self.cards_played.items():
-            # If the player has chosen to 'Play' a Joker card
-            if 'JOKER' in str(card):
-                if follow_joker_action == 'Play':
-                    # As the first Joker has already been played as the lead card, then the second player who chooses to 'Play' their Joker card automatically becomes the winner of that trick
-                    player.tricks_won += 1
-                    return player
-            # If the player's card belongs to the trump suit
-            elif card.suit == self.trump_suit:
-                trump_suits_played[player] = card.value
-            # If the player's card is of the same suit as the suit required
-            elif card.suit == self.suit_wanted:
-                    suit_wanted_played[player] = card.value
-        
-        # Track if the suit required to be played is the same as the trump suit
-        is_trump_wanted = (self.suit_wanted == self.trump_suit)
+        return self.award_trick(JOKER_LEAD_KEYS[self.trump_suit][self.lead_joker_action][self.suit_wanted])
 
-        if self.lead_joker_action == 'High':
-            # If no Joker is played, and the required suit is the trump suit, the lead player who played the Joker wins the trick.
-            if is_trump_wanted:
-                winner = self.players[self.lead_player_index]
-            # If a suit other than the trump suit is required, the player who played the highest-ranking trump suit card wins the trick.
-            elif trump_suits_played:  
-                highest_player, _ = max(trump_suits_played.items(), key = lambda pair: pair[1])
-                winner = highest_player
-            # In all other cases, the lead player who played the Joker wins the trick.
-            else:
-                winner = self.players[self.lead_player_index]
-        
-        if self.lead_joker_action == 'Low':
-            # The player who played the highest-ranking trump suit card wins the trick.
-            if trump_suits_played:
-                highest_player, _ = max(trump_suits_played.items(), key = lambda pair: pair[1])
-                winner = highest_player
-            # The player who played the highest-ranking card of the required suit wins the trick.
-            elif suit_wanted_played:
-                highest_player, _ = max(suit_wanted_played.items(), key = lambda pair: pair[1])
-                winner = highest_player
-            # In all other cases, the lead player who played the Joker wins the trick.
-            else:
-                winner = self.players[self.lead_player_index]
-        
+    def award_trick(self, keys: tuple) -> object:
+        """
+        Gives the current trick to the player whose play has the largest rank key in the trick's context (see trick_resolution.py).
+
+        Returns:
+            Player (object): The player object who has won the trick.
+        """
+        position = winning_position(keys, self.cards_played.values())
+        winner = self.players[(self.lead_player_index + position) % len(self.players)]
         winner.tricks_won += 1
         return winner
     
@@ -412,3 +411,37 @@ class PlayHand:
         Returns the list of players who will follow the lead player.
         """
         return self.players[self.lead_player_index + 1:] + self.players[:self.lead_player_index]
+    
+    def get_legal_cards(self, player: object) -> int:
+        """
+        Returns the cards the player is allowed to play in the current trick, as a bitmask (see legal_moves.py).
+
+        Args:
+            player (Player object): The player whose turn it is.
+
+        Returns:
+            int: The bitmask of the legal cards.
+        """
+        # The lead player is free to play any card
+        if player is self.players[self.lead_player_index]:
+            return player.hand
+        return legal_cards(player.hand, self.lead_card.card_id, self.trump_suit, self.suit_wanted, self.lead_joker_action)
+    
+    def get_legal_joker_actions(self, player: object) -> tuple:
+        """
+        Returns the actions available to the player if they play a Joker card now ('High'/'Low' when leading, 'Play'/'Give up' when following).
+        """
+        return legal_joker_actions(player is self.players[self.lead_player_index])
+    
+    def get_playable_cards(self, player: object) -> list:
+        """
+        Returns the cards the player is allowed to play in the current trick.
+
+        Args:
+            player (Player object): The player whose turn it is.
+
+        Returns:
+            list: The Card objects the player may play.
+        """
+        legal_mask = self.get_legal_cards(player)
+        return [card for card in player.cards if card.bit & legal_mask]
@@ -1,5 +1,7 @@
-from prettytable import PrettyTable
 from game_hand import PlayHand
+from events import NullEvents
+from scoring import SCORE_TABLE
+from score_table import ScoreTable
 from constants import CARDS_PER_PLAYER, HANDS_PER_SET, NUMBER_OF_PLAYERS
 
 class PlaySet():
@@ -19,44 +21,83 @@ class PlaySet():
         3) dealer_index (int): The index of the player who deals the cards.
         4) set_scores (dict): Dictionary to track the cumulative scores for the set.
         5) game_hand (PlayHand): An instance of the PlayHand class to manage individual hands.
-        6) game_table (PrettyTable): A table to keep track of the game progress
+        6) game_table (ScoreTable): A table to keep track of the game progress (rendered by the event sink, if at all).
+        7) events (object): The event sink receiving everything that happens during the set (see events.py).
+        8) results_log (ResultsLog): The log each finished hand is appended to (see results_log.py), or None.
+        9) game_id (str): The id of the game in the results log.
+        10) set_number (int): The number of the set being played (from 1).
+        11) hand_number (int): The number of the hand being played in the set (from 1).
+        12) resumed_hand_in_progress (bool): Set when the set is restored from a snapshot (see snapshots.py): whether
+            the hand 'hand_number' was interrupted after its bids. None for a set played from its start.
+        13) bonus_checked (bool): Whether the set bonus of the set being played has been checked (see Game.check_bonus).
     """
-    def __init__(self, players: list):
+    def __init__(self, players: list, events: object = None, rng: object = None, results_log: object = None, game_id: str = None):
         """
         Initializes a new instance of PlaySet.
         
         Args:
             players (list): A list of Player objects representing the players in the game.
+            events (object): The event sink to report to. Nothing is reported when omitted.
+            rng (random.Random): Optional random number generator used to shuffle the deck.
+            results_log (ResultsLog): Optional log each finished hand is appended to.
+            game_id (str): The id of the game in the results log.
         """
         self.players = players
+        self.events = events if events is not None else NullEvents()
         self.lead_player_index = 0
         self.dealer_index = -1
         self.set_scores = {}
-        self.game_hand = PlayHand(self.players)
-        self.game_table = PrettyTable([player.name for player in self.players])
+        self.game_hand = PlayHand(self.players, self.events, rng)
+        self.game_table = ScoreTable([player.name for player in self.players])
+        self.results_log = results_log
+        self.game_id = game_id
+        self.set_number = 0
+        self.hand_number = 0
+        self.resumed_hand_in_progress = None
+        self.bonus_checked = False
     
     def play_hand(self):
         """
         Plays a set of hands in the game.
+
+        A set restored from a snapshot (see snapshots.py) is not started over: its hands are played from 'hand_number',
+        and if that hand was interrupted after the bids, from its next trick.
         """
-        for hand in range(HANDS_PER_SET):
-            print('\nHAND NO.', hand + 1)
-            # Rotate lead player and dealer for each hand
-            self.lead_player_index = hand % NUMBER_OF_PLAYERS
-            self.dealer_index = (hand - 1) % NUMBER_OF_PLAYERS
-            
-            # Deal cards to players and let them place their bids
-            self.game_hand.deal_cards_and_place_bids(self.lead_player_index, self.dealer_index)
+        resumed_hand_in_progress = self.resumed_hand_in_progress
+        # Cleared before the loop, which a set restored after its last hand skips
+        self.resumed_hand_in_progress = None
+        if resumed_hand_in_progress is None:
+            self.set_number += 1
+            self.bonus_checked = False
+            first_hand = 0
+        else:
+            first_hand = self.hand_number - 1
+        for hand in range(first_hand, HANDS_PER_SET):
+            self.hand_number = hand + 1
+            # A restored hand in progress already has its cards dealt and its bids placed
+            hand_in_progress = resumed_hand_in_progress and hand == first_hand
+            if not hand_in_progress:
+                self.events.hand_started(hand + 1)
+                # Rotate lead player and dealer for each hand
+                self.lead_player_index = hand % NUMBER_OF_PLAYERS
+                self.dealer_index = (hand - 1) % NUMBER_OF_PLAYERS
+                
+                # Deal cards to players and let them place their bids
+                self.game_hand.deal_cards_and_place_bids(self.lead_player_index, self.dealer_index)
             
             # Play tricks within the hand
-            for i in range(CARDS_PER_PLAYER):
-                print('\nTrick no.', i + 1)
+            for i in range(self.game_hand.tricks_played, CARDS_PER_PLAYER):
+                self.events.trick_started(i + 1)
                 self.game_hand.play_trick()
             
             # Update and print scores for the current hand
             self.update_hand_scores()
             # Update cumulative scores for the set
             self.update_set_scores()
+            # Append the hand to the results log as soon as it is over, before hand_over reports it, so that a snapshot
+            # taken then does not lose the record
+            if self.results_log is not None:
+                self.results_log.log_hand(self.game_id, self.set_number, hand + 1, self.players)
             # Update and print the game table
             self.update_game_table(hand)
             
@@ -69,28 +110,9 @@ class PlaySet():
         Updates the scores for the current hand based on the bids and tricks won by each player.
         """
         for player in self.players:
-            # In case of a successful bid
-            if player.bid == player.tricks_won:
-                player.deserves_bonus.append(True)
-                # If a player bids to win all the 9 tricks and succeeds,
-                # they score 100 points per trick bid.
-                if player.bid == CARDS_PER_PLAYER:
-                    player.score += player.bid * 100
-                # If a player wins the exact number of tricks they bid for,
-                # they get a score of 50 times their bid plus 50.
-                else: 
-                    player.score += (player.bid * 50) + 50
-            # In case of an unsuccessful bid
-            else:
-                player.deserves_bonus.append(False)
-                # If a player bids a non-zero number of tricks but does not win any,
-                # they get a penalty of -500.
-                if player.bid != 0 and player.tricks_won == 0:
-                    player.score -= 500
-                # If a player's bid does not match their tricks won,
-                # they get 10 points for each trick they won.
-                else:
-                    player.score += player.tricks_won * 10
+            # The player's bid has succeeded if they won exactly the number of tricks they bid for
+            player.deserves_bonus.append(player.bid == player.tricks_won)
+            player.score += SCORE_TABLE[player.bid][player.tricks_won]
             
             # Update the player's hand scores list
             player.hand_scores.append(player.score)
@@ -107,7 +129,7 @@ class PlaySet():
     
     def update_game_table(self, hand: int):
         """
-        Updates the game table with the current bids and scores of the players.
+        Updates the game table with the current bids and scores of the players, and reports it.
 
         Args:
             hand (int): The current hand number.
@@ -116,9 +138,7 @@ class PlaySet():
         and scores of all players. If the current hand is the last hand of the
         set, a divider is added to the row to separate it from the next set.
         """
-        self.game_table.padding_width = 5
-        print("\nThis hand is over, let's see the results:")
         # Add a divider after the last hand of the set
         divider = (hand == HANDS_PER_SET - 1)
         self.game_table.add_row([f'{player.bid}: {player.score}' for player in self.players], divider = divider)
-        print(self.game_table)
+        self.events.hand_over(self.game_table)
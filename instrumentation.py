@@ -0,0 +1,284 @@
+"""
+Opt-in instrumentation of the rules engine: counters and latency histograms per game phase and per seat decision.
+
+enable(metrics) wraps the hot methods of PlayHand, PlaySet, Game and Player so that each call is timed into 'metrics';
+disable() puts the original methods back. While disabled nothing is wrapped, so the engine runs exactly the code it
+runs without this module, at no cost. Timed phases:
+
+- 'game': Game.play_set (a whole game);
+- 'deal_and_bid': PlayHand.deal_cards_and_place_bids (dealing, trump choice and bids);
+- 'trick': PlayHand.play_trick;
+- 'winner_resolution': PlayHand.determine_trick_winner;
+- 'scoring': PlaySet.update_hand_scores;
+- 'table_rendering': PlaySet.update_game_table (the game table and its report).
+
+Phases include the decisions made during them. Decision latency is also timed on its own, per seat (the index of the
+player at the table, from 1) and per kind of decision.
+
+Metrics can be exported in the Prometheus text format or as JSON, and written periodically to a file by a
+SnapshotWriter, e.g. for a server (see server.py --metrics).
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from constants import NUMBER_OF_PLAYERS
+from game_hand import PlayHand
+from game_set import PlaySet
+from game import Game
+from player import Player
+
+# Upper bounds of the histogram buckets, in seconds (from 1 µs to 10 s)
+LATENCY_BUCKETS = tuple(float(f'{base}e{exponent}') for exponent in range(-6, 1) for base in (1, 2.5, 5)) + (10.0,)
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets.
+
+    Attributes:
+        1) bounds (tuple): The upper bounds of the buckets, in seconds.
+        2) counts (list): The number of observations per bucket (not cumulative), plus one for values above the last bound.
+        3) total (float): The sum of the observations.
+        4) count (int): The number of observations.
+    """
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns an upper estimate of the q-quantile: the bound of the bucket it falls in.
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return 0.0
+
+class Metrics:
+    """
+    Thread-safe store of counters and histograms, identified by a metric name and a tuple of (label, value) pairs.
+
+    Attributes:
+        1) counters (dict): (name, labels) -> count.
+        2) histograms (dict): (name, labels) -> Histogram.
+        3) lock (threading.Lock): Serializes updates from several game threads.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, labels: tuple = (), amount: int = 1):
+        with self.lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def histogram(self, name: str, labels: tuple = ()) -> Histogram:
+        """
+        Returns the histogram of a metric, creating it if needed. Observations must be made while holding 'lock'.
+        """
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = Histogram()
+            return histogram
+
+    def observe(self, name: str, labels: tuple, value: float):
+        histogram = self.histogram(name, labels)
+        with self.lock:
+            histogram.observe(value)
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f'# TYPE {name} counter')
+                for (metric, labels), count in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{format_labels(labels)} {count}')
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, labels), histogram in sorted(self.histograms.items(), key = lambda item: item[0]):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.bounds, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{format_labels(labels + (("le", f"{bound:g}"),))} {cumulative}')
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {histogram.count}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {histogram.total:.9f}')
+                    lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self) -> dict:
+        """
+        Returns the metrics as plain data: counters, and for every histogram its count, sum, mean and p50/p90/p99 bounds.
+        """
+        with self.lock:
+            return {
+                'time': time.time(),
+                'counters': [{'name': name, 'labels': dict(labels), 'value': count} for (name, labels), count in sorted(self.counters.items())],
+                'histograms': [{
+                    'name': name, 'labels': dict(labels), 'count': histogram.count, 'sum': histogram.total,
+                    'mean': histogram.total / histogram.count if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.5), 'p90': histogram.quantile(0.9), 'p99': histogram.quantile(0.99),
+                } for (name, labels), histogram in sorted(self.histograms.items(), key = lambda item: item[0])],
+            }
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{label}="{value}"' for label, value in labels) + '}'
+
+class SnapshotWriter:
+    """
+    Background thread writing a snapshot of the metrics to a file at a fixed interval (and once more when stopped).
+    Each snapshot replaces the file atomically, so readers never see a partial one.
+
+    Attributes:
+        1) metrics (Metrics): The metrics to export.
+        2) path (str): The path of the snapshot file.
+        3) interval (float): Seconds between two snapshots.
+        4) format (str): 'prometheus' (text exposition format) or 'json'.
+        5) stopped (threading.Event): Set to stop the thread.
+        6) thread (threading.Thread): The writing thread.
+    """
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 10.0, format: str = None):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.format = format if format is not None else ('json' if path.endswith('.json') else 'prometheus')
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target = self.run, name = 'metrics-snapshot', daemon = True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+        self.write()
+
+    def write(self):
+        """
+        Writes one snapshot.
+        """
+        if self.format == 'json':
+            content = json.dumps(self.metrics.to_json(), indent = 4)
+        else:
+            content = self.metrics.to_prometheus()
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w') as file:
+            file.write(content)
+        os.replace(temporary_path, self.path)
+
+# (class, method name, phase) of every timed phase
+PHASES = [
+    (Game, 'play_set', 'game'),
+    (PlayHand, 'deal_cards_and_place_bids', 'deal_and_bid'),
+    (PlayHand, 'play_trick', 'trick'),
+    (PlayHand, 'determine_trick_winner', 'winner_resolution'),
+    (PlaySet, 'update_hand_scores', 'scoring'),
+    (PlaySet, 'update_game_table', 'table_rendering'),
+]
+# (class, method name, decision) of every timed decision, with how to find the deciding player and the hand from the call
+DECISIONS = [
+    (Player, 'choose_trump', 'choose_trump'),
+    (Player, 'place_bid', 'place_bid'),
+    (Player, 'play_card', 'play_card'),
+    (PlayHand, 'get_high_low_choice', 'choose_high_low'),
+    (PlayHand, 'get_suit_wanted', 'choose_suit_wanted'),
+    (PlayHand, 'get_follow_joker_action', 'choose_follow_joker_action'),
+]
+
+# The original methods replaced by enable(), to be put back by disable()
+original_methods = {}
+
+def timed_phase(method: object, phase: str, metrics: Metrics) -> object:
+    """
+    Wraps a method so that the duration of each call is observed in the phase's histogram.
+    """
+    # The histogram is looked up once, so that a call only costs two clock reads and one observation
+    histogram = metrics.histogram('joker_phase_seconds', (('phase', phase),))
+    lock = metrics.lock
+    clock = time.perf_counter
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = clock() - start
+            with lock:
+                histogram.observe(elapsed)
+    return wrapper
+
+def timed_decision(method: object, decision: str, metrics: Metrics) -> object:
+    """
+    Wraps a decision method so that the duration of each call is observed in the histogram of the deciding seat.
+    """
+    histograms = [metrics.histogram('joker_decision_seconds', (('seat', str(seat + 1)), ('decision', decision))) for seat in range(NUMBER_OF_PLAYERS)]
+    lock = metrics.lock
+    clock = time.perf_counter
+    def wrapper(owner, *args):
+        start = clock()
+        try:
+            return method(owner, *args)
+        finally:
+            elapsed = clock() - start
+            # Player methods are called as (player, game_hand); PlayHand methods as (game_hand) for the lead player, or (game_hand, player)
+            if isinstance(owner, Player):
+                player, game_hand = owner, args[0]
+            else:
+                game_hand = owner
+                player = args[0] if args else game_hand.players[game_hand.lead_player_index]
+            with lock:
+                histograms[game_hand.players.index(player)].observe(elapsed)
+    return wrapper
+
+def enable(metrics: Metrics) -> Metrics:
+    """
+    Starts timing the game phases and decisions into 'metrics', for every game of the process.
+    """
+    disable()
+    # Headless hands would skip the timed decisions and winner resolution (see PlayHand.play_headless_trick)
+    original_methods[(PlayHand, 'fast_path')] = PlayHand.fast_path
+    PlayHand.fast_path = False
+    for cls, name, phase in PHASES:
+        original_methods[(cls, name)] = cls.__dict__[name]
+        setattr(cls, name, timed_phase(cls.__dict__[name], phase, metrics))
+    for cls, name, decision in DECISIONS:
+        original_methods[(cls, name)] = cls.__dict__[name]
+        setattr(cls, name, timed_decision(cls.__dict__[name], decision, metrics))
+    return metrics
+
+def disable():
+    """
+    Stops timing: puts the original methods back.
+    """
+    for (cls, name), method in original_methods.items():
+        setattr(cls, name, method)
+    original_methods.clear()
+
+def is_enabled() -> bool:
+    return bool(original_methods)
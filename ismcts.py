@@ -0,0 +1,715 @@
+"""
+Information-set Monte Carlo tree search (ISMCTS) decision provider.
+
+Card play is searched with single-observer ISMCTS: every iteration samples the hidden hands of the three other seats
+consistently with what the deciding seat has seen (its own cards, the cards played in the hand, and the suits a seat
+has shown it lacks by not following), then walks one tree shared by all the samples. A node's statistics are those of
+the seat that made its move, and a move's availability is counted whenever it is legal in the sampled deal. Moves
+include the Joker choices: a Joker lead is one move per 'High'/'Low' action and suit wanted, a Joker played after the
+lead one move per 'Play'/'Give up'. The playouts end the hand with a bid-aware policy (a seat short of its bid wins
+as cheaply as it can, a seat that has made it ducks), and every seat is rewarded with its score for the hand.
+
+The trump suit (from the first three cards only) and the bid are chosen by flat Monte Carlo: deals consistent with the
+known cards are played out, and the choice with the best expected hand score wins. The dealer never bids the bid
+PlayHand.validate_dealer_bid would reject.
+
+Every decision runs until its time budget expires (or a fixed number of iterations, for reproducible runs) and then
+returns the best move found. With several workers, the search is root-parallel: every worker process grows its own
+tree from the same information set and the visit counts of the root moves are summed.
+
+    python ismcts.py --games 2 --budget 0.1
+"""
+import argparse
+import math
+import os
+import random
+import time
+from constants import RANKS, NUMBER_OF_PLAYERS, CARDS_PER_PLAYER
+from card_masks import FULL_DECK_MASK, SUIT_ORDER, SUIT_MASKS, JOKER_MASK, CARD_SUITS
+from cards import CARDS
+from legal_moves import legal_cards
+from scoring import SCORE_TABLE
+from decisions import SimpleDecisions, SIMPLE_PLAY_ORDER, TRUMP_CHOICES
+from solver import trick_winner
+from trick_resolution import JOKER_PLAY_STRENGTH, CARD_STRENGTHS, joker_lead_strength, leading_play
+from events import NullEvents
+
+# Seconds a decision may take, and the UCB exploration constant (rewards are scaled to [0, 1])
+DEFAULT_TIME_BUDGET = 0.1
+EXPLORATION = 0.7
+# Probability that a playout move is drawn at random instead of from the bid-aware policy
+PLAYOUT_EPSILON = 0.1
+# Samples tried before a deal consistent with every shown void is given up on (voids are then ignored)
+SAMPLING_ATTEMPTS = 20
+
+# SUIT_CARD_IDS[i][pattern] lists the card ids of a 9-bit pattern of the i-th suit, so that the cards of a hand are
+# listed with four lookups instead of a loop over its bits
+SUIT_CARD_IDS = [[[i * len(RANKS) + rank for rank in range(len(RANKS)) if pattern >> rank & 1] for pattern in range(1 << len(RANKS))] for i in range(len(SUIT_ORDER))]
+
+def mask_ids(mask: int) -> list:
+    """
+    Returns the ids of the cards in a mask, in ascending order (as card_masks.card_ids).
+    """
+    return SUIT_CARD_IDS[0][mask & 511] + SUIT_CARD_IDS[1][mask >> 9 & 511] + SUIT_CARD_IDS[2][mask >> 18 & 511] + SUIT_CARD_IDS[3][mask >> 27]
+
+LOWEST_SCORE = min(min(row) for row in SCORE_TABLE)
+SCORE_RANGE = max(max(row) for row in SCORE_TABLE) - LOWEST_SCORE
+
+class InformationSet:
+    """
+    What a seat knows in the middle of a hand: the state of the game, without the other seats' cards.
+
+    Attributes:
+        1) seat (int): The deciding seat.
+        2) hand (int): The bitmask of the deciding seat's cards.
+        3) unseen (int): The bitmask of the cards the deciding seat has not seen.
+        4) hand_sizes (list): The number of cards each seat holds (the deciding seat included, whether it knows them all or not).
+        5) voids (list): For each seat, the bitmask of the cards it cannot hold (suits it has shown it lacks).
+        6) trump_suit (str): The trump suit, or 'None'.
+        7) bids (list): The bid of each seat.
+        8) tricks_won (list): The tricks each seat has won so far.
+        9) leader (int): The seat leading the current trick.
+        10) plays (list): (card id, Joker action) of the cards already played in the current trick.
+        11) suit_wanted (str): The suit asked for by a Joker lead in the current trick.
+        12) lead_joker_action (str): 'High' or 'Low' after a Joker lead in the current trick.
+    """
+
+    def __init__(self, seat: int, hand: int, unseen: int, hand_sizes: list, voids: list, trump_suit: str, bids: list, tricks_won: list,
+                 leader: int, plays: list, suit_wanted: str = None, lead_joker_action: str = None):
+        self.seat = seat
+        self.hand = hand
+        self.unseen = unseen
+        self.hand_sizes = hand_sizes
+        self.voids = voids
+        self.trump_suit = trump_suit
+        self.bids = bids
+        self.tricks_won = tricks_won
+        self.leader = leader
+        self.plays = plays
+        self.suit_wanted = suit_wanted
+        self.lead_joker_action = lead_joker_action
+
+def observe(player: object, game_hand: object) -> InformationSet:
+    """
+    Returns the information set of a player about to play a card in a hand.
+
+    The cards of the other players are only used for what every seat can see: how many they hold, and (with the cards
+    of the player) which cards have not been played yet.
+    """
+    players = game_hand.players
+    seat = players.index(player)
+    held = 0
+    for other in players:
+        held |= other.hand
+    voids = [0] * NUMBER_OF_PLAYERS
+    for cards_played, suit_wanted, lead_joker_action in game_hand.completed_tricks + [(game_hand.cards_played, game_hand.suit_wanted, game_hand.lead_joker_action)]:
+        plays = list(cards_played.items())
+        if not plays:
+            continue
+        lead_card = plays[0][1][0]
+        required_suit = suit_wanted if lead_card.bit & JOKER_MASK else lead_card.suit
+        for other, (card, _) in plays[1:]:
+            # A Joker can always be played, so it shows nothing; any other card shows the required suit is missing,
+            # and the trump suit too if it is not a trump
+            if card.bit & JOKER_MASK or card.suit == required_suit:
+                continue
+            void = SUIT_MASKS[required_suit]
+            if card.suit != game_hand.trump_suit:
+                void |= SUIT_MASKS[game_hand.trump_suit]
+            voids[players.index(other)] |= void
+
+    plays = [(card.card_id, joker_action) for card, joker_action in game_hand.cards_played.values()]
+    return InformationSet(
+        seat, player.hand, held & ~player.hand, [other.hand.bit_count() for other in players], voids, game_hand.trump_suit,
+        [other.bid for other in players], [other.tricks_won for other in players], game_hand.lead_player_index, plays,
+        game_hand.suit_wanted if plays and (1 << plays[0][0]) & JOKER_MASK else None,
+        game_hand.lead_joker_action if plays and (1 << plays[0][0]) & JOKER_MASK else None,
+    )
+
+def sample_hands(info: InformationSet, rng: random.Random) -> list:
+    """
+    Deals the unseen cards to the seats at random, as many as each holds, respecting their voids when possible.
+
+    Returns:
+        list: The bitmask of every seat's cards.
+    """
+    cards = mask_ids(info.unseen)
+    room = list(info.hand_sizes)
+    # The deciding seat may not know all its cards yet (when choosing the trump suit from its first three)
+    room[info.seat] -= info.hand.bit_count()
+    if not any(info.voids):
+        # Without voids, every split of a shuffled deck is as likely: slice it by the room of each seat
+        rng.shuffle(cards)
+        hands = []
+        start = 0
+        for seat in range(NUMBER_OF_PLAYERS):
+            hand = info.hand if seat == info.seat else 0
+            for card_id in cards[start:start + room[seat]]:
+                hand |= 1 << card_id
+            hands.append(hand)
+            start += room[seat]
+        if start != len(cards):
+            raise ValueError('The hand sizes do not match the unseen cards.')
+        return hands
+    for attempt in range(SAMPLING_ATTEMPTS + 1):
+        # The last attempt ignores the voids, which may not all be satisfiable together with the hand sizes
+        voids = info.voids if attempt < SAMPLING_ATTEMPTS else [0] * NUMBER_OF_PLAYERS
+        rng.shuffle(cards)
+        hands = [0] * NUMBER_OF_PLAYERS
+        hands[info.seat] = info.hand
+        seat_room = list(room)
+        for card_id in cards:
+            bit = 1 << card_id
+            # Pick a seat with room for the card and without a void in it, with a chance proportional to its room
+            total = 0
+            for seat in range(NUMBER_OF_PLAYERS):
+                if seat_room[seat] and not voids[seat] & bit:
+                    total += seat_room[seat]
+            if not total:
+                break
+            pick = rng.randrange(total)
+            for seat in range(NUMBER_OF_PLAYERS):
+                if seat_room[seat] and not voids[seat] & bit:
+                    pick -= seat_room[seat]
+                    if pick < 0:
+                        break
+            hands[seat] |= bit
+            seat_room[seat] -= 1
+        else:
+            return hands
+    raise ValueError('The hand sizes do not match the unseen cards.')
+
+class Deal:
+    """
+    A fully known hand in progress (one sample of an information set), played out by the search.
+
+    Attributes:
+        1) hands (list): The bitmask of every seat's cards.
+        2) trump_suit (str): The trump suit, or 'None'.
+        3) bids (list): The bid of each seat.
+        4) tricks_won (list): The tricks each seat has won.
+        5) leader (int): The seat leading the current trick.
+        6) plays (list): (card id, Joker action) of the cards played in the current trick.
+        7) suit_wanted (str): The suit asked for by a Joker lead in the current trick.
+        8) lead_joker_action (str): 'High' or 'Low' after a Joker lead in the current trick.
+    """
+
+    __slots__ = ('hands', 'trump_suit', 'bids', 'tricks_won', 'leader', 'plays', 'suit_wanted', 'lead_joker_action')
+
+    def __init__(self, hands: list, info: InformationSet):
+        self.hands = hands
+        self.trump_suit = info.trump_suit
+        self.bids = info.bids
+        self.tricks_won = list(info.tricks_won)
+        self.leader = info.leader
+        self.plays = list(info.plays)
+        self.suit_wanted = info.suit_wanted
+        self.lead_joker_action = info.lead_joker_action
+
+    def to_move(self) -> int:
+        return (self.leader + len(self.plays)) % NUMBER_OF_PLAYERS
+
+    def is_over(self) -> bool:
+        return not self.plays and not self.hands[self.leader]
+
+    def legal_moves(self) -> list:
+        """
+        Returns the moves of the seat to play, as (card id, Joker action, suit wanted) tuples.
+        """
+        seat = self.to_move()
+        if not self.plays:
+            moves = []
+            for card_id in mask_ids(self.hands[seat]):
+                if (1 << card_id) & JOKER_MASK:
+                    moves.extend((card_id, action, suit) for action in ('High', 'Low') for suit in SUIT_ORDER)
+                else:
+                    moves.append((card_id, None, None))
+            return moves
+        moves = []
+        for card_id in mask_ids(legal_cards(self.hands[seat], self.plays[0][0], self.trump_suit, self.suit_wanted, self.lead_joker_action)):
+            if (1 << card_id) & JOKER_MASK:
+                moves.append((card_id, 'Play', None))
+                moves.append((card_id, 'Give up', None))
+            else:
+                moves.append((card_id, None, None))
+        return moves
+
+    def apply(self, move: tuple):
+        """
+        Plays a move, and resolves the trick once the four cards are down.
+        """
+        card_id, action, suit = move
+        seat = self.to_move()
+        self.hands[seat] &= ~(1 << card_id)
+        if not self.plays and (1 << card_id) & JOKER_MASK:
+            self.lead_joker_action = action
+            self.suit_wanted = suit
+        self.plays.append((card_id, action if action is not None else 'NotApplicable'))
+        if len(self.plays) == NUMBER_OF_PLAYERS:
+            self.finish_trick()
+
+    def finish_trick(self):
+        winner = (self.leader + trick_winner(self.plays, self.trump_suit, self.suit_wanted, self.lead_joker_action)) % NUMBER_OF_PLAYERS
+        self.tricks_won[winner] += 1
+        self.leader = winner
+        self.plays = []
+        self.suit_wanted = None
+        self.lead_joker_action = None
+
+    def play_out(self, rng: random.Random):
+        """
+        Plays the hand to its end with the bid-aware playout policy: a seat short of its bid leads its strongest card
+        and follows with its cheapest winning card (or discards its lowest), a seat that has made its bid leads its
+        weakest card and follows with its highest losing card. A few moves are drawn at random instead.
+
+        This is the hot loop of the search, so the trick is resolved incrementally, from the strength of the card
+        winning it so far (see trick_resolution.leading_play), instead of through apply().
+        """
+        random_value = rng.random
+        hands, tricks_won, bids, trump_suit = self.hands, self.tricks_won, self.bids, self.trump_suit
+        leader, plays = self.leader, self.plays
+        suit_wanted, lead_joker_action = self.suit_wanted, self.lead_joker_action
+        position = len(plays)
+        if plays:
+            lead_card_id = plays[0][0]
+            best, best_position, suit_required = leading_play(plays, trump_suit, suit_wanted, lead_joker_action)
+        while True:
+            if position == NUMBER_OF_PLAYERS:
+                leader = (leader + best_position) % NUMBER_OF_PLAYERS
+                tricks_won[leader] += 1
+                position = 0
+            if not position and not hands[leader]:
+                break
+            seat = (leader + position) % NUMBER_OF_PLAYERS
+            hand = hands[seat]
+            wants_tricks = tricks_won[seat] < bids[seat]
+
+            if position == 0:
+                candidates = mask_ids(hand)
+                if random_value() < PLAYOUT_EPSILON:
+                    card_id = candidates[int(random_value() * len(candidates))]
+                elif wants_tricks:
+                    card_id = max(candidates, key = SIMPLE_PLAY_ORDER.__getitem__)
+                else:
+                    card_id = min(candidates, key = SIMPLE_PLAY_ORDER.__getitem__)
+                lead_card_id = card_id
+                best_position = 0
+                if (1 << card_id) & JOKER_MASK:
+                    suit_wanted = trump_suit if trump_suit != 'None' else SUIT_ORDER[int(random_value() * len(SUIT_ORDER))]
+                    lead_joker_action, suit_required = ('High', None) if wants_tricks else ('Low', suit_wanted)
+                    best = joker_lead_strength(lead_joker_action, suit_wanted, trump_suit)
+                else:
+                    suit_required = CARD_SUITS[card_id]
+                    best = CARD_STRENGTHS[trump_suit, suit_required][card_id]
+            else:
+                candidates = mask_ids(legal_cards(hand, lead_card_id, trump_suit, suit_wanted, lead_joker_action))
+                if random_value() < PLAYOUT_EPSILON:
+                    card_id = candidates[int(random_value() * len(candidates))]
+                    play_joker = random_value() < 0.5
+                else:
+                    card_id, play_joker = choose_follow(candidates, best, trump_suit, suit_required, wants_tricks)
+                if (1 << card_id) & JOKER_MASK and play_joker:
+                    strength = JOKER_PLAY_STRENGTH + position
+                else:
+                    strength = CARD_STRENGTHS[trump_suit, suit_required][card_id]
+                if strength > best:
+                    best = strength
+                    best_position = position
+            hands[seat] = hand & ~(1 << card_id)
+            position += 1
+
+        self.leader = leader
+        self.plays = []
+        self.suit_wanted = None
+        self.lead_joker_action = None
+
+    def rewards(self) -> list:
+        """
+        Returns every seat's score for the hand, scaled to [0, 1].
+        """
+        return [(SCORE_TABLE[bid][tricks] - LOWEST_SCORE) / SCORE_RANGE for bid, tricks in zip(self.bids, self.tricks_won)]
+
+def choose_follow(candidates: list, best: int, trump_suit: str, suit_required: str, wants_tricks: bool) -> tuple[int, bool]:
+    """
+    Playout policy after the lead: a seat short of its bid wins the trick with its cheapest winning card (a Joker as a
+    last resort), or discards its lowest card; a seat that has made its bid plays its highest card that still loses.
+
+    Args:
+        candidates (list): The ids of the legal cards.
+        best (int): The strength of the card winning the trick so far.
+        trump_suit (str): The trump suit, or 'None'.
+        suit_required (str): The suit that beats a plain card in the trick (see trick_resolution.card_strength).
+        wants_tricks (bool): Whether the seat is short of its bid.
+
+    Returns:
+        Tuple[int, bool]: The card id, and whether a Joker is played to win ('Play') rather than given up.
+    """
+    strengths = CARD_STRENGTHS[trump_suit, suit_required]
+    winning, losing = [], []
+    joker = None
+    for card_id in candidates:
+        if (1 << card_id) & JOKER_MASK:
+            joker = card_id
+            continue
+        strength = strengths[card_id]
+        (winning if strength > best else losing).append((strength, SIMPLE_PLAY_ORDER[card_id], card_id))
+    if wants_tricks:
+        if winning:
+            return min(winning)[2], False
+        if joker is not None:
+            return joker, True
+        return min(losing, key = lambda entry: entry[1])[2], False
+    if losing:
+        return max(losing)[2], False
+    if joker is not None:
+        return joker, False
+    return min(winning)[2], False
+
+class Node:
+    """
+    A node of the search tree: the move that leads to it, and the statistics of that move.
+
+    Attributes:
+        1) move (tuple): (card id, Joker action, suit wanted) played to reach the node.
+        2) parent (Node): The parent node (None for the root).
+        3) seat (int): The seat that played the move, whose rewards the node accumulates.
+        4) children (dict): Child nodes by move.
+        5) visits (int): The number of iterations through the node.
+        6) reward (float): The sum of the seat's rewards over those iterations.
+        7) availability (int): The number of iterations in which the move was legal when its parent was reached.
+    """
+
+    __slots__ = ('move', 'parent', 'seat', 'children', 'visits', 'reward', 'availability')
+
+    def __init__(self, move: tuple = None, parent: 'Node' = None, seat: int = None):
+        self.move = move
+        self.parent = parent
+        self.seat = seat
+        self.children = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.availability = 1
+
+def search(info: InformationSet, rng: random.Random, time_budget: float = DEFAULT_TIME_BUDGET, iterations: int = None, exploration: float = EXPLORATION) -> dict:
+    """
+    Runs ISMCTS from an information set until the time budget expires, or for a number of iterations if given.
+
+    Returns:
+        dict: 'visits' (visits of every root move), 'iterations', 'nodes' (tree nodes created) and 'seconds'.
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    clock = time.perf_counter
+    log = math.log
+    sqrt = math.sqrt
+    root = Node()
+    nodes = 1
+    completed = 0
+    while (completed < iterations) if iterations is not None else (clock() < deadline):
+        deal = Deal(sample_hands(info, rng), info)
+        node = root
+        # Selection and expansion, among the moves legal in this sample
+        while not deal.is_over():
+            moves = deal.legal_moves()
+            children = node.children
+            untried = [move for move in moves if move not in children]
+            if untried:
+                move = untried[int(rng.random() * len(untried))]
+                child = children[move] = Node(move, node, deal.to_move())
+                nodes += 1
+                deal.apply(move)
+                node = child
+                break
+            best_value = -1.0
+            for move in moves:
+                child = children[move]
+                child.availability += 1
+                value = child.reward / child.visits + exploration * sqrt(log(child.availability) / child.visits)
+                if value > best_value:
+                    best_value = value
+                    best_child = child
+            deal.apply(best_child.move)
+            node = best_child
+        # Playout and backpropagation
+        deal.play_out(rng)
+        rewards = deal.rewards()
+        while node is not None:
+            node.visits += 1
+            if node.seat is not None:
+                node.reward += rewards[node.seat]
+            node = node.parent
+        completed += 1
+    return {
+        'visits': {move: child.visits for move, child in root.children.items()},
+        'iterations': completed,
+        'nodes': nodes,
+        'seconds': clock() - start,
+    }
+
+def search_worker(info: InformationSet, seed: int, time_budget: float, iterations: int, exploration: float) -> dict:
+    """
+    Runs one root-parallel search in a worker process.
+    """
+    return search(info, random.Random(seed), time_budget, iterations, exploration)
+
+def estimate_tricks(seat: int, known: int, trump_suits: list, leader: int, rng: random.Random, deadline: float = None, samples: int = None,
+                    bids: list = None) -> dict:
+    """
+    Plays out random deals consistent with a seat's known cards at the start of a hand, and counts the tricks the seat takes.
+
+    Every seat plays to take tricks, unless its bid is given. The samples are spread evenly over the trump suits.
+
+    Args:
+        seat (int): The seat whose tricks are counted.
+        known (int): The bitmask of the seat's known cards: its first three cards when choosing the trump suit, all nine when bidding.
+        trump_suits (list): The trump suits to evaluate.
+        leader (int): The seat leading the first trick.
+        rng (random.Random): The random number generator of the samples.
+        deadline (float): The time.perf_counter() value at which sampling stops.
+        samples (int): The number of samples per trump suit, instead of a deadline.
+        bids (list): The bid of each seat the playouts follow; by default every seat bids (and plays for) every trick.
+
+    Returns:
+        dict: The tricks taken in every sample, by trump suit.
+    """
+    tricks = {trump_suit: [] for trump_suit in trump_suits}
+    if bids is None:
+        bids = [CARDS_PER_PLAYER] * NUMBER_OF_PLAYERS
+    info = InformationSet(seat, known, FULL_DECK_MASK & ~known, [CARDS_PER_PLAYER] * NUMBER_OF_PLAYERS, [0] * NUMBER_OF_PLAYERS, 'None',
+                          bids, [0] * NUMBER_OF_PLAYERS, leader, [])
+    count = 0
+    while (count < samples) if samples is not None else (time.perf_counter() < deadline or count == 0):
+        for trump_suit in trump_suits:
+            info.trump_suit = trump_suit
+            deal = Deal(sample_hands(info, rng), info)
+            deal.play_out(rng)
+            tricks[trump_suit].append(deal.tricks_won[seat])
+        count += 1
+    return tricks
+
+def best_bid(tricks: list, forbidden_bid: int = None) -> tuple[int, float]:
+    """
+    Returns the bid with the best expected hand score over a distribution of tricks taken, and that score.
+    """
+    counts = [0] * (CARDS_PER_PLAYER + 1)
+    for taken in tricks:
+        counts[taken] += 1
+    best = None
+    for bid in range(CARDS_PER_PLAYER + 1):
+        if bid == forbidden_bid:
+            continue
+        expected = sum(count * SCORE_TABLE[bid][taken] for taken, count in enumerate(counts)) / len(tricks)
+        if best is None or expected > best[1]:
+            best = (bid, expected)
+    return best
+
+class ISMCTSDecisions:
+    """
+    Decision provider searching every decision with Monte Carlo methods within a time budget (see the module docstring).
+
+    The Joker choices are part of the card moves: when the search plays a Joker, the action and suit wanted it chose are
+    kept with the card and given back when PlayHand asks for them, which it does for a Joker played after the lead
+    before the card is on the table.
+
+    Attributes:
+        1) time_budget (float): Seconds each decision may take.
+        2) iterations (int): A fixed number of iterations per decision instead of the time budget (for reproducible
+           runs), or None.
+        3) workers (int): The number of root-parallel searches (this process and workers - 1 worker processes).
+        4) exploration (float): The UCB exploration constant.
+        5) rng (random.Random): The random number generator of the samples and playouts.
+        6) planned_move (tuple): The last card move chosen by the search, for the Joker choices that follow it.
+        7) planned_player (Player): The player the last card move was chosen for.
+        8) last_stats (dict): 'iterations', 'nodes', 'seconds' and 'nodes_per_second' of the last card search.
+        9) totals (dict): The same counts summed over every card search.
+        10) executor (ProcessPoolExecutor): The worker processes of the root-parallel search, started on first use.
+        11) trump_table (TrumpTable): Optional trump-selection table (see trump_table.py) the trump suit is looked up in
+            instead of being simulated.
+    """
+
+    def __init__(self, time_budget: float = DEFAULT_TIME_BUDGET, iterations: int = None, workers: int = 1, exploration: float = EXPLORATION, rng: random.Random = None,
+                 trump_table: object = None):
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.workers = workers
+        self.exploration = exploration
+        self.rng = rng if rng is not None else random.Random()
+        self.planned_move = None
+        self.planned_player = None
+        self.last_stats = None
+        self.totals = {'searches': 0, 'iterations': 0, 'nodes': 0, 'seconds': 0.0}
+        self.executor = None
+        self.trump_table = trump_table
+
+    def close(self):
+        """
+        Stops the worker processes, if any.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def choose_trump(self, player: object, game_hand: object) -> str:
+        """
+        Chooses the trump suit from the first three cards: the choice whose playouts give the best expected score with the best bid.
+        """
+        seat = game_hand.players.index(player)
+        known = 0
+        for card in player.cards[:3]:
+            known |= card.bit
+        if self.trump_table is not None:
+            return self.trump_table.best_trump(known)
+        tricks = estimate_tricks(seat, known, TRUMP_CHOICES, seat, self.rng, *self.sampling_limits(len(TRUMP_CHOICES)))
+        return max(TRUMP_CHOICES, key = lambda trump_suit: best_bid(tricks[trump_suit])[1])
+
+    def place_bid(self, player: object, game_hand: object) -> int:
+        """
+        Places the bid with the best expected score over playouts of the player's hand, never the dealer's forbidden bid.
+        """
+        seat = game_hand.players.index(player)
+        tricks = estimate_tricks(seat, player.hand, [game_hand.trump_suit], game_hand.lead_player_index, self.rng, *self.sampling_limits(1))
+        return best_bid(tricks[game_hand.trump_suit], game_hand.get_forbidden_bid(player))[0]
+
+    def sampling_limits(self, choices: int) -> tuple:
+        """
+        Returns the (deadline, samples per choice) of a flat Monte Carlo decision.
+        """
+        if self.iterations is not None:
+            return None, max(1, self.iterations // choices)
+        return time.perf_counter() + self.time_budget, None
+
+    def play_card(self, player: object, game_hand: object) -> object:
+        """
+        Searches the card to play (with its Joker choices) and returns it.
+        """
+        info = observe(player, game_hand)
+        visits = self.search(info)
+        self.planned_move = max(visits, key = visits.get)
+        self.planned_player = player
+        return CARDS[self.planned_move[0]]
+
+    def search(self, info: InformationSet) -> dict:
+        """
+        Runs the search of a card decision, root-parallel with several workers, and records its statistics.
+
+        Returns:
+            dict: The summed visits of every root move.
+        """
+        futures = []
+        if self.workers > 1:
+            if self.executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.executor = ProcessPoolExecutor(max_workers = self.workers - 1)
+            futures = [self.executor.submit(search_worker, info, self.rng.getrandbits(64), self.time_budget, self.iterations, self.exploration) for _ in range(self.workers - 1)]
+        start = time.perf_counter()
+        results = [search(info, self.rng, self.time_budget, self.iterations, self.exploration)]
+        results.extend(future.result() for future in futures)
+        elapsed = time.perf_counter() - start
+
+        visits = {}
+        for result in results:
+            for move, count in result['visits'].items():
+                visits[move] = visits.get(move, 0) + count
+        iterations = sum(result['iterations'] for result in results)
+        nodes = sum(result['nodes'] for result in results)
+        self.last_stats = {'iterations': iterations, 'nodes': nodes, 'seconds': elapsed, 'nodes_per_second': nodes / elapsed if elapsed else 0.0}
+        self.totals['searches'] += 1
+        self.totals['iterations'] += iterations
+        self.totals['nodes'] += nodes
+        self.totals['seconds'] += elapsed
+        return visits
+
+    def planned_action(self, game_hand: object, player: object, actions: tuple) -> str:
+        """
+        Returns the Joker action planned with the card just played, if the search chose one of 'actions'.
+
+        The card the search returned last is the player's Joker being played: PlayHand asks for its Joker choices right
+        after play_card, and for a Joker played after the lead before it puts the card in cards_played.
+        """
+        if self.planned_player is player and self.planned_move[1] in actions:
+            return self.planned_move[1]
+        return None
+
+    def choose_high_low(self, player: object, game_hand: object) -> str:
+        return self.planned_action(game_hand, player, ('High', 'Low')) or 'High'
+
+    def choose_suit_wanted(self, player: object, game_hand: object) -> str:
+        if self.planned_action(game_hand, player, ('High', 'Low')) is not None:
+            return self.planned_move[2]
+        return game_hand.trump_suit if game_hand.trump_suit != 'None' else SUIT_ORDER[0]
+
+    def choose_follow_joker_action(self, player: object, game_hand: object) -> str:
+        return self.planned_action(game_hand, player, ('Play', 'Give up')) or 'Play'
+
+class JokerPlanCheck(NullEvents):
+    """
+    Event sink checking that the Joker choices played by an ISMCTS seat are those its search planned with the card.
+
+    Attributes:
+        1) decider (ISMCTSDecisions): The decision provider of the seat.
+        2) checked (int): The number of Joker choices checked.
+        3) mismatches (list): (planned, played) of every Joker choice played otherwise than planned.
+    """
+
+    def __init__(self, decider: ISMCTSDecisions):
+        self.decider = decider
+        self.checked = 0
+        self.mismatches = []
+
+    def check(self, player: object, played: tuple):
+        if player is not self.decider.planned_player:
+            return
+        planned = self.decider.planned_move[1:1 + len(played)]
+        self.checked += 1
+        if planned != played:
+            self.mismatches.append((planned, played))
+
+    def card_played(self, player: object, card: object, joker_action: str):
+        if joker_action != 'NotApplicable':
+            self.check(player, (joker_action,))
+
+    def joker_led(self, player: object, lead_joker_action: str, suit_wanted: str):
+        self.check(player, (lead_joker_action, suit_wanted))
+
+def main():
+    """
+    Plays games with one ISMCTS seat against SimpleDecisions from the command line, and prints the scores and search statistics.
+    """
+    from player import Player
+    from game import Game
+    parser = argparse.ArgumentParser(description = 'Play games with an ISMCTS seat against SimpleDecisions bots.')
+    parser.add_argument('--games', type = int, default = 1, help = 'number of games to play')
+    parser.add_argument('--budget', type = float, default = DEFAULT_TIME_BUDGET, help = 'seconds per decision')
+    parser.add_argument('--iterations', type = int, default = None, help = 'fixed iterations per decision instead of the time budget')
+    parser.add_argument('--workers', type = int, default = 1, help = f'root-parallel searches per decision (this machine has {os.cpu_count()} cores)')
+    parser.add_argument('--seed', type = int, default = None, help = 'seed of the deals and of the search')
+    parser.add_argument('--trump-table', default = None, help = 'look the trump suit up in this trump-selection table (see trump_table.py)')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    trump_table = None
+    if args.trump_table is not None:
+        from trump_table import TrumpTable
+        trump_table = TrumpTable(args.trump_table)
+    decider = ISMCTSDecisions(args.budget, args.iterations, args.workers, rng = random.Random(rng.getrandbits(64)), trump_table = trump_table)
+    plan_check = JokerPlanCheck(decider)
+    try:
+        for game_number in range(args.games):
+            players = [Player('ISMCTS', decider)] + [Player(f'Simple {seat}', SimpleDecisions()) for seat in range(1, NUMBER_OF_PLAYERS)]
+            game = Game(players, plan_check, results_file = None, rng = random.Random(rng.getrandbits(64)))
+            game.play_set()
+            print(f'Game {game_number + 1}: ' + ', '.join(f'{name} {score}' for name, score in game.set_scores.items()))
+    finally:
+        decider.close()
+        if trump_table is not None:
+            trump_table.close()
+    totals = decider.totals
+    print(f"{totals['searches']} card searches: {totals['iterations'] / totals['searches']:,.0f} playouts and {totals['nodes'] / totals['searches']:,.0f} nodes per move, "
+          f"{totals['nodes'] / totals['seconds']:,.0f} nodes/s and {totals['iterations'] / totals['seconds']:,.0f} playouts/s.")
+    print(f'{plan_check.checked} Joker choices checked, {len(plan_check.mismatches)} played otherwise than searched'
+          + (f': {plan_check.mismatches}.' if plan_check.mismatches else '.'))
+    if plan_check.mismatches:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
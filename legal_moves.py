@@ -0,0 +1,62 @@
+"""
+Legal-move generator for the rules engine.
+
+Given a hand (bitmask, see card_masks.py) and the context of the trick (lead card, trump suit, and after a Joker lead the
+suit wanted and 'High'/'Low'), returns the mask of every card the player may play, in constant time from precomputed masks:
+
+- The lead player may play any card.
+- A following player must follow the lead suit, or after a Joker lead the suit wanted (only the highest card of it in the
+  'High' case). Otherwise they must play a trump suit card, provided there is a trump suit and they hold one.
+- A player holding neither may play any card, and a Joker card can always be played.
+"""
+from card_masks import NUMBER_OF_CARDS, SUIT_ORDER, SUIT_MASKS, JOKER_MASK, CARD_SUITS
+
+# Actions available when leading a Joker, and when playing a Joker after the lead
+LEAD_JOKER_ACTIONS = ('High', 'Low')
+FOLLOW_JOKER_ACTIONS = ('Play', 'Give up')
+# Suits a Joker lead may ask for
+SUITS_WANTED = tuple(SUIT_ORDER)
+
+# For each lead card id: the mask of the suit that must be followed (empty for Jokers, whose suit is chosen when leading)
+FOLLOW_MASKS = [SUIT_MASKS.get(CARD_SUITS[card_id], 0) for card_id in range(NUMBER_OF_CARDS)]
+
+def legal_cards(hand: int, lead_card_id: int = None, trump_suit: str = 'None', suit_wanted: str = None, lead_joker_action: str = None) -> int:
+    """
+    Returns the mask of the cards a player may play.
+
+    Args:
+        hand (int): The bitmask of the player's cards.
+        lead_card_id (int): The id of the card leading the trick, or None if the player leads.
+        trump_suit (str): The trump suit of the hand, or 'None'.
+        suit_wanted (str): The suit asked for by a Joker lead.
+        lead_joker_action (str): 'High' or 'Low' after a Joker lead.
+
+    Returns:
+        int: The bitmask of the legal cards (a subset of 'hand').
+    """
+    # The lead player is free to play any card
+    if lead_card_id is None:
+        return hand
+
+    if (1 << lead_card_id) & JOKER_MASK:
+        required = hand & SUIT_MASKS[suit_wanted]
+        # After a 'High' Joker lead, only the highest card of the wanted suit may be played
+        if required and lead_joker_action == 'High':
+            required = 1 << (required.bit_length() - 1)
+    else:
+        required = hand & FOLLOW_MASKS[lead_card_id]
+
+    # Without the required suit, the player must play a trump suit card if they hold one
+    if not required:
+        required = hand & SUIT_MASKS[trump_suit]
+
+    # A player holding neither the required suit nor a trump may play anything
+    if not required:
+        return hand
+    return required | (hand & JOKER_MASK)
+
+def legal_joker_actions(is_lead: bool) -> tuple:
+    """
+    Returns the actions available to a player playing a Joker card: 'High'/'Low' when leading, 'Play'/'Give up' when following.
+    """
+    return LEAD_JOKER_ACTIONS if is_lead else FOLLOW_JOKER_ACTIONS
@@ -1,4 +1,11 @@
+import argparse
 from game import Game
+from decisions import ConsoleDecisions
+from events import ConsoleEvents, TABLE_OUTPUTS
+from results_log import ResultsLog
+
+# Every hand and set of the games played at the console is appended to this log
+RESULTS_LOG_FILE = 'game_results.jsonl'
 
 def main():
     """
@@ -6,17 +13,48 @@ def main():
 
     This function handles the overall flow of the game: welcomes players, retrieves player names, sets the order of players, plays the sets and hands until the game is complete, also checks for bonuses and determines the overall winner.
     """
-    game = Game()
+    parser = argparse.ArgumentParser(description = 'Play the card game at the console.')
+    parser.add_argument('--table', choices = TABLE_OUTPUTS, default = 'incremental', help = 'how the game table is shown after every hand: only the new rows (default), the whole table, or not at all')
+    parser.add_argument('--trump-hints', nargs = '?', const = 'trump_table.bin', default = None, metavar = 'TABLE', help = 'suggest a trump suit from the trump-selection table (see trump_table.py)')
+    parser.add_argument('--bid-hints', action = 'store_true', help = 'suggest a bid from simulated playouts of the hand (see bid_advisor.py)')
+    parser.add_argument('--record', default = None, metavar = 'ARCHIVE', help = 'append the record of the game to this archive, to replay it later (see replay.py)')
+    args = parser.parse_args()
+
+    trump_table = None
+    if args.trump_hints is not None:
+        from trump_table import TrumpTable
+        trump_table = TrumpTable(args.trump_hints)
+    bid_advisor = None
+    if args.bid_hints:
+        from bid_advisor import BidAdvisor
+        bid_advisor = BidAdvisor()
+
+    results_log = ResultsLog(RESULTS_LOG_FILE)
+    game = Game(events = ConsoleEvents(args.table), results_file = None, results_log = results_log)
+    recorder = None
+    if args.record is not None:
+        from replay import GameRecorder
+        # The recorder sees the players as soon as they are entered, and passes every event on to the console
+        recorder = game.events = GameRecorder(game.players, game.events)
     try:
         game.welcome()    
         game.get_player_names()
+        if trump_table is not None or bid_advisor is not None:
+            for player in game.players:
+                player.decider = ConsoleDecisions(trump_table, bid_advisor)
         game.print_the_order_of_players()
         game.play_set()
         game.determine_final_winner()
+        if recorder is not None:
+            from replay import append_record
+            append_record(args.record, recorder.record)
     except KeyboardInterrupt:
         print('\nGame interrupted by the user.')
         exit()
     finally:
+        results_log.close()
+        if trump_table is not None:
+            trump_table.close()
         print("Thank you for playing!")
 
 if __name__ == "__main__":
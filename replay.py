@@ -0,0 +1,500 @@
+"""
+Deterministic replay of recorded games, with seeking by snapshot.
+
+A game is recorded by its event sink (GameRecorder): for every hand, the cards dealt to each seat in dealing order, the
+trump suit, the bids, and every trick (its lead seat, the card and Joker action of each play, the 'High'/'Low' choice
+and suit wanted of a Joker lead, and the winner), with the score of every hand and the totals after every set. Records
+are kept as JSON Lines archives, one game per line.
+
+A record is replayed through the game engine itself: the deck is ordered so that PlayHand.deal_cards deals the recorded
+hands (RecordedDeals stands in for the random number generator), and every seat answers from its recorded moves with
+ScriptedDecisions. The replay checks every trick winner, hand score and set total against the record, and rejects a
+move the current rules do not accept, so archives can be re-verified after a rule change (python replay.py verify).
+
+Replay keeps a snapshot (see snapshots.py) of every hand once its cards are dealt and its bids placed. Seeking to
+"set 3, hand 2, trick 7" restores the snapshot of that hand and applies the six tricks before it from the record,
+without asking any player or resolving any trick, so every position costs about the same, whatever its place in the
+game. The game returned plays on from there with Game.play_set, replaying the rest of the record by default.
+
+    python replay.py record --games 100 --seed 1 --output games.jsonl
+    python replay.py verify games.jsonl
+    python replay.py seek games.jsonl --game 0 --set 3 --hand 2 --trick 7
+"""
+import argparse
+import json
+import sys
+import time
+from constants import NUMBER_OF_PLAYERS, NUMBER_OF_SETS, HANDS_PER_SET, CARDS_PER_PLAYER
+from card_masks import JOKER_MASK
+from cards import CARDS
+from decisions import ScriptedDecisions
+from events import NullEvents
+from game import Game
+from player import Player
+from snapshots import take_snapshot, restore_snapshot
+from trick_resolution import PLAY_ACTIONS
+
+HANDS_PER_GAME = NUMBER_OF_SETS * HANDS_PER_SET
+DECK_SIZE = CARDS_PER_PLAYER * NUMBER_OF_PLAYERS
+
+class HandRecord:
+    """
+    The record of a hand.
+
+    Attributes:
+        1) deal (tuple): The card ids dealt to each seat, in dealing order.
+        2) trump_suit (str): The trump suit, or 'None'.
+        3) bids (tuple): The bid of each seat.
+        4) tricks (list): Every trick as (lead seat, plays, lead Joker action, suit wanted, winner seat), where the plays
+           are the (card id, Joker action) of the four cards in playing order, and the lead Joker action and suit wanted
+           are None unless a Joker is led.
+        5) scores (tuple): The score of each seat in the hand.
+    """
+
+    def __init__(self, deal: tuple, trump_suit: str, bids: tuple = (), tricks: list = None, scores: tuple = ()):
+        self.deal = deal
+        self.trump_suit = trump_suit
+        self.bids = bids
+        self.tricks = tricks if tricks is not None else []
+        self.scores = scores
+
+class GameRecord:
+    """
+    The record of a game: everything needed to replay it exactly.
+
+    Attributes:
+        1) players (list): The player names, in seating order.
+        2) hands (list): The HandRecord of every hand, in playing order.
+        3) set_totals (list): The cumulative score of each seat after every set, bonuses included.
+    """
+
+    def __init__(self, players: list, hands: list = None, set_totals: list = None):
+        self.players = list(players)
+        self.hands = hands if hands is not None else []
+        self.set_totals = set_totals if set_totals is not None else []
+
+    def to_json(self) -> dict:
+        """
+        Returns the record as a JSON object. A play is stored as card id + 36 * its index in PLAY_ACTIONS, and a trick as
+        [winner, plays...], followed by the lead Joker action and suit wanted after a Joker lead.
+        """
+        hands = []
+        for hand in self.hands:
+            tricks = []
+            for _, plays, lead_joker_action, suit_wanted, winner in hand.tricks:
+                trick = [winner] + [card_id + DECK_SIZE * PLAY_ACTIONS.index(action) for card_id, action in plays]
+                if lead_joker_action is not None:
+                    trick += [lead_joker_action, suit_wanted]
+                tricks.append(trick)
+            hands.append({'deal': [list(cards) for cards in hand.deal], 'trump': hand.trump_suit, 'bids': list(hand.bids), 'tricks': tricks, 'scores': list(hand.scores)})
+        return {'players': self.players, 'hands': hands, 'totals': [list(totals) for totals in self.set_totals]}
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'GameRecord':
+        """
+        Rebuilds a record from its JSON object (see to_json).
+
+        Raises:
+            ValueError: If the object is not a complete game record.
+        """
+        try:
+            hands = []
+            for index, hand in enumerate(data['hands']):
+                # The seat after the dealer leads the first trick, then the winner of each trick leads the next one
+                leader = index % NUMBER_OF_PLAYERS
+                tricks = []
+                for trick in hand['tricks']:
+                    winner, plays, joker_lead = trick[0], trick[1:NUMBER_OF_PLAYERS + 1], trick[NUMBER_OF_PLAYERS + 1:]
+                    plays = tuple((play % DECK_SIZE, PLAY_ACTIONS[play // DECK_SIZE]) for play in plays)
+                    tricks.append((leader, plays, *(joker_lead or (None, None)), winner))
+                    leader = winner
+                hands.append(HandRecord(tuple(tuple(cards) for cards in hand['deal']), hand['trump'], tuple(hand['bids']), tricks, tuple(hand['scores'])))
+            record = cls(data['players'], hands, [tuple(totals) for totals in data['totals']])
+        except (KeyError, IndexError, TypeError) as error:
+            raise ValueError(f'Not a game record: {error!r}.') from None
+        if len(record.players) != NUMBER_OF_PLAYERS or len(hands) != HANDS_PER_GAME or any(len(hand.tricks) != CARDS_PER_PLAYER for hand in hands):
+            raise ValueError('A game record holds every trick of the 16 hands of a game between 4 players.')
+        return record
+
+class GameRecorder:
+    """
+    Event sink that records a game as it is played (see GameRecord), and passes every event on to another sink.
+
+    Attributes:
+        1) players (list): The players of the game, in seating order.
+        2) events (object): The event sink every event is passed on to.
+        3) record (GameRecord): The record of the hands played so far.
+        4) hand (HandRecord): The record of the hand being played.
+        5) plays (list): The plays of the trick being played, as (card id, Joker action).
+        6) leader (int): The seat leading the trick being played.
+        7) joker_lead (tuple): The lead Joker action and suit wanted of the trick being played, or (None, None).
+    """
+
+    def __init__(self, players: list, events: object = None):
+        self.players = players
+        self.events = events if events is not None else NullEvents()
+        self.record = GameRecord([player.name for player in players])
+        self.hand = None
+        self.plays = []
+        self.leader = 0
+        self.joker_lead = (None, None)
+
+    def __getattr__(self, name: str) -> object:
+        # The events the recorder does not need go straight to the wrapped sink
+        return getattr(self.events, name)
+
+    def trump_chosen(self, player: object, trump_suit: str):
+        # The console game enters its players after creating its event sink: they are all seated by the first deal
+        if not self.record.hands:
+            self.record.players = [seat.name for seat in self.players]
+        # The trump suit is chosen once every seat has its cards, before any is played
+        self.hand = HandRecord(tuple(tuple(card.card_id for card in seat.cards) for seat in self.players), trump_suit)
+        self.events.trump_chosen(player, trump_suit)
+
+    def bids_placed(self, players: list):
+        self.hand.bids = tuple(player.bid for player in players)
+        self.events.bids_placed(players)
+
+    def card_played(self, player: object, card: object, joker_action: str):
+        if not self.plays:
+            self.leader = self.players.index(player)
+        self.plays.append((card.card_id, joker_action))
+        self.events.card_played(player, card, joker_action)
+
+    def joker_led(self, player: object, lead_joker_action: str, suit_wanted: str):
+        self.joker_lead = (lead_joker_action, suit_wanted)
+        self.events.joker_led(player, lead_joker_action, suit_wanted)
+
+    def trick_won(self, winner: object):
+        self.hand.tricks.append((self.leader, tuple(self.plays), *self.joker_lead, self.players.index(winner)))
+        self.plays = []
+        self.joker_lead = (None, None)
+        self.events.trick_won(winner)
+
+    def hand_over(self, game_table: object):
+        self.hand.scores = tuple(player.score for player in self.players)
+        self.record.hands.append(self.hand)
+        self.hand = None
+        self.events.hand_over(game_table)
+
+    def set_over(self, game_table: object):
+        self.record.set_totals.append(tuple(game_table.rows[-1]))
+        self.events.set_over(game_table)
+
+class RecordedDeals:
+    """
+    Stands in for the random number generator of a replayed game: 'shuffling' the deck orders it so that
+    PlayHand.deal_cards deals the recorded hands.
+
+    Attributes:
+        deals (iterator): The deals of the hands still to be dealt.
+    """
+
+    def __init__(self, record: GameRecord, first_hand: int = 0):
+        self.deals = iter([hand.deal for hand in record.hands[first_hand:]])
+
+    def shuffle(self, cards: list):
+        try:
+            deal = next(self.deals)
+        except StopIteration:
+            raise ValueError('The record has no more deals.') from None
+        # The seat at index i receives the cards at positions 35 - i, 31 - i, ... of the deck (see PlayHand.deal_cards)
+        for seat, card_ids in enumerate(deal):
+            for round_number, card_id in enumerate(card_ids):
+                cards[len(cards) - 1 - seat - round_number * NUMBER_OF_PLAYERS] = CARDS[card_id]
+
+def seat_moves(record: GameRecord, seat: int, hand_index: int = 0, tricks_played: int = None):
+    """
+    Yields the recorded answers of a seat, in the order its decision provider is asked for them, from a position.
+
+    Args:
+        record (GameRecord): The record of the game.
+        seat (int): The seat.
+        hand_index (int): The hand (0 to 15) of the position.
+        tricks_played (int): The tricks of that hand already played, or None if its cards are not dealt yet.
+    """
+    for index in range(hand_index, len(record.hands)):
+        hand = record.hands[index]
+        if index != hand_index or tricks_played is None:
+            # The lead player of the hand chooses the trump suit, then every seat bids
+            if seat == index % NUMBER_OF_PLAYERS:
+                yield hand.trump_suit
+            yield hand.bids[seat]
+        first_trick = tricks_played if index == hand_index and tricks_played is not None else 0
+        for leader, plays, lead_joker_action, suit_wanted, _ in hand.tricks[first_trick:]:
+            position = (seat - leader) % NUMBER_OF_PLAYERS
+            card_id, joker_action = plays[position]
+            yield CARDS[card_id]
+            if CARDS[card_id].bit & JOKER_MASK:
+                if position == 0:
+                    yield lead_joker_action
+                    yield suit_wanted
+                else:
+                    yield joker_action
+
+class ReplayChecker:
+    """
+    Event sink of a replayed game: checks the game against its record, optionally takes a snapshot of every hand once
+    its bids are placed, and passes every event on to another sink.
+
+    Attributes:
+        1) record (GameRecord): The record of the game.
+        2) events (object): The event sink every event is passed on to.
+        3) snapshots (list): The list the snapshots are appended to, or None to take none.
+        4) game (Game): The replayed game (needed for the snapshots).
+        5) hand_index (int): The hand being replayed (0 to 15).
+        6) tricks_played (int): The tricks of that hand already replayed.
+    """
+
+    def __init__(self, record: GameRecord, events: object = None, snapshots: list = None, hand_index: int = 0, tricks_played: int = 0):
+        self.record = record
+        self.events = events if events is not None else NullEvents()
+        self.snapshots = snapshots
+        self.game = None
+        self.hand_index = hand_index
+        self.tricks_played = tricks_played
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self.events, name)
+
+    def position(self) -> str:
+        set_index, hand = divmod(self.hand_index, HANDS_PER_SET)
+        return f'set {set_index + 1}, hand {hand + 1}, trick {self.tricks_played + 1}'
+
+    def dealer_bid_rejected(self, dealer: object, forbidden_bid: int):
+        raise ValueError(f'The recorded bid of {dealer.name} is rejected at {self.position()}.')
+
+    def card_rejected(self, player: object, message: str):
+        raise ValueError(f'The recorded card of {player.name} is rejected at {self.position()}: {message}')
+
+    def trick_started(self, trick_number: int):
+        if trick_number == 1 and self.snapshots is not None:
+            self.snapshots.append(take_snapshot(self.game))
+        self.events.trick_started(trick_number)
+
+    def trick_won(self, winner: object):
+        recorded = self.record.hands[self.hand_index].tricks[self.tricks_played][-1]
+        if self.record.players[recorded] != winner.name:
+            raise ValueError(f'{winner.name} wins the trick at {self.position()}, recorded as won by {self.record.players[recorded]}.')
+        self.tricks_played += 1
+        self.events.trick_won(winner)
+
+    def hand_over(self, game_table: object):
+        scores = tuple(player.score for player in self.game.players)
+        if scores != self.record.hands[self.hand_index].scores:
+            raise ValueError(f'The hand scores {scores} of set {self.hand_index // HANDS_PER_SET + 1}, hand {self.hand_index % HANDS_PER_SET + 1} '
+                             f'are recorded as {self.record.hands[self.hand_index].scores}.')
+        self.hand_index += 1
+        self.tricks_played = 0
+        self.events.hand_over(game_table)
+
+    def set_over(self, game_table: object):
+        set_index = self.hand_index // HANDS_PER_SET - 1
+        totals = tuple(game_table.rows[-1])
+        if totals != self.record.set_totals[set_index]:
+            raise ValueError(f'The totals {totals} after set {set_index + 1} are recorded as {self.record.set_totals[set_index]}.')
+        self.events.set_over(game_table)
+
+def replay_players(record: GameRecord, hand_index: int = 0, tricks_played: int = None) -> list:
+    """
+    Returns the players of a record, each answering with its recorded moves from a position (see seat_moves).
+    """
+    return [Player(name, ScriptedDecisions(seat_moves(record, seat, hand_index, tricks_played))) for seat, name in enumerate(record.players)]
+
+def replay_game(record: GameRecord, events: object = None, snapshots: list = None) -> Game:
+    """
+    Replays a recorded game through the game engine, and checks it against the record.
+
+    Args:
+        record (GameRecord): The record of the game.
+        events (object): The event sink the replayed game reports to. Nothing is reported when omitted.
+        snapshots (list): The list a snapshot of every hand is appended to, once its bids are placed, if given.
+
+    Returns:
+        Game: The replayed game.
+
+    Raises:
+        ValueError: If a recorded move is rejected, or a trick winner, hand score or set total differs from the record.
+    """
+    checker = ReplayChecker(record, events, snapshots)
+    game = checker.game = Game(replay_players(record), checker, results_file = None, rng = RecordedDeals(record))
+    game.play_set()
+    return game
+
+def apply_tricks(game: Game, hand: HandRecord, tricks: int):
+    """
+    Plays the first tricks of a hand in progress from its record, without asking any player or resolving any trick.
+    """
+    players = game.players
+    game_hand = game.game_set.game_hand
+    for leader, plays, lead_joker_action, suit_wanted, winner in hand.tricks[game_hand.tricks_played:tricks]:
+        cards_played = {}
+        for offset, (card_id, joker_action) in enumerate(plays):
+            player = players[(leader + offset) % NUMBER_OF_PLAYERS]
+            card = CARDS[card_id]
+            player.remove_card(card)
+            cards_played[player] = (card, joker_action)
+        game_hand.lead_card = CARDS[plays[0][0]]
+        if lead_joker_action is not None:
+            game_hand.lead_joker_action, game_hand.suit_wanted = lead_joker_action, suit_wanted
+        players[winner].tricks_won += 1
+        game_hand.completed_tricks.append((cards_played, game_hand.suit_wanted, game_hand.lead_joker_action))
+        game_hand.lead_player_index = winner
+        game_hand.tricks_played += 1
+
+class Replay:
+    """
+    Replay engine of a recorded game: replays it once, keeping a snapshot of every hand, and then seeks to any trick.
+
+    Attributes:
+        1) record (GameRecord): The record of the game.
+        2) snapshots (list): The snapshot of every hand once its bids are placed, in playing order.
+    """
+
+    def __init__(self, record: GameRecord):
+        """
+        Replays the record, and keeps its snapshots.
+
+        Raises:
+            ValueError: If the replay does not match the record (see replay_game).
+        """
+        self.record = record
+        self.snapshots = []
+        replay_game(record, snapshots = self.snapshots)
+
+    def seek(self, set_number: int, hand_number: int, trick_number: int = 1, players: list = None, events: object = None) -> Game:
+        """
+        Returns the game at a position: in a hand, before one of its tricks. Game.play_set plays it on from there.
+
+        Args:
+            set_number (int): The set, from 1.
+            hand_number (int): The hand in the set, from 1.
+            trick_number (int): The trick about to be played, from 1.
+            players (list): Players with fresh state, in seating order, to play the game on. By default, the players
+                replay the rest of the record, and the game is checked against it.
+            events (object): The event sink of the game.
+
+        Raises:
+            ValueError: If the position is not in the game.
+        """
+        if not (1 <= set_number <= NUMBER_OF_SETS and 1 <= hand_number <= HANDS_PER_SET and 1 <= trick_number <= CARDS_PER_PLAYER):
+            raise ValueError(f'A position is a set from 1 to {NUMBER_OF_SETS}, a hand from 1 to {HANDS_PER_SET} and a trick from 1 to {CARDS_PER_PLAYER}.')
+        hand_index = (set_number - 1) * HANDS_PER_SET + hand_number - 1
+        if players is None:
+            players = replay_players(self.record, hand_index, trick_number - 1)
+            events = ReplayChecker(self.record, events, hand_index = hand_index, tricks_played = trick_number - 1)
+        game = restore_snapshot(self.snapshots[hand_index], players, events, RecordedDeals(self.record, hand_index + 1))
+        if isinstance(events, ReplayChecker):
+            events.game = game
+        apply_tricks(game, self.record.hands[hand_index], trick_number - 1)
+        return game
+
+def append_record(path: str, record: GameRecord):
+    """
+    Appends a game record to a JSON Lines archive.
+    """
+    with open(path, 'a', encoding = 'utf-8') as file:
+        file.write(json.dumps(record.to_json(), ensure_ascii = False, separators = (',', ':')) + '\n')
+
+def read_archive(path: str):
+    """
+    Yields the game records of a JSON Lines archive, in order.
+    """
+    with open(path, encoding = 'utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield GameRecord.from_json(json.loads(line))
+
+def record_games(path: str, games: int, policies: list, master_seed: int):
+    """
+    Plays headless games between bot policies (see tournament.py) and appends their records to an archive.
+    """
+    # Imported here: only recording needs the bot policies
+    import random
+    from tournament import POLICIES, game_seed
+    for game_index in range(games):
+        rng = random.Random(game_seed(master_seed, game_index))
+        players = [Player(f'Seat {seat + 1}', POLICIES[policy](rng)) for seat, policy in enumerate(policies)]
+        recorder = GameRecorder(players)
+        Game(players, recorder, results_file = None, rng = rng).play_set()
+        append_record(path, recorder.record)
+
+def describe_position(game: Game) -> list:
+    """
+    Returns the lines describing a game between two tricks: the trick played so far and every seat's state.
+    """
+    game_set = game.game_set
+    game_hand = game_set.game_hand
+    lines = [f'Set {game_set.set_number}, hand {game_set.hand_number}, trick {game_hand.tricks_played + 1}: trump {game_hand.trump_suit}, '
+             f'{game.players[game_hand.lead_player_index].name} to lead.']
+    for number, (cards_played, suit_wanted, lead_joker_action) in enumerate(game_hand.completed_tricks, 1):
+        plays = []
+        for player, (card, action) in cards_played.items():
+            if not plays and card.bit & JOKER_MASK:
+                action = f'{lead_joker_action}, {suit_wanted} wanted'
+            plays.append(f'{player.name} {card}' + (f' ({action})' if action != 'NotApplicable' else ''))
+        lines.append(f'  Trick {number}: {", ".join(plays)}')
+    for player in game.players:
+        lines.append(f'  {player.name}: bid {player.bid}, won {player.tricks_won}, set score {game_set.set_scores.get(player.name, 0)}, '
+                     f'cards {" ".join(str(card) for card in player.cards)}')
+    return lines
+
+def main():
+    """
+    Records games, re-verifies an archive, or seeks to a position of an archived game, from the command line.
+    """
+    parser = argparse.ArgumentParser(description = 'Record, replay and seek in games.')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+    record = subparsers.add_parser('record', help = 'play headless games between bot policies and archive their records')
+    record.add_argument('--games', type = int, default = 100, help = 'number of games to play')
+    record.add_argument('--seed', type = int, default = 0, help = 'master seed of the games (as in tournament.py)')
+    record.add_argument('--seats', nargs = NUMBER_OF_PLAYERS, default = ['simple', 'random', 'simple', 'random'], help = 'policy of each seat')
+    record.add_argument('--output', required = True, help = 'the archive to append the records to (JSON Lines)')
+    verify = subparsers.add_parser('verify', help = 'replay every game of an archive silently and check it against its record')
+    verify.add_argument('archive', help = 'the archive (JSON Lines)')
+    seek = subparsers.add_parser('seek', help = 'show a position of an archived game')
+    seek.add_argument('archive', help = 'the archive (JSON Lines)')
+    seek.add_argument('--game', type = int, default = 0, help = 'the game, from 0')
+    seek.add_argument('--set', type = int, default = 1, help = 'the set, from 1')
+    seek.add_argument('--hand', type = int, default = 1, help = 'the hand in the set, from 1')
+    seek.add_argument('--trick', type = int, default = 1, help = 'the trick about to be played, from 1')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'record':
+        record_games(args.output, args.games, args.seats, args.seed)
+        print(f'{args.games} games recorded to {args.output} in {time.perf_counter() - start:.2f} s.')
+        return
+
+    if args.command == 'verify':
+        games, mismatches = 0, []
+        for index, game_record in enumerate(read_archive(args.archive)):
+            games += 1
+            try:
+                replay_game(game_record)
+            except ValueError as error:
+                mismatches.append(f'Game {index}: {error}')
+        elapsed = time.perf_counter() - start
+        print(f'{games} games replayed in {elapsed:.2f} s ({games / elapsed:.0f} games/s): {games - len(mismatches)} match their record, {len(mismatches)} do not.')
+        for mismatch in mismatches:
+            print(mismatch)
+        sys.exit(1 if mismatches else 0)
+
+    for index, game_record in enumerate(read_archive(args.archive)):
+        if index == args.game:
+            break
+    else:
+        sys.exit(f'The archive has no game {args.game}.')
+    try:
+        replay = Replay(game_record)
+        replayed = time.perf_counter() - start
+        start = time.perf_counter()
+        game = replay.seek(args.set, args.hand, args.trick)
+        sought = time.perf_counter() - start
+    except ValueError as error:
+        sys.exit(str(error))
+    print('\n'.join(describe_position(game)))
+    print(f'Replayed with snapshots in {replayed * 1000:.1f} ms, position restored in {sought * 1e6:.0f} µs.')
+
+if __name__ == '__main__':
+    main()
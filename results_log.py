@@ -0,0 +1,172 @@
+"""
+Append-only results log in JSON Lines: one typed record per line, appended as the game goes.
+
+Records (every record has "record" and "game_id"):
+- {"record": "game", "players": [...]}: a game has started, with the players in seating order.
+- {"record": "hand", "set": 1, "hand": 1, "players": [{"player", "bid", "tricks_won", "score"}, ...]}: a hand is over;
+  "score" is the score of the hand.
+- {"record": "set", "set": 1, "players": [{"player", "bonus", "total"}, ...]}: a set is over; "bonus" is the set
+  bonus (0 if none) and "total" the cumulative score after the set.
+- {"record": "end", "scores": {...}}: the game is over, with the final scores. A game without it did not finish.
+
+Each record is written with a single append as soon as it is known, so a crash only loses the game in progress from
+that point, and records of several processes (simulator workers, servers) can go to one log without interleaving
+inside a line. Writes are fsync'd in batches. read_records streams a log of any size line by line.
+"""
+import json
+import os
+import threading
+import uuid
+
+class ResultsLog:
+    """
+    Writer of an append-only results log.
+
+    Attributes:
+        1) path (str): The path of the log file.
+        2) sync_every (int): The number of records written between two fsyncs.
+        3) descriptor (int): The file descriptor of the log, opened for appending.
+        4) unsynced (int): The number of records written since the last fsync.
+        5) lock (threading.Lock): Serializes writes from several threads (e.g. the tables of a server).
+    """
+
+    def __init__(self, path: str, sync_every: int = 256):
+        """
+        Opens (or creates) a results log for appending.
+
+        Args:
+            path (str): The path of the log file.
+            sync_every (int): The number of records written between two fsyncs.
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.descriptor = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.unsynced = 0
+        self.lock = threading.Lock()
+
+    def append(self, record: dict):
+        """
+        Appends a record to the log, and fsyncs once 'sync_every' records have been written.
+        """
+        line = (json.dumps(record, ensure_ascii = False, separators = (',', ':')) + '\n').encode()
+        with self.lock:
+            os.write(self.descriptor, line)
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every:
+                os.fsync(self.descriptor)
+                self.unsynced = 0
+
+    def sync(self):
+        """
+        Forces the records written so far to disk.
+        """
+        with self.lock:
+            if self.unsynced:
+                os.fsync(self.descriptor)
+                self.unsynced = 0
+
+    def close(self):
+        """
+        Syncs and closes the log.
+        """
+        if self.descriptor is not None:
+            self.sync()
+            os.close(self.descriptor)
+            self.descriptor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start_game(self, players: list) -> str:
+        """
+        Logs the start of a game and returns its id, unique across processes.
+        """
+        game_id = uuid.uuid4().hex
+        self.append({'record': 'game', 'game_id': game_id, 'players': [player.name for player in players]})
+        return game_id
+
+    def log_hand(self, game_id: str, set_number: int, hand_number: int, players: list):
+        """
+        Logs the bids, tricks won and scores of a finished hand.
+        """
+        self.append({
+            'record': 'hand', 'game_id': game_id, 'set': set_number, 'hand': hand_number,
+            'players': [{'player': player.name, 'bid': player.bid, 'tricks_won': player.tricks_won, 'score': player.score} for player in players],
+        })
+
+    def log_set(self, game_id: str, set_number: int, players: list, bonuses: dict, totals: dict):
+        """
+        Logs the bonuses and cumulative scores after a set.
+
+        Args:
+            game_id (str): The id of the game.
+            set_number (int): The number of the set (from 1).
+            players (list): The Player objects in seating order.
+            bonuses (dict): The set bonus of each player who earned one, by name.
+            totals (dict): The cumulative score of each player, by name.
+        """
+        self.append({
+            'record': 'set', 'game_id': game_id, 'set': set_number,
+            'players': [{'player': player.name, 'bonus': bonuses.get(player.name, 0), 'total': totals[player.name]} for player in players],
+        })
+
+    def end_game(self, game_id: str, scores: dict):
+        """
+        Logs the final scores of a game.
+        """
+        self.append({'record': 'end', 'game_id': game_id, 'scores': scores})
+
+def read_records(path: str, record_type: str = None):
+    """
+    Streams the records of a results log, without loading the file into memory.
+
+    A line cut short by a crash (without its newline, or run into the next record) is skipped.
+
+    Args:
+        path (str): The path of the log file.
+        record_type (str): Only yield records of this type ('game', 'hand', 'set' or 'end') when given.
+
+    Yields:
+        dict: The records, in the order they were written.
+    """
+    # Cheap pre-filter on the raw line before parsing it
+    marker = f'"record":"{record_type}"'.encode() if record_type is not None else None
+    with open(path, 'rb') as file:
+        for line in file:
+            if not line.endswith(b'\n') or line == b'\n':
+                continue
+            if marker is not None and marker not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record_type is None or record['record'] == record_type:
+                yield record
+
+def read_games(path: str):
+    """
+    Streams the finished games of a results log, grouping their records; only the games in progress are kept in memory.
+
+    Yields:
+        dict: {'game_id', 'players', 'hands', 'sets', 'scores'} of every game that has an 'end' record, in the order the games finished.
+    """
+    games = {}
+    for record in read_records(path):
+        kind, game_id = record['record'], record['game_id']
+        if kind == 'game':
+            games[game_id] = {'game_id': game_id, 'players': record['players'], 'hands': [], 'sets': [], 'scores': None}
+        elif game_id not in games:
+            # The start of the game is missing (e.g. the log was rotated)
+            continue
+        elif kind == 'hand':
+            games[game_id]['hands'].append(record)
+        elif kind == 'set':
+            games[game_id]['sets'].append(record)
+        elif kind == 'end':
+            game = games.pop(game_id)
+            game['scores'] = record['scores']
+            yield game
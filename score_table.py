@@ -0,0 +1,98 @@
+"""
+The game table (bids and scores of every hand, and the cumulative scores after every set) and its rendering.
+
+ScoreTable only stores the rows, so headless games keep the table (for the results file and server clients) without
+rendering it. Two renderers draw it in the PrettyTable layout the console has always shown:
+
+- IncrementalTableRenderer: draws the header once and then only the rows added since the last call; the whole table is
+  redrawn only when a new row is wider than a column. Over a game, the output grows with the number of rows instead of
+  its square.
+- render_full_table: the whole table with PrettyTable, every time. prettytable is only imported when this is used.
+"""
+
+# Spaces on each side of a cell, as in the PrettyTable the game table has always been printed with
+PADDING_WIDTH = 5
+
+class ScoreTable:
+    """
+    Rows of the game table, one column per player.
+
+    Attributes:
+        1) field_names (list): The names of the players, in seating order.
+        2) rows (list): The cells of every row, in the order they were added.
+        3) dividers (list): Whether a horizontal rule follows each row (after the last hand of a set, and after the set scores).
+    """
+
+    def __init__(self, field_names: list):
+        self.field_names = list(field_names)
+        self.rows = []
+        self.dividers = []
+
+    def add_row(self, row: list, divider: bool = False):
+        self.rows.append(list(row))
+        self.dividers.append(divider)
+
+class IncrementalTableRenderer:
+    """
+    Renders a ScoreTable a few rows at a time, in the layout of PrettyTable with centered cells.
+
+    Attributes:
+        1) padding_width (int): Spaces on each side of a cell.
+        2) table (ScoreTable): The table being rendered (a new table starts over with its header).
+        3) widths (list): The width of each column in the lines already rendered.
+        4) rendered_rows (int): The number of rows of the table already rendered.
+    """
+
+    def __init__(self, padding_width: int = PADDING_WIDTH):
+        self.padding_width = padding_width
+        self.table = None
+        self.widths = None
+        self.rendered_rows = 0
+
+    def render(self, table: ScoreTable) -> str:
+        """
+        Returns the lines to print for the rows added to the table since the last call, or the whole table when it is new
+        or a column has to be widened. The table is left open (no closing rule) unless its last row has a divider.
+        """
+        if table is not self.table:
+            self.table = table
+            self.widths = None
+            self.rendered_rows = 0
+
+        # Widen the columns for the new rows; the header and the rows already printed have to be redrawn if any did
+        widths = self.widths if self.widths is not None else [len(str(name)) for name in table.field_names]
+        widths = list(widths)
+        for row in table.rows[self.rendered_rows:]:
+            for i, cell in enumerate(row):
+                widths[i] = max(widths[i], len(str(cell)))
+        if widths != self.widths:
+            self.widths = widths
+            self.rendered_rows = 0
+            lines = [self.rule(), self.format_row(table.field_names), self.rule()]
+        else:
+            lines = []
+
+        for row, divider in zip(table.rows[self.rendered_rows:], table.dividers[self.rendered_rows:]):
+            lines.append(self.format_row(row))
+            if divider:
+                lines.append(self.rule())
+        self.rendered_rows = len(table.rows)
+        return '\n'.join(lines)
+
+    def rule(self) -> str:
+        return '+' + '+'.join('-' * (width + 2 * self.padding_width) for width in self.widths) + '+'
+
+    def format_row(self, row: list) -> str:
+        padding = ' ' * self.padding_width
+        return '|' + '|'.join(padding + str(cell).center(width) + padding for cell, width in zip(row, self.widths)) + '|'
+
+def render_full_table(table: ScoreTable, padding_width: int = PADDING_WIDTH) -> str:
+    """
+    Returns the whole table drawn by PrettyTable.
+    """
+    from prettytable import PrettyTable
+    pretty_table = PrettyTable(table.field_names)
+    pretty_table.padding_width = padding_width
+    for row, divider in zip(table.rows, table.dividers):
+        pretty_table.add_row(row, divider = divider)
+    return str(pretty_table)
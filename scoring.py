@@ -0,0 +1,32 @@
+from constants import CARDS_PER_PLAYER
+
+def hand_score(bid: int, tricks_won: int) -> int:
+    """
+    Calculates a player's score for a hand from their bid and the number of tricks they won.
+
+    Args:
+        bid (int): The player's bid for the hand.
+        tricks_won (int): The number of tricks the player won.
+
+    Returns:
+        int: The score of the hand.
+    """
+    # In case of a successful bid
+    if bid == tricks_won:
+        # If a player bids to win all the 9 tricks and succeeds,
+        # they score 100 points per trick bid.
+        if bid == CARDS_PER_PLAYER:
+            return bid * 100
+        # If a player wins the exact number of tricks they bid for,
+        # they get a score of 50 times their bid plus 50.
+        return (bid * 50) + 50
+    # If a player bids a non-zero number of tricks but does not win any,
+    # they get a penalty of -500.
+    if bid != 0 and tricks_won == 0:
+        return -500
+    # If a player's bid does not match their tricks won,
+    # they get 10 points for each trick they won.
+    return tricks_won * 10
+
+# SCORE_TABLE[bid][tricks_won] is the score of a hand, for table lookups in the simulators
+SCORE_TABLE = [[hand_score(bid, tricks_won) for tricks_won in range(CARDS_PER_PLAYER + 1)] for bid in range(CARDS_PER_PLAYER + 1)]
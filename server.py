@@ -0,0 +1,595 @@
+"""
+Asyncio game server hosting many tables at once, each seat played by a remote client.
+
+Clients talk to the server with line-delimited JSON over TCP or a Unix socket, one object per line:
+
+- {"type": "join", "table": "<table id>", "name": "<player name>"}: takes a seat at a table (created on first join).
+  The reply is {"type": "joined", ..., "token": "<token>"}; the game starts when the fourth seat is taken. A table
+  that is not full within the lobby timeout is closed.
+- {"type": "resume", "token": "<token>"}: takes the seat back after a disconnection. The reply {"type": "resumed", ...}
+  is followed by {"type": "state", ...} with the hand being played as the seat has seen it (its cards, the bids and
+  the current trick), and by the pending prompt, if any.
+- {"type": "move", "id": <prompt id>, "answer": <answer>}: answers a prompt.
+
+The server sends {"type": "prompt", "id": ..., "decision": ..., "options": [...]} when the seat has to decide, with
+one of the options expected back (with the same JSON type: 1 is a bid, true and 1.0 are not), {"type": "event", "event": ..., ...} for everything happening at the table (see
+TableEvents), {"type": "timeout", ...} when a move was played for the seat, {"type": "error", "message": ...} and
+finally {"type": "game_over", "scores": {...}}.
+
+The rules are not copied: every table runs an ordinary Game (PlaySet, PlayHand) whose seats use RemoteDecisions. As
+the rules engine is synchronous, each table's game runs in its own worker thread and only waits there; all sockets
+are served by the event loop, which never waits on a player. A seat that does not answer within the move timeout
+(slow or disconnected) gets a SimpleDecisions move, and a client that does not read its messages is disconnected.
+"""
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from constants import NUMBER_OF_PLAYERS, CARDS_PER_PLAYER
+from decisions import SimpleDecisions, SUIT_CHOICES, TRUMP_CHOICES
+from events import NullEvents
+from player import Player
+from game import Game
+from results_log import ResultsLog
+
+# Bytes a client may leave unread before it is disconnected (it can resume its seat)
+MAX_WRITE_BUFFER = 1 << 20
+# Longest line a client may send
+MAX_LINE_LENGTH = 1 << 16
+# Seconds a table may wait for its four players before it is closed
+DEFAULT_LOBBY_TIMEOUT = 300.0
+
+class Seat:
+    """
+    A seat at a table and the client currently connected to it.
+
+    Attributes:
+        1) name (str): The name of the player.
+        2) token (str): The secret the client resumes the seat with.
+        3) writer (asyncio.StreamWriter): The connection of the client, or None while it is disconnected.
+        4) pending (tuple): (prompt message, future of the answer) of the decision the seat owes, or None.
+        5) outbox (list): Encoded lines waiting to be written to the connection together.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.token = secrets.token_hex(16)
+        self.writer = None
+        self.pending = None
+        self.outbox = []
+
+    def send(self, message: dict):
+        """
+        Queues a message to the client.
+        """
+        self.send_line(encode(message))
+
+    def send_line(self, line: bytes):
+        """
+        Queues an encoded line to the client. Lines queued in the same event loop iteration are written with a single
+        call, once the iteration is over.
+        """
+        if self.writer is None:
+            return
+        if not self.outbox:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self.outbox.append(line)
+
+    def flush(self):
+        """
+        Writes the queued lines without waiting. A client that does not read its messages is disconnected.
+        """
+        lines, self.outbox = self.outbox, []
+        if self.writer is None:
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.writer.close()
+            self.writer = None
+            return
+        self.writer.write(b''.join(lines))
+
+def encode(message: dict) -> bytes:
+    """
+    Encodes a message as a line of JSON.
+    """
+    return (json.dumps(message, ensure_ascii = False) + '\n').encode()
+
+class Table:
+    """
+    A table of four remote seats playing one game.
+
+    Attributes:
+        1) table_id (str): The name of the table.
+        2) seats (list): The Seat objects, in joining order.
+        3) loop (asyncio.AbstractEventLoop): The event loop serving the clients.
+        4) move_timeout (float): Seconds a seat has to answer a prompt.
+        5) rng (random.Random): The random number generator of the game (seating order and deck).
+        6) prompt_count (int): The number of prompts sent so far, used as prompt ids.
+        7) moves (int): The number of decisions made at the table, for throughput statistics.
+        8) started (bool): Whether the game has started.
+        9) results_log (ResultsLog): The results log the game is appended to, or None.
+        10) timeouts (int): The number of prompts that were not answered in time.
+        11) view (dict): The hand being played as told by the events sent so far: 'set_number', 'hand_number',
+            'trump_suit', 'cards' (the cards shown to each seat), 'bids', 'trick' (the cards played in the current
+            trick) and 'joker_lead' (the action and suit wanted of a Joker led in it, or None).
+        12) lobby_timer (asyncio.TimerHandle): Closes the table if it is not full in time, until the game starts.
+    """
+
+    def __init__(self, table_id: str, loop: asyncio.AbstractEventLoop, move_timeout: float, rng: random.Random, results_log: ResultsLog = None):
+        self.table_id = table_id
+        self.seats = []
+        self.loop = loop
+        self.move_timeout = move_timeout
+        self.rng = rng
+        self.prompt_count = 0
+        self.moves = 0
+        self.started = False
+        self.results_log = results_log
+        self.timeouts = 0
+        self.view = {'set_number': 0, 'hand_number': 0, 'trump_suit': None, 'cards': [[] for _ in range(NUMBER_OF_PLAYERS)],
+                     'bids': {}, 'trick': [], 'joker_lead': None}
+        self.lobby_timer = None
+
+    def broadcast(self, message: dict):
+        """
+        Sends a message to every seat of the table.
+        """
+        line = encode(message)
+        for seat in self.seats:
+            seat.send_line(line)
+
+    def publish(self, message: dict, seat_index: int = None):
+        """
+        Sends a message from the game thread: to one seat, or to every seat when 'seat_index' is None.
+        """
+        self.loop.call_soon_threadsafe(self.deliver, message, seat_index)
+
+    def deliver(self, message: dict, seat_index: int = None):
+        """
+        Sends a message published by the game thread, in the event loop, after updating the view of the hand with it.
+        """
+        if message['type'] == 'event':
+            self.update_view(message, seat_index)
+        if seat_index is None:
+            self.broadcast(message)
+        else:
+            self.seats[seat_index].send(message)
+
+    def update_view(self, event: dict, seat_index: int = None):
+        """
+        Applies an event to the view of the hand being played (see the 'view' attribute).
+        """
+        view = self.view
+        name = event['event']
+        if name == 'set_started':
+            view['set_number'] = event['set_number']
+        elif name == 'hand_started':
+            view.update(hand_number = event['hand_number'], trump_suit = None, bids = {}, trick = [], joker_lead = None,
+                        cards = [[] for _ in range(NUMBER_OF_PLAYERS)])
+        elif name == 'trump_chosen':
+            view['trump_suit'] = event['trump_suit']
+        elif name == 'cards_shown':
+            view['cards'][seat_index] = list(event['cards'])
+        elif name == 'bids_placed':
+            view['bids'] = event['bids']
+        elif name == 'trick_started':
+            view['trick'], view['joker_lead'] = [], None
+        elif name == 'card_played':
+            view['trick'].append({'player': event['player'], 'card': event['card'], 'joker_action': event['joker_action']})
+            cards = view['cards'][[seat.name for seat in self.seats].index(event['player'])]
+            if event['card'] in cards:
+                cards.remove(event['card'])
+        elif name == 'joker_led':
+            view['joker_lead'] = {'lead_joker_action': event['lead_joker_action'], 'suit_wanted': event['suit_wanted']}
+
+    def state(self, seat_index: int) -> dict:
+        """
+        Returns the state message of a seat: the hand being played as the seat has seen it.
+        """
+        view = self.view
+        return {'type': 'state', 'set_number': view['set_number'], 'hand_number': view['hand_number'], 'trump_suit': view['trump_suit'],
+                'cards': list(view['cards'][seat_index]), 'bids': dict(view['bids']), 'trick': list(view['trick']), 'joker_lead': view['joker_lead']}
+
+    async def request(self, seat_index: int, decision: str, options: list, details: dict):
+        """
+        Prompts a seat for a decision and waits for its answer.
+
+        Args:
+            seat_index (int): The seat that has to decide.
+            decision (str): The kind of decision (the name of the decision provider method).
+            options (list): The valid answers.
+            details (dict): Extra fields of the prompt (e.g. the cards to choose the trump suit from).
+
+        Returns:
+            The answer, one of 'options', or None if the seat has not answered within the move timeout.
+        """
+        seat = self.seats[seat_index]
+        self.prompt_count += 1
+        prompt = {'type': 'prompt', 'id': self.prompt_count, 'decision': decision, 'options': options, **details}
+        answer = self.loop.create_future()
+        seat.pending = (prompt, answer)
+        seat.send(prompt)
+        try:
+            return await asyncio.wait_for(answer, self.move_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return None
+        finally:
+            seat.pending = None
+            self.moves += 1
+
+    def answer(self, seat_index: int, prompt_id: int, answer) -> str:
+        """
+        Resolves a seat's pending prompt with a client's answer.
+
+        Returns:
+            str: An error message, or None if the answer has been accepted.
+        """
+        pending = self.seats[seat_index].pending
+        if pending is None or pending[0]['id'] != prompt_id:
+            return 'No move is expected for this prompt.'
+        prompt, future = pending
+        # Matched by JSON type as well as by value: true and 1.0 are equal to 1 in Python, but are not the bid 1
+        if not any(type(answer) is type(option) and answer == option for option in prompt['options']):
+            return f'Invalid answer for {prompt["decision"]}: choose one of {prompt["options"]}.'
+        if not future.done():
+            future.set_result(answer)
+        return None
+
+    def play_game(self) -> dict:
+        """
+        Plays the whole game, in a worker thread, and returns the final scores by player name.
+        """
+        players = [Player(seat.name, RemoteDecisions(self, seat_index)) for seat_index, seat in enumerate(self.seats)]
+        # Shuffle the order of players, as when names are entered at the console
+        self.rng.shuffle(players)
+        game = Game(players, TableEvents(self), results_file = None, rng = self.rng, results_log = self.results_log)
+        game.welcome()
+        game.print_the_order_of_players()
+        game.play_set()
+        game.determine_final_winner()
+        return game.set_scores
+
+class RemoteDecisions:
+    """
+    Decision provider for a seat played by a remote client.
+
+    Called in the table's game thread: every decision is sent to the client as a prompt listing the legal answers, and
+    the thread waits for the event loop to return the answer. Without an answer within the move timeout, the seat
+    plays the move of the fallback decision provider.
+
+    Attributes:
+        1) table (Table): The table of the seat.
+        2) seat_index (int): The index of the seat in table.seats.
+        3) fallback (object): The decision provider answering for a seat that times out.
+    """
+
+    def __init__(self, table: Table, seat_index: int, fallback: object = None):
+        self.table = table
+        self.seat_index = seat_index
+        self.fallback = fallback if fallback is not None else SimpleDecisions()
+
+    def ask(self, decision: str, options: list, details: dict = None):
+        """
+        Sends a prompt to the client and returns its answer, or None after a timeout.
+        """
+        request = self.table.request(self.seat_index, decision, options, details or {})
+        return asyncio.run_coroutine_threadsafe(request, self.table.loop).result()
+
+    def decide(self, decision: str, options: list, player: object, game_hand: object, details: dict = None):
+        """
+        Returns the client's answer, or the fallback provider's answer (reported to the client) if it timed out.
+        """
+        answer = self.ask(decision, options, details)
+        if answer is None:
+            answer = getattr(self.fallback, decision)(player, game_hand)
+            self.table.publish({'type': 'timeout', 'decision': decision, 'answer': str(answer) if decision == 'play_card' else answer}, self.seat_index)
+        return answer
+
+    def choose_trump(self, player: object, game_hand: object) -> str:
+        return self.decide('choose_trump', TRUMP_CHOICES, player, game_hand, {'cards': [str(card) for card in player.cards[:3]]})
+
+    def place_bid(self, player: object, game_hand: object) -> int:
+        forbidden_bid = game_hand.get_forbidden_bid(player)
+        options = [bid for bid in range(CARDS_PER_PLAYER + 1) if bid != forbidden_bid]
+        return self.decide('place_bid', options, player, game_hand)
+
+    def play_card(self, player: object, game_hand: object) -> object:
+        playable_cards = {str(card): card for card in game_hand.get_playable_cards(player)}
+        answer = self.decide('play_card', list(playable_cards), player, game_hand)
+        return playable_cards.get(answer, answer)
+
+    def choose_high_low(self, player: object, game_hand: object) -> str:
+        return self.decide('choose_high_low', list(game_hand.get_legal_joker_actions(player)), player, game_hand)
+
+    def choose_suit_wanted(self, player: object, game_hand: object) -> str:
+        return self.decide('choose_suit_wanted', SUIT_CHOICES, player, game_hand)
+
+    def choose_follow_joker_action(self, player: object, game_hand: object) -> str:
+        return self.decide('choose_follow_joker_action', list(game_hand.get_legal_joker_actions(player)), player, game_hand)
+
+class TableEvents(NullEvents):
+    """
+    Event sink that sends the events of a table's game to its clients as JSON messages.
+
+    Called in the table's game thread, so every event is converted to plain data before being handed to the event loop.
+    The cards of a player are only sent to that player.
+
+    Attributes:
+        table (Table): The table whose clients receive the events.
+    """
+
+    def __init__(self, table: Table):
+        self.table = table
+
+    def send(self, event: str, seat_name: str = None, **fields):
+        message = {'type': 'event', 'event': event, **fields}
+        if seat_name is None:
+            self.table.publish(message)
+        else:
+            self.table.publish(message, [seat.name for seat in self.table.seats].index(seat_name))
+
+    def players_ordered(self, players: list):
+        self.send('players_ordered', players = [player.name for player in players])
+
+    def set_started(self, set_number: int):
+        self.send('set_started', set_number = set_number)
+
+    def hand_started(self, hand_number: int):
+        self.send('hand_started', hand_number = hand_number)
+
+    def trump_chosen(self, player: object, trump_suit: str):
+        self.send('trump_chosen', player = player.name, trump_suit = trump_suit)
+
+    def cards_shown(self, player: object, cards: list, remaining: bool):
+        self.send('cards_shown', player.name, cards = [str(card) for card in player.cards])
+
+    def dealer_bid_rejected(self, dealer: object, forbidden_bid: int):
+        self.send('dealer_bid_rejected', player = dealer.name, forbidden_bid = forbidden_bid)
+
+    def bids_placed(self, players: list):
+        self.send('bids_placed', bids = {player.name: player.bid for player in players})
+
+    def trick_started(self, trick_number: int):
+        self.send('trick_started', trick_number = trick_number)
+
+    def card_played(self, player: object, card: object, joker_action: str):
+        self.send('card_played', player = player.name, card = str(card), joker_action = joker_action)
+
+    def joker_led(self, player: object, lead_joker_action: str, suit_wanted: str):
+        self.send('joker_led', player = player.name, lead_joker_action = lead_joker_action, suit_wanted = suit_wanted)
+
+    def card_rejected(self, player: object, message: str):
+        self.send('card_rejected', player.name, message = message)
+
+    def trick_won(self, winner: object):
+        self.send('trick_won', player = winner.name)
+
+    def hand_over(self, game_table: object):
+        self.send('hand_over', rows = game_table.rows)
+
+    def bonuses_checked(self, bonuses: list):
+        self.send('bonuses_checked', bonuses = {player.name: bonus_score for player, bonus_score in bonuses})
+
+    def set_over(self, game_table: object):
+        self.send('set_over', rows = game_table.rows)
+
+    def winner_announced(self, winners: list, score: int):
+        self.send('winner_announced', winners = winners, score = score)
+
+class GameServer:
+    """
+    Accepts client connections and runs their tables.
+
+    Attributes:
+        1) move_timeout (float): Seconds a seat has to answer a prompt.
+        2) tables (dict): The open tables by table id.
+        3) tokens (dict): (table, seat index) of every seat, by resume token.
+        4) executor (ThreadPoolExecutor): The worker threads running the games.
+        5) seed (int): Optional seed of the tables' random number generators.
+        6) moves (int): The number of decisions made at finished tables.
+        7) results_log (ResultsLog): The results log every table's game is appended to, or None.
+        8) metrics (Metrics): The metrics the tables are counted in (see instrumentation.py), or None.
+        9) lobby_timeout (float): Seconds a table may wait for its four players before it is closed.
+    """
+
+    def __init__(self, move_timeout: float = 30.0, max_tables: int = 1000, seed: int = None, results_log: ResultsLog = None, metrics: object = None,
+                 lobby_timeout: float = DEFAULT_LOBBY_TIMEOUT):
+        self.move_timeout = move_timeout
+        self.lobby_timeout = lobby_timeout
+        self.tables = {}
+        self.tokens = {}
+        self.executor = ThreadPoolExecutor(max_workers = max_tables, thread_name_prefix = 'table')
+        self.seed = seed
+        self.moves = 0
+        self.results_log = results_log
+        self.metrics = metrics
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves one client connection until it closes.
+        """
+        # (table, seat index) of the seat this connection plays
+        bound = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    message_type = message['type']
+                except (ValueError, TypeError, KeyError):
+                    self.send(writer, {'type': 'error', 'message': 'Every line must be a JSON object with a "type".'})
+                    continue
+
+                if message_type == 'join':
+                    bound = self.join(writer, message, bound)
+                elif message_type == 'resume':
+                    bound = self.resume(writer, message, bound)
+                elif message_type == 'move':
+                    if bound is None:
+                        self.send(writer, {'type': 'error', 'message': 'Join or resume a seat first.'})
+                        continue
+                    error = bound[0].answer(bound[1], message.get('id'), message.get('answer'))
+                    if error is not None:
+                        self.send(writer, {'type': 'error', 'message': error})
+                else:
+                    self.send(writer, {'type': 'error', 'message': f'Unknown message type: {message_type}.'})
+        finally:
+            # Keep the seat for a later resume; its prompts time out meanwhile
+            if bound is not None and bound[0].seats[bound[1]].writer is writer:
+                bound[0].seats[bound[1]].writer = None
+            writer.close()
+
+    def send(self, writer: asyncio.StreamWriter, message: dict):
+        writer.write(encode(message))
+
+    def join(self, writer: asyncio.StreamWriter, message: dict, bound: tuple) -> tuple:
+        """
+        Seats a client at a table, creating the table if needed, and starts the game once the table is full.
+        """
+        table_id, name = str(message.get('table', '')), str(message.get('name', '')).strip()
+        if bound is not None:
+            self.send(writer, {'type': 'error', 'message': 'This connection already has a seat.'})
+            return bound
+        table = self.tables.get(table_id)
+        if table is None:
+            rng = random.Random(f'{self.seed}:{table_id}') if self.seed is not None else random.Random()
+            table = self.tables[table_id] = Table(table_id, asyncio.get_running_loop(), self.move_timeout, rng, self.results_log)
+            table.lobby_timer = table.loop.call_later(self.lobby_timeout, self.close_lobby, table)
+        # Duplicated or empty names are not allowed, as at the console
+        if not name or name in [seat.name for seat in table.seats]:
+            self.send(writer, {'type': 'error', 'message': 'Name cannot be empty or already taken at this table.'})
+            return None
+        if table.started:
+            self.send(writer, {'type': 'error', 'message': f'Table {table_id} is full.'})
+            return None
+
+        seat = Seat(name)
+        seat.writer = writer
+        table.seats.append(seat)
+        self.tokens[seat.token] = (table, len(table.seats) - 1)
+        self.send(writer, {'type': 'joined', 'table': table_id, 'seat': len(table.seats) - 1, 'name': name, 'token': seat.token})
+
+        if len(table.seats) == NUMBER_OF_PLAYERS:
+            table.started = True
+            table.lobby_timer.cancel()
+            asyncio.create_task(self.run_table(table))
+        return (table, len(table.seats) - 1)
+
+    def resume(self, writer: asyncio.StreamWriter, message: dict, bound: tuple) -> tuple:
+        """
+        Gives a seat back to a reconnecting client, and sends it the state of the hand (its cards, the bids and the
+        current trick) and the prompt it owes again.
+        """
+        found = self.tokens.get(message.get('token'))
+        if found is None:
+            self.send(writer, {'type': 'error', 'message': 'Unknown or expired token.'})
+            return bound
+        table, seat_index = found
+        seat = table.seats[seat_index]
+        # A newer connection replaces an older one
+        if seat.writer is not None and seat.writer is not writer:
+            seat.writer.close()
+        seat.writer = writer
+        self.send(writer, {'type': 'resumed', 'table': table.table_id, 'seat': seat_index, 'name': seat.name})
+        seat.send(table.state(seat_index))
+        if seat.pending is not None:
+            seat.send(seat.pending[0])
+        return found
+
+    def close_lobby(self, table: Table):
+        """
+        Closes a table that is still waiting for players after the lobby timeout, and disconnects its seats.
+        """
+        if table.started or self.tables.get(table.table_id) is not table:
+            return
+        del self.tables[table.table_id]
+        for seat in table.seats:
+            del self.tokens[seat.token]
+            if seat.writer is not None:
+                seat.writer.write(encode({'type': 'error', 'message': f'Table {table.table_id} was not full within {self.lobby_timeout:g} s and has been closed.'}))
+                seat.writer.close()
+                seat.writer = None
+        if self.metrics is not None:
+            self.metrics.increment('joker_tables_expired_total')
+
+    async def run_table(self, table: Table):
+        """
+        Runs a full table's game in a worker thread, then reports the scores and closes the table.
+        """
+        try:
+            scores = await asyncio.get_running_loop().run_in_executor(self.executor, table.play_game)
+            table.broadcast({'type': 'game_over', 'scores': scores})
+        except Exception as error:
+            table.broadcast({'type': 'error', 'message': f'The game stopped: {error}'})
+        finally:
+            self.moves += table.moves
+            if self.metrics is not None:
+                self.metrics.increment('joker_tables_finished_total')
+                self.metrics.increment('joker_moves_total', amount = table.moves)
+                self.metrics.increment('joker_move_timeouts_total', amount = table.timeouts)
+            del self.tables[table.table_id]
+            for seat in table.seats:
+                del self.tokens[seat.token]
+
+async def serve(server: GameServer, host: str = '127.0.0.1', port: int = 8765, unix_path: str = None):
+    """
+    Runs the server on a TCP port, or on a Unix socket when 'unix_path' is given, until cancelled.
+    """
+    if unix_path is not None:
+        listener = await asyncio.start_unix_server(server.handle_client, unix_path, limit = MAX_LINE_LENGTH)
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port, limit = MAX_LINE_LENGTH)
+    start = time.perf_counter()
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        elapsed = time.perf_counter() - start
+        print(f'{server.moves} moves at finished tables in {elapsed:.1f} s.')
+
+def main():
+    """
+    Starts the game server from the command line.
+    """
+    parser = argparse.ArgumentParser(description = 'Host many tables of the game for remote clients.')
+    parser.add_argument('--host', default = '127.0.0.1', help = 'address to listen on')
+    parser.add_argument('--port', type = int, default = 8765, help = 'TCP port to listen on')
+    parser.add_argument('--unix', default = None, help = 'listen on this Unix socket path instead of TCP')
+    parser.add_argument('--move-timeout', type = float, default = 30.0, help = 'seconds a seat has to answer before a move is played for it')
+    parser.add_argument('--lobby-timeout', type = float, default = DEFAULT_LOBBY_TIMEOUT, help = 'seconds a table may wait for its four players before it is closed')
+    parser.add_argument('--max-tables', type = int, default = 1000, help = 'number of tables that can play at the same time')
+    parser.add_argument('--seed', type = int, default = None, help = 'seed of the deals (per table id)')
+    parser.add_argument('--log', default = None, help = 'append every game to this results log (JSON Lines)')
+    parser.add_argument('--metrics', default = None, help = 'write timing metrics to this file (JSON if it ends with .json, Prometheus text format otherwise)')
+    parser.add_argument('--metrics-interval', type = float, default = 10.0, help = 'seconds between two metrics snapshots')
+    args = parser.parse_args()
+
+    results_log = ResultsLog(args.log) if args.log is not None else None
+    metrics = snapshot_writer = None
+    if args.metrics is not None:
+        import instrumentation
+        metrics = instrumentation.enable(instrumentation.Metrics())
+        snapshot_writer = instrumentation.SnapshotWriter(metrics, args.metrics, args.metrics_interval)
+        snapshot_writer.start()
+    server = GameServer(args.move_timeout, args.max_tables, args.seed, results_log, metrics, args.lobby_timeout)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print('\nServer stopped.')
+    finally:
+        if results_log is not None:
+            results_log.close()
+        if snapshot_writer is not None:
+            snapshot_writer.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+Batches of hands in shared memory, played and resolved in place by a pool of worker processes.
+
+A SharedBatch keeps every column of a batch (see BatchSimulator) in its own multiprocessing.shared_memory block, viewed
+as a NumPy array by the parent and by every worker: the decks, the hands dealt, the trump suits, the bids, the cards
+played and trick leaders, the tricks won and the scores. A SharedPool starts its workers once, each attaching to the
+blocks by name, and then sends them only job descriptors, (kind, first hand, end, seed, lead seat) tuples, through a
+queue; a worker runs BatchSimulator over its slice of the batch and writes the results into the shared columns, and
+only the start of the slice (and a traceback on failure) comes back. No array is ever pickled.
+
+Jobs:
+- 'play': deals the hands of the slice (from a seed derived from the batch seed and the slice, or from the decks already
+  in the batch when the seed is None, which must then all be orders of the 36 cards), plays them with the SimpleDecisions policy and scores them;
+- 'resolve': recounts the tricks won from the cards played, trick leaders and trump suits, and rescores the hands.
+
+Results do not depend on the number of workers, only on the seed and the chunk size.
+
+    python shared_batch.py --games 1000000 --workers 4 --seed 1 --compare
+"""
+import argparse
+import multiprocessing
+import queue
+import time
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+from constants import NUMBER_OF_PLAYERS, CARDS_PER_PLAYER
+from card_masks import NUMBER_OF_CARDS
+from batch_sim import BatchSimulator
+from deals import DEAL_POSITIONS, DealGenerator
+
+# Columns of a batch: shape per hand and dtype. A hand dealt is the bitmask of a seat's cards (see card_masks.py)
+COLUMNS = {
+    'deck_orders': ((NUMBER_OF_CARDS,), np.int8),
+    'hands': ((NUMBER_OF_PLAYERS,), np.int64),
+    'trumps': ((), np.int8),
+    'bids': ((NUMBER_OF_PLAYERS,), np.int8),
+    'cards_played': ((CARDS_PER_PLAYER, NUMBER_OF_PLAYERS), np.int8),
+    'trick_leaders': ((CARDS_PER_PLAYER,), np.int8),
+    'tricks_won': ((NUMBER_OF_PLAYERS,), np.int8),
+    'scores': ((NUMBER_OF_PLAYERS,), np.int16),
+}
+# Columns the simulator fills in place, and columns copied into the batch once a slice is played
+IN_PLACE_COLUMNS = ('cards_played', 'trick_leaders', 'tricks_won')
+RESULT_COLUMNS = ('trumps', 'bids', 'scores')
+JOBS = ('play', 'resolve')
+DEFAULT_CHUNK_SIZE = 25000
+# Seconds between the checks that the workers are still alive while waiting for their jobs
+POLL_INTERVAL = 1.0
+# Bitmask of a full deck: the cards of a deck order, each as a bit
+FULL_DECK = (1 << NUMBER_OF_CARDS) - 1
+
+class SharedBatch:
+    """
+    The columns of a batch of hands, each in a shared memory block.
+
+    Attributes:
+        1) n_games (int): The number of hands in the batch.
+        2) blocks (dict): Column name -> SharedMemory.
+        3) columns (dict): Column name -> ndarray over its block, of shape (n_games, ...).
+        4) owner (bool): Whether this process created the blocks (and unlinks them).
+    """
+
+    def __init__(self, n_games: int, names: dict = None):
+        """
+        Creates the blocks of a batch, or attaches to the blocks of an existing one.
+
+        Args:
+            n_games (int): The number of hands in the batch.
+            names (dict): Column name -> block name of an existing batch (see descriptor), or None to create one.
+        """
+        self.n_games = n_games
+        self.owner = names is None
+        self.blocks = {}
+        self.columns = {}
+        for column, (shape, dtype) in COLUMNS.items():
+            shape = (n_games,) + shape
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            block = shared_memory.SharedMemory(create = True, size = size) if self.owner else shared_memory.SharedMemory(names[column])
+            self.blocks[column] = block
+            self.columns[column] = np.ndarray(shape, dtype = dtype, buffer = block.buf)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def descriptor(self) -> tuple:
+        """
+        Returns what a process needs to attach to the batch: its number of hands and the names of its blocks.
+        """
+        return self.n_games, {column: block.name for column, block in self.blocks.items()}
+
+    @classmethod
+    def attach(cls, descriptor: tuple) -> 'SharedBatch':
+        return cls(*descriptor)
+
+    def close(self):
+        """
+        Releases the views and the blocks of this process; the owner also frees the blocks.
+        """
+        self.columns = {}
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks = {}
+
+def chunk_seed(seed: int, start: int) -> int:
+    """
+    Derives the seed of the deals of a slice from the batch seed and the slice's first hand.
+    """
+    return int(np.random.SeedSequence([seed, start]).generate_state(1, np.uint64)[0])
+
+def run_job(batch: SharedBatch, kind: str, start: int, stop: int, seed: int = None, lead_seat: int = 0):
+    """
+    Plays or resolves the hands start to stop - 1 of a batch in place (see the module docstring).
+    """
+    decks = batch['deck_orders'][start:stop]
+    simulator = BatchSimulator(stop - start, lead_seat = lead_seat, deck_orders = decks)
+    for column in IN_PLACE_COLUMNS:
+        setattr(simulator, column, batch[column][start:stop])
+    if kind == 'play':
+        if seed is not None:
+            decks[:] = DealGenerator(chunk_seed(seed, start)).generate(stop - start)
+        simulator.tricks_won[:] = 0
+        simulator.run()
+        batch['hands'][start:stop] = np.bitwise_or.reduce(np.left_shift(1, decks[:, DEAL_POSITIONS].astype(np.int64)), axis = 2)
+    else:
+        simulator.trumps = batch['trumps'][start:stop]
+        simulator.bids = batch['bids'][start:stop]
+        simulator.resolve_tricks()
+        simulator.score_hands()
+    for column in RESULT_COLUMNS:
+        batch[column][start:stop] = getattr(simulator, column)
+
+def worker_main(descriptor: tuple, jobs: object, done: object):
+    """
+    Runs the jobs of a queue on a shared batch until it receives None, reporting each one on another queue as (start,
+    None), or (start, traceback) if it failed.
+    """
+    batch = SharedBatch.attach(descriptor)
+    try:
+        for kind, start, stop, seed, lead_seat in iter(jobs.get, None):
+            try:
+                run_job(batch, kind, start, stop, seed, lead_seat)
+                done.put((start, None))
+            except Exception:
+                done.put((start, traceback.format_exc()))
+    finally:
+        batch.close()
+
+class SharedPool:
+    """
+    A pool of worker processes playing and resolving the hands of a shared batch in place.
+
+    Attributes:
+        1) batch (SharedBatch): The batch, created by the pool.
+        2) chunk_size (int): The number of hands of a job.
+        3) jobs (multiprocessing.Queue): The job descriptors sent to the workers.
+        4) done (multiprocessing.Queue): The reports of the jobs done.
+        5) processes (list): The worker processes.
+    """
+
+    def __init__(self, n_games: int, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Creates a shared batch and starts the workers, which attach to it once.
+
+        Args:
+            n_games (int): The number of hands in the batch.
+            workers (int): The number of worker processes (all cores when omitted).
+            chunk_size (int): The number of hands of a job.
+        """
+        self.batch = SharedBatch(n_games)
+        self.chunk_size = chunk_size
+        self.jobs = multiprocessing.Queue()
+        self.done = multiprocessing.Queue()
+        self.processes = [multiprocessing.Process(target = worker_main, args = (self.batch.descriptor(), self.jobs, self.done), daemon = True)
+                          for _ in range(workers or multiprocessing.cpu_count())]
+        for process in self.processes:
+            process.start()
+
+    def __enter__(self) -> 'SharedPool':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, kind: str = 'play', seed: int = None, lead_seat: int = 0) -> SharedBatch:
+        """
+        Runs a job on every chunk of the batch, and waits for all of them.
+
+        Args:
+            kind (str): 'play' or 'resolve' (see the module docstring).
+            seed (int): The seed the deals are derived from ('play'), or None to play the decks already in the batch.
+            lead_seat (int): The lead seat of every hand.
+
+        Returns:
+            SharedBatch: The batch, with the results.
+
+        Raises:
+            ValueError: If the kind of job is unknown, or if the decks to play without a seed are not all orders of the 36
+                cards (as in a new batch, whose decks are zeros).
+            RuntimeError: If a job failed in a worker, or a worker exited before the jobs were done.
+        """
+        if kind not in JOBS:
+            raise ValueError(f'Unknown job: {kind} (the jobs are {", ".join(JOBS)}).')
+        if kind == 'play' and seed is None:
+            decks = self.batch['deck_orders']
+            valid = (decks >= 0).all() and (decks < NUMBER_OF_CARDS).all()
+            # 36 cards covering the 36 bits of a deck are a permutation of the deck
+            if not (valid and (np.bitwise_or.reduce(np.left_shift(1, decks.astype(np.int64)), axis = 1) == FULL_DECK).all()):
+                raise ValueError('Playing without a seed needs every deck of the batch to be an order of the 36 cards.')
+        starts = range(0, self.batch.n_games, self.chunk_size)
+        for start in starts:
+            self.jobs.put((kind, start, min(start + self.chunk_size, self.batch.n_games), seed, lead_seat))
+        failures = []
+        for _ in starts:
+            start, failure = self.wait_for_job()
+            if failure is not None:
+                failures.append(f'Hands from {start}:\n{failure}')
+        if failures:
+            raise RuntimeError('A job failed in a worker.\n' + '\n'.join(failures))
+        return self.batch
+
+    def wait_for_job(self) -> tuple:
+        """
+        Waits for the report of a job, checking every POLL_INTERVAL seconds that the workers are still alive.
+
+        Returns:
+            tuple: The first hand of the job and its traceback, or None if it succeeded.
+
+        Raises:
+            RuntimeError: If a worker exited.
+        """
+        while True:
+            try:
+                return self.done.get(timeout = POLL_INTERVAL)
+            except queue.Empty:
+                exit_codes = [process.exitcode for process in self.processes if not process.is_alive()]
+                if exit_codes:
+                    raise RuntimeError(f'{len(exit_codes)} worker(s) exited (exit codes {exit_codes}) before the jobs were done.')
+
+    def close(self):
+        """
+        Stops the workers and frees the batch.
+        """
+        for _ in self.processes:
+            self.jobs.put(None)
+        for process in self.processes:
+            process.join(POLL_INTERVAL * 10)
+            # A worker left without a job to read (one exited, or the queue holds jobs of a failed run) is stopped
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.batch.close()
+
+def play_chunk(start: int, stop: int, seed: int) -> dict:
+    """
+    Plays a slice of hands as a pickling worker would, returning its columns (the baseline of --compare).
+    """
+    simulator = BatchSimulator(stop - start, deck_orders = DealGenerator(chunk_seed(seed, start)).generate(stop - start)).run()
+    return {column: getattr(simulator, column) for column in IN_PLACE_COLUMNS + RESULT_COLUMNS + ('deck_orders',)}
+
+def resolve_chunk(cards_played: np.ndarray, trick_leaders: np.ndarray, trumps: np.ndarray, bids: np.ndarray) -> tuple:
+    """
+    Resolves a slice of hands sent as pickled arrays, returning its tricks won and scores (the baseline of --compare).
+    """
+    simulator = BatchSimulator(len(trumps))
+    simulator.cards_played, simulator.trick_leaders, simulator.trumps, simulator.bids = cards_played, trick_leaders, trumps, bids
+    simulator.resolve_tricks()
+    simulator.score_hands()
+    return simulator.tricks_won, simulator.scores
+
+def main():
+    """
+    Plays a batch of hands with the shared-memory pool from the command line, and optionally with a pool returning
+    pickled arrays for comparison.
+    """
+    parser = argparse.ArgumentParser(description = 'Play a batch of hands in shared memory with a pool of worker processes.')
+    parser.add_argument('--games', type = int, default = 1000000, help = 'number of hands to play')
+    parser.add_argument('--workers', type = int, default = multiprocessing.cpu_count(), help = 'number of worker processes')
+    parser.add_argument('--chunk-size', type = int, default = DEFAULT_CHUNK_SIZE, help = 'number of hands of a job')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the deals')
+    parser.add_argument('--compare', action = 'store_true', help = 'also play the batch with a process pool returning pickled arrays')
+    args = parser.parse_args()
+
+    with SharedPool(args.games, args.workers, args.chunk_size) as pool:
+        start = time.perf_counter()
+        batch = pool.run('play', args.seed)
+        played = time.perf_counter() - start
+        start = time.perf_counter()
+        scores = batch['scores'].copy()
+        pool.run('resolve')
+        resolved = time.perf_counter() - start
+        print(f'{args.games:,} hands played in {played:.2f} s ({args.games / played:,.0f} hands/s) and resolved again in {resolved:.2f} s '
+              f'with {args.workers} workers; mean score per seat {batch["scores"].mean():.1f}, rescored identically: {(batch["scores"] == scores).all()}.')
+
+        if args.compare:
+            # Imported here: only the comparison needs it
+            from concurrent.futures import ProcessPoolExecutor
+            starts = list(range(0, args.games, args.chunk_size))
+            stops = [min(first + args.chunk_size, args.games) for first in starts]
+            with ProcessPoolExecutor(max_workers = args.workers) as executor:
+                # The workers are started before the timing, as those of the shared pool are
+                list(executor.map(abs, range(args.workers)))
+                start = time.perf_counter()
+                chunks = list(executor.map(play_chunk, starts, stops, [args.seed] * len(starts)))
+                columns = {column: np.concatenate([chunk[column] for chunk in chunks]) for column in chunks[0]}
+                played = time.perf_counter() - start
+                start = time.perf_counter()
+                inputs = [[batch[column][first:stop] for first, stop in zip(starts, stops)] for column in ('cards_played', 'trick_leaders', 'trumps', 'bids')]
+                rescored = np.concatenate([chunk_scores for _, chunk_scores in executor.map(resolve_chunk, *inputs)])
+                resolved = time.perf_counter() - start
+            same = all((columns[column] == batch[column]).all() for column in columns) and (rescored == batch['scores']).all()
+            print(f'With pickled arrays: played in {played:.2f} s ({args.games / played:,.0f} hands/s) and resolved again in {resolved:.2f} s; same results: {same}.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Compact binary snapshots of a game, to checkpoint it and restore it later, in this process or another one.
+
+A snapshot can be taken at any boundary of the game, e.g. from the events of the game's event sink: before a set
+(set_started), before a hand is dealt (hand_started), before a trick once the cards are dealt and the bids placed
+(trick_started), once a hand is scored (hand_over) or once a set's bonus is checked (bonuses_checked, set_over). It
+holds everything needed to continue the game: the position in the game (set, hand, tricks played, hands scored in the
+set, and whether the set bonus is checked), the trump suit, the lead player and the dealer, each seat's remaining cards
+in order, bid, tricks won, hand scores and bonus record in the set, and cumulative set score, and the id of the game in
+the results log. A game restored after a hand or a set goes on with the next one; the hand or set itself is already in
+the results log (its record is written before hand_over and bonuses_checked are reported), and is not written again.
+
+Layout (little-endian), about 40 to 100 bytes:
+- header: magic b'JKSN', format version, flags, set number, hand number, tricks played, trump suit index
+  (4 for no trump), lead player index, dealer index, hands scored in the set (version 2; in version 1 snapshots, which
+  were only taken before a hand or a trick, it is the hand number minus one);
+- per seat: bid, tricks won, bonus record (bit i: the bid of hand i + 1 of the set succeeded), set score (int32), then
+  the score of every finished hand of the set (int16 each), then the card ids of the remaining cards (one byte each);
+- the game id (16 bytes), if the game is logged;
+- a CRC-32 of everything before it, so that a torn or corrupted checkpoint is rejected.
+
+What a snapshot does not hold: the players' names and decision providers (given when restoring, in seating order),
+the state of the random number generator the next deals are drawn from, and the rows of the game table, which start
+empty in a restored game.
+"""
+import os
+import struct
+import zlib
+from constants import NUMBER_OF_PLAYERS, CARDS_PER_PLAYER, HANDS_PER_SET
+from card_masks import SUIT_ORDER
+from cards import CARDS
+from game_set import PlaySet
+from game import Game
+
+MAGIC = b'JKSN'
+VERSION = 2
+
+# Flags of the header
+HAND_IN_PROGRESS = 1
+HAS_SET_SCORES = 2
+HAS_GAME_ID = 4
+BONUS_CHECKED = 8
+
+PREFIX = struct.Struct('<4sB')
+HEADER = struct.Struct('<4sBBBBBBBBB')
+HEADER_V1 = struct.Struct('<4sBBBBBBBB')
+SEAT = struct.Struct('<BBBi')
+HAND_SCORE = struct.Struct('<h')
+CHECKSUM = struct.Struct('<I')
+
+# Trump suit index in a snapshot: the suits in card id order, then 'None' (no trump)
+TRUMP_CHOICES = SUIT_ORDER + ['None']
+
+def take_snapshot(game: Game) -> bytes:
+    """
+    Returns a snapshot of a game that has started, taken at a set, hand or trick boundary (see the module docstring).
+
+    Raises:
+        ValueError: If the game has not started, or is not at a boundary a snapshot can be restored from (e.g. a trick
+            is being played).
+    """
+    game_set = game.game_set
+    if game_set is None:
+        raise ValueError('A snapshot can only be taken of a game that has started.')
+    game_hand = game_set.game_hand
+    if game_hand.cards_played:
+        raise ValueError('A snapshot can only be taken between two tricks.')
+
+    # The hand is in progress once the cards are dealt; it ends (and the players are reset) after its last trick
+    players = game.players
+    cards_held = len(players[0].cards)
+    hands_scored = len(players[0].hand_scores)
+    if any(len(player.cards) != cards_held or len(player.hand_scores) != hands_scored or len(player.deserves_bonus) != hands_scored for player in players):
+        raise ValueError('A snapshot can only be taken when every seat is at the same point of the game.')
+    hand_in_progress = bool(cards_held)
+    hand_number = game_set.hand_number
+    if hand_in_progress:
+        boundary = hands_scored == hand_number - 1 and cards_held == CARDS_PER_PLAYER - game_hand.tricks_played
+    else:
+        # Before a hand, once a hand is scored, or between two sets once the bonus is checked
+        boundary = hands_scored in (hand_number - 1, hand_number) or game_set.bonus_checked and hands_scored in (0, HANDS_PER_SET)
+    if not boundary or hands_scored > HANDS_PER_SET:
+        raise ValueError('A snapshot can only be taken at a set, hand or trick boundary.')
+
+    flags = (HAND_IN_PROGRESS if hand_in_progress else 0) | (HAS_SET_SCORES if game_set.set_scores else 0) | (HAS_GAME_ID if game.game_id is not None else 0) \
+            | (BONUS_CHECKED if game_set.bonus_checked else 0)
+    parts = [HEADER.pack(
+        MAGIC, VERSION, flags, game_set.set_number, hand_number, game_hand.tricks_played if hand_in_progress else 0,
+        TRUMP_CHOICES.index(game_hand.trump_suit) if hand_in_progress else 0, game_hand.lead_player_index, game_hand.dealer_index % NUMBER_OF_PLAYERS,
+        hands_scored,
+    )]
+    for player in game.players:
+        bonus_record = sum(1 << hand for hand, succeeded in enumerate(player.deserves_bonus) if succeeded)
+        parts.append(SEAT.pack(player.bid, player.tricks_won, bonus_record, game_set.set_scores.get(player.name, 0)))
+        parts.extend(HAND_SCORE.pack(score) for score in player.hand_scores)
+        parts.append(bytes(card.card_id for card in player.cards))
+    if game.game_id is not None:
+        parts.append(bytes.fromhex(game.game_id))
+
+    data = b''.join(parts)
+    return data + CHECKSUM.pack(zlib.crc32(data))
+
+def restore_snapshot(data: bytes, players: list, events: object = None, rng: object = None, results_log: object = None) -> Game:
+    """
+    Rebuilds a game from a snapshot; Game.play_set then plays it on from where the snapshot was taken.
+
+    Args:
+        data (bytes): The snapshot (see take_snapshot).
+        players (list): Player objects in the seating order of the snapshot, with fresh state.
+        events (object): The event sink of the restored game.
+        rng (random.Random): The random number generator of the next deals.
+        results_log (ResultsLog): The results log the game goes on being appended to, under the id of the snapshot.
+
+    Raises:
+        ValueError: If the snapshot is corrupted, of an unknown format version, or does not match the number of players.
+    """
+    if len(data) < PREFIX.size + CHECKSUM.size or CHECKSUM.unpack_from(data, len(data) - CHECKSUM.size)[0] != zlib.crc32(data[:-CHECKSUM.size]):
+        raise ValueError('The snapshot is corrupted.')
+    magic, version = PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('The data is not a game snapshot.')
+    if version not in (1, VERSION):
+        raise ValueError(f'Unsupported snapshot version {version} (expected {VERSION}).')
+    if len(players) != NUMBER_OF_PLAYERS:
+        raise ValueError(f'A snapshot is restored with {NUMBER_OF_PLAYERS} players, not {len(players)}.')
+    try:
+        return restore_fields(data, version, players, events, rng, results_log)
+    except (struct.error, IndexError):
+        raise ValueError('The snapshot is corrupted.') from None
+
+def restore_fields(data: bytes, version: int, players: list, events: object, rng: object, results_log: object) -> Game:
+    """
+    Rebuilds a game from the fields of a snapshot whose checksum and version are checked (see restore_snapshot).
+    """
+    if version == 1:
+        _, _, flags, set_number, hand_number, tricks_played, trump_index, lead_player_index, dealer_index = HEADER_V1.unpack_from(data)
+        hands_scored = hand_number - 1
+        offset = HEADER_V1.size
+    else:
+        _, _, flags, set_number, hand_number, tricks_played, trump_index, lead_player_index, dealer_index, hands_scored = HEADER.unpack_from(data)
+        offset = HEADER.size
+
+    game = Game(players, events, results_file = None, rng = rng, results_log = results_log)
+    hand_in_progress = bool(flags & HAND_IN_PROGRESS)
+    # Every seat holds the same number of cards between two tricks
+    cards_held = CARDS_PER_PLAYER - tricks_played if hand_in_progress else 0
+    if hands_scored < 0 or hands_scored > HANDS_PER_SET or hand_in_progress and hands_scored != hand_number - 1:
+        raise ValueError('The snapshot is corrupted.')
+    finished_hands = hands_scored
+
+    set_scores = {}
+    for player in players:
+        player.bid, player.tricks_won, bonus_record, set_score = SEAT.unpack_from(data, offset)
+        offset += SEAT.size
+        player.hand_scores = [HAND_SCORE.unpack_from(data, offset + i * HAND_SCORE.size)[0] for i in range(finished_hands)]
+        offset += finished_hands * HAND_SCORE.size
+        player.deserves_bonus = [bool(bonus_record >> hand & 1) for hand in range(finished_hands)]
+        player.cards = []
+        player.hand = 0
+        player.add_cards([CARDS[card_id] for card_id in data[offset:offset + cards_held]])
+        offset += cards_held
+        player.score = 0
+        set_scores[player.name] = set_score
+    if flags & HAS_GAME_ID:
+        game.game_id = data[offset:offset + 16].hex()
+        offset += 16
+    if offset != len(data) - CHECKSUM.size:
+        raise ValueError('The snapshot is corrupted.')
+
+    # Where the game goes on from: a new set, the hand in progress, or the next hand to deal
+    resumed_hand_in_progress = hand_in_progress
+    if set_number == 0 or flags & BONUS_CHECKED:
+        resumed_hand_in_progress = None
+        for player in players:
+            player.reset_for_another_set()
+    elif not hand_in_progress and hands_scored == hand_number:
+        hand_number += 1
+    elif hands_scored != hand_number - 1:
+        raise ValueError('The snapshot is corrupted.')
+    if not hand_in_progress:
+        for player in players:
+            player.bid = player.tricks_won = 0
+
+    game_set = game.game_set = PlaySet(players, game.events, game.rng, results_log, game.game_id)
+    game_set.set_number = set_number
+    game_set.hand_number = hand_number
+    game_set.resumed_hand_in_progress = resumed_hand_in_progress
+    game_set.bonus_checked = bool(flags & BONUS_CHECKED)
+    game_set.set_scores = set_scores if flags & HAS_SET_SCORES else {}
+    game_set.lead_player_index = (hand_number - 1) % NUMBER_OF_PLAYERS
+    game_set.dealer_index = dealer_index
+
+    game_hand = game_set.game_hand
+    game_hand.tricks_played = tricks_played
+    game_hand.lead_player_index = lead_player_index
+    game_hand.dealer_index = dealer_index
+    game_hand.trump_suit = TRUMP_CHOICES[trump_index] if hand_in_progress else None
+    return game
+
+def write_snapshot(path: str, data: bytes):
+    """
+    Writes a snapshot to a file, replacing the previous one atomically, so that a crash never leaves a partial checkpoint.
+    """
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+def read_snapshot(path: str) -> bytes:
+    """
+    Reads a snapshot written by write_snapshot.
+    """
+    with open(path, 'rb') as file:
+        return file.read()
@@ -0,0 +1,325 @@
+import argparse
+import random
+import time
+from constants import RANKS, NUMBER_OF_PLAYERS, CARDS_PER_PLAYER
+from card_masks import NUMBER_OF_CARDS, SUIT_ORDER, SUIT_MASKS, JOKER_MASK, CARD_SUITS, card_ids
+from legal_moves import legal_cards
+from trick_resolution import JOKER_PLAY_STRENGTH, CARD_STRENGTHS, joker_lead_strength, leading_play
+
+# Mask of every card of the same suit as each card id (the Jokers form their own group)
+SAME_SUIT_MASKS = [SUIT_MASKS[suit] if suit != 'JOKER' else JOKER_MASK for suit in CARD_SUITS]
+
+def trick_winner(plays: list, trump_suit: str, suit_wanted: str, lead_joker_action: str) -> int:
+    """
+    Returns the position (0 for the leader) of the card winning a complete trick, with the rules of
+    PlayHand.determine_trick_winner: the play with the highest strength wins (see trick_resolution.py).
+
+    Args:
+        plays (list): (card id, Joker action) of each position, in playing order.
+        trump_suit (str): The trump suit, or 'None'.
+        suit_wanted (str): The suit asked for by a Joker lead.
+        lead_joker_action (str): 'High' or 'Low' after a Joker lead.
+
+    Returns:
+        int: The position of the winning card.
+    """
+    return leading_play(plays, trump_suit, suit_wanted, lead_joker_action)[1]
+
+class DoubleDummySolver:
+    """
+    Exact solver for a dealt hand with all four hands visible ("double dummy").
+
+    For a given seat, finds the maximum number of tricks the seat can be sure to take when the three other seats play
+    against it, under the full rules: Joker 'High'/'Low' leads with a suit wanted, 'Play'/'Give up' on follow, and a
+    trump suit or no trump. The search is a series of null-window alpha-beta tests ("can the seat take k tricks?")
+    for k = 1, 2, ... until one fails, with:
+    - a transposition table at every trick boundary, keyed on the leader and the remaining cards reduced to their
+      relative ranks (positions that differ only by which lower cards are gone share an entry), storing bounds for
+      every seat. The table is kept across the solves of the four seats: when the three other seats are each sure of
+      their lower bounds whatever the others play, the target cannot take more than the tricks they leave, so the
+      tests of the seats solved later can fail without a search;
+    - pruning of equivalent cards: cards of one suit in the same hand with no live card of another hand between them
+      (touching ranks), both Jokers in the same hand, and suits wanted that nobody else can follow;
+    - move ordering that tries the target's winning cards first and lets the other seats beat it or discard low;
+    - with an endgame tablebase (see tablebase.py), the exact result of every ending it holds, read instead of searched
+      the first time the ending is reached (the result of every seat is then kept in the transposition table).
+
+    Attributes:
+        1) hands (tuple): The bitmask of each seat's cards (see card_masks.py).
+        2) trump_suit (str): The trump suit, or 'None'.
+        3) leader (int): The seat leading the first trick.
+        4) target (int): The seat being solved for.
+        5) table (dict): The transposition table of the deal, shared by the solves of every seat: position key ->
+            [lower bound of each seat, upper bound of each seat].
+        6) nodes (int): The number of positions searched by the last solve.
+        7) tablebase (Tablebase): Optional endgame tablebase probed at the trick boundaries not yet in the table.
+        8) others (tuple): The three seats other than the target, whose lower bounds cap the target's upper bound.
+    """
+
+    def __init__(self, hands: list, trump_suit: str, leader: int, tablebase: object = None):
+        """
+        Initializes a DoubleDummySolver instance.
+
+        Args:
+            hands (list): The bitmask of each seat's cards; all hands must hold the same number of cards.
+            trump_suit (str): The trump suit, or 'None'.
+            leader (int): The seat leading the first trick.
+            tablebase (Tablebase): Optional endgame tablebase the endings it holds are read from.
+        """
+        self.hands = tuple(hands)
+        self.trump_suit = trump_suit
+        self.leader = leader
+        self.target = None
+        self.table = {}
+        self.nodes = 0
+        self.tablebase = tablebase
+        self.others = ()
+
+    def solve(self, seat: int) -> int:
+        """
+        Returns the maximum number of tricks the seat can take against the best defence of the three other seats.
+        """
+        self.target = seat
+        self.others = tuple(other for other in range(NUMBER_OF_PLAYERS) if other != seat)
+        self.nodes = 0
+        # Most seats can only be sure of a few tricks, so the tests go upwards from one trick
+        tricks = 0
+        while tricks < self.hands[self.leader].bit_count() and self.can_take(self.hands, self.leader, tricks + 1):
+            tricks += 1
+        return tricks
+
+    def solve_all(self) -> list:
+        """
+        Returns the maximum number of tricks of every seat.
+        """
+        return [self.solve(seat) for seat in range(NUMBER_OF_PLAYERS)]
+
+    def can_take(self, hands: tuple, leader: int, tricks: int) -> bool:
+        """
+        Checks, at a trick boundary, whether the target can take at least 'tricks' of the remaining tricks.
+        """
+        if tricks <= 0:
+            return True
+        tricks_left = hands[leader].bit_count()
+        if tricks > tricks_left:
+            return False
+
+        key = position_key(hands, leader)
+        bounds = self.table.get(key)
+        if bounds is None:
+            results = None
+            # An ending is probed once: its exact result for every seat is kept in the table
+            if self.tablebase is not None and tricks_left <= self.tablebase.max_cards:
+                results = self.tablebase.probe(hands, leader, self.trump_suit)
+            if results is not None:
+                bounds = self.table[key] = results + results
+            else:
+                bounds = self.table[key] = [0] * NUMBER_OF_PLAYERS + [tricks_left] * NUMBER_OF_PLAYERS
+        target = self.target
+        if bounds[target] >= tricks:
+            return True
+        first, second, third = self.others
+        if bounds[NUMBER_OF_PLAYERS + target] < tricks or tricks_left - bounds[first] - bounds[second] - bounds[third] < tricks:
+            return False
+
+        result = self.can_take_in_trick(hands, leader, 0, None, -1, 0, 0, tricks)
+        if result:
+            bounds[target] = tricks
+        else:
+            bounds[NUMBER_OF_PLAYERS + target] = tricks - 1
+        return result
+
+    def can_take_in_trick(self, hands: tuple, leader: int, position: int, trick: tuple, best_strength: int, best_position: int, table_cards: int, tricks: int) -> bool:
+        """
+        Checks, inside a trick, whether the target can take at least 'tricks' of the remaining tricks.
+
+        Args:
+            hands (tuple): The cards left in each hand.
+            leader (int): The seat that has led the trick.
+            position (int): The number of cards already on the table.
+            trick (tuple): (lead card id, suit wanted, lead Joker action, suit required) set by the lead card.
+            best_strength (int): The strength of the card currently winning the trick (see trick_winner).
+            best_position (int): The position of the card currently winning the trick.
+            table_cards (int): The bitmask of the cards on the table.
+            tricks (int): The number of tricks the target needs.
+        """
+        self.nodes += 1
+
+        if position == NUMBER_OF_PLAYERS:
+            winner = (leader + best_position) % NUMBER_OF_PLAYERS
+            return self.can_take(hands, winner, tricks - 1 if winner == self.target else tricks)
+
+        seat = (leader + position) % NUMBER_OF_PLAYERS
+        # The target needs one move that works; the other seats need one move that defeats it
+        maximizing = seat == self.target
+        for card_id, strength, next_trick in self.generate_moves(hands, seat, position, trick, best_strength, best_position, table_cards):
+            next_hands = hands[:seat] + (hands[seat] & ~(1 << card_id),) + hands[seat + 1:]
+            if strength > best_strength:
+                result = self.can_take_in_trick(next_hands, leader, position + 1, next_trick, strength, position, table_cards | (1 << card_id), tricks)
+            else:
+                result = self.can_take_in_trick(next_hands, leader, position + 1, next_trick, best_strength, best_position, table_cards | (1 << card_id), tricks)
+            if result == maximizing:
+                return result
+        return not maximizing
+
+    def generate_moves(self, hands: tuple, seat: int, position: int, trick: tuple, best_strength: int, best_position: int, table_cards: int) -> list:
+        """
+        Returns the distinct moves of the seat as (card id, strength of the card in the trick, trick context) tuples,
+        ordered so that alpha-beta cut-offs come early.
+
+        A Joker played after the lead gives two moves ('Play' has a strength, 'Give up' has none), and a Joker lead gives
+        one move per worthwhile suit wanted and 'High'/'Low' action.
+        """
+        hand = hands[seat]
+        live_cards = hands[0] | hands[1] | hands[2] | hands[3] | table_cards
+        trump_suit = self.trump_suit
+
+        if position == 0:
+            moves = []
+            for card_id in representative_cards(hand, hand, live_cards):
+                if (1 << card_id) & JOKER_MASK:
+                    for wanted in distinct_suits_wanted(live_cards & ~hand, trump_suit):
+                        moves.append((card_id, joker_lead_strength('High', wanted, trump_suit), (card_id, wanted, 'High', None)))
+                        moves.append((card_id, joker_lead_strength('Low', wanted, trump_suit), (card_id, wanted, 'Low', wanted)))
+                else:
+                    suit = CARD_SUITS[card_id]
+                    moves.append((card_id, CARD_STRENGTHS[trump_suit, suit][card_id], (card_id, None, None, suit)))
+            return moves
+
+        lead_card_id, suit_wanted, lead_joker_action, suit_required = trick
+        strengths = CARD_STRENGTHS[trump_suit, suit_required]
+        winning, losing = [], []
+        for card_id in representative_cards(legal_cards(hand, lead_card_id, trump_suit, suit_wanted, lead_joker_action), hand, live_cards):
+            if (1 << card_id) & JOKER_MASK:
+                winning.append((card_id, JOKER_PLAY_STRENGTH + position, trick))
+                losing.append((card_id, 0, trick))
+                continue
+            strength = strengths[card_id]
+            if strength > best_strength:
+                winning.append((card_id, strength, trick))
+            else:
+                losing.append((card_id, strength, trick))
+        # Discards go lowest first
+        losing.reverse()
+
+        target_position = (self.target - seat + position) % NUMBER_OF_PLAYERS
+        if seat == self.target:
+            return winning + losing
+        # The target has not played yet: the other seats keep their high cards and discard low first
+        if target_position > position:
+            return losing + winning
+        # The target has played: beat it if it is winning, otherwise discard low
+        if best_position == target_position:
+            return winning + losing
+        return losing + winning
+
+def representative_cards(legal_mask: int, hand: int, live_cards: int) -> list:
+    """
+    Returns one card of every group of equivalent legal cards, highest first.
+
+    Two cards of a suit in the same hand are equivalent when every live card ranked between them (in the other hands or
+    on the table) is also in that hand: they win and lose against exactly the same cards. Both Jokers are equivalent.
+    """
+    representatives = []
+    previous = None
+    for card_id in reversed(card_ids(legal_mask)):
+        if previous is not None and SAME_SUIT_MASKS[previous] == SAME_SUIT_MASKS[card_id]:
+            between = ((1 << previous) - 1) & ~((1 << (card_id + 1)) - 1)
+            # Both Jokers behave the same whatever lies between their ids
+            if (1 << card_id) & JOKER_MASK or not between & live_cards & ~hand:
+                previous = card_id
+                continue
+        representatives.append(card_id)
+        previous = card_id
+    return representatives
+
+def distinct_suits_wanted(other_cards: int, trump_suit: str) -> list:
+    """
+    Returns the suits worth asking for with a Joker lead: the trump suit, every suit the other seats hold, and a single
+    suit that nobody else holds (all such suits play out the same way).
+    """
+    suits = []
+    unheld_suit_added = False
+    for suit in SUIT_ORDER:
+        if suit == trump_suit or other_cards & SUIT_MASKS[suit]:
+            suits.append(suit)
+        elif not unheld_suit_added:
+            suits.append(suit)
+            unheld_suit_added = True
+    return suits
+
+def build_rank_compression() -> dict:
+    """
+    Builds the table used to reduce a hand's cards of one suit to their relative ranks among the live cards of that suit.
+
+    Returns:
+        dict: (live pattern, hand pattern) -> compressed hand pattern, where patterns are 9-bit masks of ranks and the
+        hand pattern is a subset of the live pattern.
+    """
+    compression = {}
+    for live in range(1 << len(RANKS)):
+        ranks = [rank for rank in range(len(RANKS)) if live >> rank & 1]
+        for subset in range(1 << len(ranks)):
+            pattern = 0
+            for i, rank in enumerate(ranks):
+                if subset >> i & 1:
+                    pattern |= 1 << rank
+            compression[(live, pattern)] = subset
+    return compression
+
+RANK_COMPRESSION = build_rank_compression()
+
+def position_key(hands: tuple, leader: int) -> tuple:
+    """
+    Returns the transposition-table key of a trick boundary: the leader, the Jokers held by each seat, and the cards of
+    each suit in each hand reduced to their relative ranks among the cards of that suit still in play.
+    """
+    key = [leader, hands[0] & JOKER_MASK, hands[1] & JOKER_MASK, hands[2] & JOKER_MASK, hands[3] & JOKER_MASK]
+    all_cards = hands[0] | hands[1] | hands[2] | hands[3]
+    for shift, suit_mask in SUIT_SHIFTS:
+        live = (all_cards & suit_mask) >> shift
+        for hand in hands:
+            key.append(RANK_COMPRESSION[(live, (hand & suit_mask) >> shift)])
+    return tuple(key)
+
+# (shift, mask) of every suit, to extract a suit's 9-bit rank pattern from a hand
+SUIT_SHIFTS = [(i * len(RANKS), SUIT_MASKS[suit]) for i, suit in enumerate(SUIT_ORDER)]
+
+def random_deal(rng: random.Random, cards_per_seat: int = CARDS_PER_PLAYER) -> list:
+    """
+    Deals random hands of 'cards_per_seat' cards to the four seats, as bitmasks.
+    """
+    order = list(range(NUMBER_OF_CARDS))
+    rng.shuffle(order)
+    return [sum(1 << card_id for card_id in order[seat:NUMBER_OF_PLAYERS * cards_per_seat:NUMBER_OF_PLAYERS]) for seat in range(NUMBER_OF_PLAYERS)]
+
+def main():
+    """
+    Solves random deals from the command line and prints the tricks of every seat and the solving time.
+    """
+    parser = argparse.ArgumentParser(description = 'Solve random deals double dummy.')
+    parser.add_argument('--deals', type = int, default = 5, help = 'number of deals to solve')
+    parser.add_argument('--seed', type = int, default = None, help = 'seed of the deals')
+    parser.add_argument('--cards', type = int, default = CARDS_PER_PLAYER, help = 'cards per seat (solve endings with fewer cards)')
+    parser.add_argument('--tablebase', default = None, help = 'read the endings from this endgame tablebase, generated with "python tablebase.py generate"')
+    args = parser.parse_args()
+
+    tablebase = None
+    if args.tablebase is not None:
+        from tablebase import Tablebase
+        try:
+            tablebase = Tablebase(args.tablebase)
+        except FileNotFoundError:
+            parser.error(f'no tablebase at {args.tablebase}: generate it first with "python tablebase.py generate --output {args.tablebase}"')
+    rng = random.Random(args.seed)
+    for _ in range(args.deals):
+        hands = random_deal(rng, args.cards)
+        trump_suit = rng.choice(SUIT_ORDER + ['None'])
+        solver = DoubleDummySolver(hands, trump_suit, 0, tablebase)
+        start = time.perf_counter()
+        tricks = solver.solve_all()
+        elapsed = time.perf_counter() - start
+        print(f'Trump {trump_suit}: tricks per seat {tricks} solved in {elapsed * 1000:.1f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+"""
+Endgame tablebase: the exact double-dummy result of every ending with a few cards per seat.
+
+An ending is a trick boundary where every seat holds the same number of cards. Its result is, for every seat, the
+maximum number of the remaining tricks it can take against the best play of the three others (as computed by
+solver.DoubleDummySolver), under the full rules: trump or no trump, Joker 'High'/'Low' leads with a suit wanted, and
+'Play'/'Give up' on follow.
+
+Endings are stored in an abstract form that keeps only what decides the tricks:
+- the seats relative to the leader (the leader is seat 0);
+- the trump suit moved to the first suit slot (the other suits keep their order), or no trump;
+- the seats holding the Jokers (both Jokers play alike);
+- for every suit, the seats holding its live cards from the lowest to the highest: only the relative ranks of the
+  cards still in play matter (as in solver.position_key).
+
+Every abstract ending has a dense index: blocks by trump context, Joker holders and suit sizes, then the rank of the
+word of holders among the words with as many cards per seat. A result takes one byte (2 bits per relative seat).
+
+File layout: a header (magic b'JKTB', format version, cards per seat of the largest endings), then the results of
+the endings with 1, 2, ... cards per seat. Tablebase maps the file into memory. A suit with more than eight live
+cards is outside the abstract form (probe returns None), which only happens with three or more cards per seat.
+
+Endings with two cards per seat are 1,678,320 positions. With three cards per seat there are 661 million, which are
+beyond a pure Python generator; the format and the probe support them.
+
+The file is not part of the repository: it has to be generated once (about 9 minutes for two cards per seat). The
+solver probes it only for the endings not yet in its transposition table, so that it also pays off in the search of
+larger deals.
+
+    python tablebase.py generate --cards 2
+    python solver.py --deals 5 --seed 1 --tablebase tablebase.bin
+"""
+import argparse
+import math
+import mmap
+import struct
+import time
+from constants import RANKS, NUMBER_OF_PLAYERS
+from card_masks import SUIT_ORDER, SUIT_MASKS, RED_JOKER_ID, BLACK_JOKER_ID, card_ids
+from solver import DoubleDummySolver
+
+MAGIC = b'JKTB'
+VERSION = 1
+HEADER = struct.Struct('<4sBB')
+
+DEFAULT_TABLEBASE_FILE = 'tablebase.bin'
+DEFAULT_CARDS = 2
+
+# Live cards of a suit in the abstract form (the plain cards of a black suit)
+MAX_SUIT_CARDS = len(RANKS) - 1
+TRUMP_CONTEXTS = ('None', 'trump')
+JOKER_IDS = (RED_JOKER_ID, BLACK_JOKER_ID)
+FACTORIALS = [math.factorial(n) for n in range(NUMBER_OF_PLAYERS * len(RANKS) + 1)]
+
+def joker_holders(cards: int) -> list:
+    """
+    Returns the possible holders of the Jokers (sorted tuples of relative seats) when every seat holds 'cards' cards.
+    """
+    holders = [()]
+    holders += [(seat,) for seat in range(NUMBER_OF_PLAYERS)]
+    holders += [(first, second) for first in range(NUMBER_OF_PLAYERS) for second in range(first, NUMBER_OF_PLAYERS)]
+    # A seat cannot hold more Jokers than cards
+    return [seats for seats in holders if all(seats.count(seat) <= cards for seat in seats)]
+
+def suit_sizes(cards: int) -> list:
+    """
+    Returns the ways to split 'cards' live cards between the four suit slots, at most MAX_SUIT_CARDS per suit.
+    """
+    sizes = []
+    for first in range(min(cards, MAX_SUIT_CARDS) + 1):
+        for second in range(min(cards - first, MAX_SUIT_CARDS) + 1):
+            for third in range(min(cards - first - second, MAX_SUIT_CARDS) + 1):
+                fourth = cards - first - second - third
+                if fourth <= MAX_SUIT_CARDS:
+                    sizes.append((first, second, third, fourth))
+    return sizes
+
+def multinomial(counts: list) -> int:
+    result = FACTORIALS[sum(counts)]
+    for count in counts:
+        result //= FACTORIALS[count]
+    return result
+
+def level_blocks(cards: int) -> tuple[dict, int]:
+    """
+    Returns the blocks of the endings with 'cards' cards per seat, as (trump context, Joker holders, suit sizes) ->
+    (first index, cards each seat holds outside the Jokers), and the number of endings.
+    """
+    blocks = {}
+    offset = 0
+    for context in TRUMP_CONTEXTS:
+        for holders in joker_holders(cards):
+            counts = [cards - holders.count(seat) for seat in range(NUMBER_OF_PLAYERS)]
+            if min(counts) < 0:
+                continue
+            words = multinomial(counts)
+            for sizes in suit_sizes(NUMBER_OF_PLAYERS * cards - len(holders)):
+                blocks[(context, holders, sizes)] = (offset, counts)
+                offset += words
+    return blocks, offset
+
+def word_rank(word: list, counts: list) -> int:
+    """
+    Returns the rank of a word of seats among the words with the same number of letters per seat, in lexicographic order.
+    """
+    counts = list(counts)
+    remaining = len(word)
+    # The number of words with the remaining letters
+    words = multinomial(counts)
+    rank = 0
+    for letter in word:
+        for smaller in range(letter):
+            if counts[smaller]:
+                rank += words * counts[smaller] // remaining
+        words = words * counts[letter] // remaining
+        counts[letter] -= 1
+        remaining -= 1
+    return rank
+
+def ending_words(counts: list) -> object:
+    """
+    Yields every word with the given number of letters per seat, in lexicographic order.
+    """
+    counts = list(counts)
+    total = sum(counts)
+    word = []
+    def extend():
+        if len(word) == total:
+            yield list(word)
+            return
+        for letter in range(NUMBER_OF_PLAYERS):
+            if counts[letter]:
+                counts[letter] -= 1
+                word.append(letter)
+                yield from extend()
+                word.pop()
+                counts[letter] += 1
+    yield from extend()
+
+def suit_slots(trump_suit: str) -> list:
+    """
+    Returns the suits in abstract slot order: the trump suit first, or the suits in card id order without trump.
+    """
+    if trump_suit == 'None':
+        return list(SUIT_ORDER)
+    return [trump_suit] + [suit for suit in SUIT_ORDER if suit != trump_suit]
+
+def abstract_ending(hands: tuple, leader: int, trump_suit: str) -> tuple:
+    """
+    Returns the abstract form of an ending: (cards per seat, trump context, Joker holders, suit sizes, word of holders).
+    """
+    relative_hands = [hands[(leader + seat) % NUMBER_OF_PLAYERS] for seat in range(NUMBER_OF_PLAYERS)]
+    holders = tuple(sorted(seat for joker_id in JOKER_IDS for seat in range(NUMBER_OF_PLAYERS) if relative_hands[seat] >> joker_id & 1))
+    live = relative_hands[0] | relative_hands[1] | relative_hands[2] | relative_hands[3]
+    sizes = []
+    word = []
+    for suit in suit_slots(trump_suit):
+        suit_cards = card_ids(live & SUIT_MASKS[suit])
+        sizes.append(len(suit_cards))
+        for card_id in suit_cards:
+            bit = 1 << card_id
+            word.append(0 if relative_hands[0] & bit else 1 if relative_hands[1] & bit else 2 if relative_hands[2] & bit else 3)
+    context = 'None' if trump_suit == 'None' else 'trump'
+    return relative_hands[0].bit_count(), context, holders, tuple(sizes), word
+
+def concrete_ending(context: str, holders: tuple, sizes: tuple, word: list) -> tuple[list, str]:
+    """
+    Returns hands (relative to the leader) and a trump suit with the given abstract form: the live cards of a suit are
+    its highest ranks, so that a black suit never needs its Six (a Joker).
+    """
+    hands = [0] * NUMBER_OF_PLAYERS
+    for joker_id, seat in zip(JOKER_IDS, holders):
+        hands[seat] |= 1 << joker_id
+    position = 0
+    for suit_index, size in enumerate(sizes):
+        for rank in range(len(RANKS) - size, len(RANKS)):
+            hands[word[position]] |= 1 << (suit_index * len(RANKS) + rank)
+            position += 1
+    return hands, SUIT_ORDER[0] if context == 'trump' else 'None'
+
+class Tablebase:
+    """
+    Results of every ending up to a number of cards per seat, read from a file mapped into memory or built in memory by
+    the generator.
+
+    Attributes:
+        1) max_cards (int): The cards per seat of the largest endings.
+        2) blocks (list): The blocks of the index of every level (see level_blocks), by cards per seat.
+        3) offsets (list): The position of every level's results in 'data', by cards per seat.
+        4) data (object): The results: a memory map of the file, or a bytearray.
+        5) file (file): The open tablebase file, if any.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLEBASE_FILE):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, max_cards = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a tablebase of version {VERSION}.')
+        self.set_levels(max_cards, HEADER.size)
+        if len(self.data) != self.offsets[-1]:
+            self.close()
+            raise ValueError(f'{path} is not a complete tablebase.')
+
+    @classmethod
+    def in_memory(cls, max_cards: int) -> 'Tablebase':
+        """
+        Returns an empty tablebase held in memory, as the generator fills it one level at a time.
+        """
+        tablebase = cls.__new__(cls)
+        tablebase.file = None
+        tablebase.set_levels(max_cards, 0)
+        tablebase.data = bytearray(tablebase.offsets[-1])
+        return tablebase
+
+    def set_levels(self, max_cards: int, start: int):
+        self.max_cards = max_cards
+        self.blocks = [None]
+        self.offsets = [start, start]
+        for cards in range(1, max_cards + 1):
+            blocks, endings = level_blocks(cards)
+            self.blocks.append(blocks)
+            self.offsets.append(self.offsets[-1] + endings)
+
+    def close(self):
+        if self.file is not None:
+            self.data.close()
+            self.file.close()
+
+    def ending_index(self, cards: int, context: str, holders: tuple, sizes: tuple, word: list) -> int:
+        """
+        Returns the position in 'data' of the result of an abstract ending, or None if it is outside the tablebase.
+        """
+        block = self.blocks[cards].get((context, holders, sizes))
+        if block is None:
+            return None
+        offset, counts = block
+        return self.offsets[cards] + offset + word_rank(word, counts)
+
+    def probe(self, hands: tuple, leader: int, trump_suit: str) -> list:
+        """
+        Returns the maximum number of remaining tricks every seat can take in an ending, or None if the ending is not in
+        the tablebase (too many cards per seat, or a suit with more than eight live cards).
+
+        Args:
+            hands (tuple): The bitmask of every seat's cards, all of the same size.
+            leader (int): The seat leading the next trick.
+            trump_suit (str): The trump suit, or 'None'.
+        """
+        cards = hands[leader].bit_count()
+        if not 0 < cards <= self.max_cards:
+            return None
+        index = self.ending_index(*abstract_ending(hands, leader, trump_suit))
+        if index is None:
+            return None
+        result = self.data[index]
+        return [result >> (2 * ((seat - leader) % NUMBER_OF_PLAYERS)) & 3 for seat in range(NUMBER_OF_PLAYERS)]
+
+def solve_ending(hands: list, trump_suit: str, tablebase: Tablebase) -> list:
+    """
+    Returns the maximum number of tricks every seat can take in an ending led by seat 0, searching its first trick and
+    reading the endings it leads to from the tablebase (which must hold the endings with one card less per seat).
+
+    The first trick is searched once for the four seats, with the moves of DoubleDummySolver: every seat's value is
+    the best move for it where it plays, and the worst move for it where another seat plays, as in the solver's test
+    of each seat.
+    """
+    solver = DoubleDummySolver(hands, trump_suit, 0)
+    solver.target = 0
+    last_trick = hands[0].bit_count() == 1
+
+    def play(hands: tuple, position: int, trick: tuple, best_strength: int, best_position: int, table_cards: int) -> list:
+        if position == NUMBER_OF_PLAYERS:
+            results = [0] * NUMBER_OF_PLAYERS if last_trick else tablebase.probe(hands, best_position, trump_suit)
+            results[best_position] += 1
+            return results
+        values = None
+        for card_id, strength, next_trick in solver.generate_moves(hands, position, position, trick, best_strength, best_position, table_cards):
+            next_hands = hands[:position] + (hands[position] & ~(1 << card_id),) + hands[position + 1:]
+            if strength > best_strength:
+                results = play(next_hands, position + 1, next_trick, strength, position, table_cards | (1 << card_id))
+            else:
+                results = play(next_hands, position + 1, next_trick, best_strength, best_position, table_cards | (1 << card_id))
+            if values is None:
+                values = results
+                continue
+            for seat in range(NUMBER_OF_PLAYERS):
+                values[seat] = max(values[seat], results[seat]) if seat == position else min(values[seat], results[seat])
+        return values
+
+    return play(tuple(hands), 0, None, -1, 0, 0)
+
+def generate_tablebase(max_cards: int = DEFAULT_CARDS, progress: bool = False) -> Tablebase:
+    """
+    Solves every ending with up to 'max_cards' cards per seat, from the last trick backwards.
+    """
+    tablebase = Tablebase.in_memory(max_cards)
+    for cards in range(1, max_cards + 1):
+        start = time.perf_counter()
+        index = tablebase.offsets[cards]
+        for (context, holders, sizes), (offset, counts) in tablebase.blocks[cards].items():
+            for word in ending_words(counts):
+                hands, trump_suit = concrete_ending(context, holders, sizes, word)
+                results = solve_ending(hands, trump_suit, tablebase)
+                tablebase.data[index] = results[0] | results[1] << 2 | results[2] << 4 | results[3] << 6
+                index += 1
+        if progress:
+            print(f'{index - tablebase.offsets[cards]:,} endings with {cards} cards per seat in {time.perf_counter() - start:.1f} s.')
+    return tablebase
+
+def write_tablebase(path: str, tablebase: Tablebase):
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, tablebase.max_cards))
+        file.write(tablebase.data)
+
+def main():
+    """
+    Generates a tablebase from the command line.
+    """
+    parser = argparse.ArgumentParser(description = 'Generate the endgame tablebase.')
+    parser.add_argument('command', choices = ['generate'])
+    parser.add_argument('--cards', type = int, default = DEFAULT_CARDS, help = 'cards per seat of the largest endings')
+    parser.add_argument('--output', default = DEFAULT_TABLEBASE_FILE, help = 'path of the tablebase file')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tablebase = generate_tablebase(args.cards, progress = True)
+    write_tablebase(args.output, tablebase)
+    print(f'Written to {args.output} ({HEADER.size + len(tablebase.data):,} bytes) in {time.perf_counter() - start:.1f} s.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import random
+import time
+from constants import NUMBER_OF_PLAYERS, NUMBER_OF_SETS
+from decisions import RandomDecisions, SimpleDecisions
+from events import NullEvents
+from player import Player
+from game import Game
+
+# Bot policies that can be given to a seat, by name. Each factory receives the random number generator of the game.
+# Searches of an 'ismcts' seat run a fixed number of iterations rather than a time budget, so that a tournament is
+# reproducible from its seed whatever the load of the machine
+ISMCTS_ITERATIONS = 200
+# Chunks of games each worker gets at least (so that a slow chunk does not leave the other workers idle), and the
+# largest chunk (beyond which the per-chunk cost of a task is negligible)
+CHUNKS_PER_WORKER = 4
+MAX_CHUNK_SIZE = 250
+
+def ismcts_policy(rng: random.Random) -> object:
+    # ismcts.py is only imported by the workers of tournaments that seat it
+    from ismcts import ISMCTSDecisions
+    return ISMCTSDecisions(iterations = ISMCTS_ITERATIONS, rng = random.Random(rng.getrandbits(64)))
+
+# Deals an 'advisor' seat's bid advisor plays out per distribution, and the advisor of this process: its cache is
+# shared by every game the process plays
+ADVISOR_SAMPLES = 100
+BID_ADVISORS = []
+
+def advisor_policy(rng: random.Random) -> object:
+    # bid_advisor.py (and the search it simulates with) is only imported by the workers of tournaments that seat it
+    from bid_advisor import BidAdvisor, AdvisorDecisions
+    if not BID_ADVISORS:
+        BID_ADVISORS.append(BidAdvisor(ADVISOR_SAMPLES))
+    return AdvisorDecisions(BID_ADVISORS[0])
+
+POLICIES = {
+    'random': lambda rng: RandomDecisions(rng),
+    'simple': lambda rng: SimpleDecisions(),
+    'ismcts': ismcts_policy,
+    'advisor': advisor_policy,
+}
+
+class BonusCounter(NullEvents):
+    """
+    Event sink that counts, per seat, how many times the set bonus of Game.check_bonus has been awarded.
+
+    Attributes:
+        bonuses (dict): Number of bonuses per player name.
+    """
+
+    def __init__(self):
+        self.bonuses = {}
+
+    def bonuses_checked(self, bonuses: list):
+        for player, _ in bonuses:
+            self.bonuses[player.name] = self.bonuses.get(player.name, 0) + 1
+
+class TournamentStats:
+    """
+    Results of a batch of games, per seat. Everything is kept as integer sums, so that the results of several workers
+    merge exactly, whatever the number of workers and the order in which they finish.
+
+    Attributes:
+        1) games (int): The number of games played.
+        2) wins (list): Wins per seat; a game won by several tied players counts 1/k for each of them, kept as a numerator over 'tie_denominator'.
+        3) score_sums (list): Sum of the final scores per seat.
+        4) score_squares (list): Sum of the squared final scores per seat.
+        5) bonuses (list): Number of set bonuses per seat.
+    """
+
+    # Least common multiple of 1, 2, 3 and 4, so that shared wins stay integers
+    tie_denominator = 12
+
+    def __init__(self):
+        self.games = 0
+        self.wins = [0] * NUMBER_OF_PLAYERS
+        self.score_sums = [0] * NUMBER_OF_PLAYERS
+        self.score_squares = [0] * NUMBER_OF_PLAYERS
+        self.bonuses = [0] * NUMBER_OF_PLAYERS
+
+    def add_game(self, scores: list, bonuses: list):
+        """
+        Adds the final scores and the number of set bonuses of each seat for one game.
+        """
+        self.games += 1
+        highest_score = max(scores)
+        winners = [seat for seat, score in enumerate(scores) if score == highest_score]
+        for seat in range(NUMBER_OF_PLAYERS):
+            if seat in winners:
+                self.wins[seat] += self.tie_denominator // len(winners)
+            self.score_sums[seat] += scores[seat]
+            self.score_squares[seat] += scores[seat] * scores[seat]
+            self.bonuses[seat] += bonuses[seat]
+
+    def merge(self, other: 'TournamentStats'):
+        """
+        Adds the results of another batch (e.g. from another worker) to these results.
+        """
+        self.games += other.games
+        for seat in range(NUMBER_OF_PLAYERS):
+            self.wins[seat] += other.wins[seat]
+            self.score_sums[seat] += other.score_sums[seat]
+            self.score_squares[seat] += other.score_squares[seat]
+            self.bonuses[seat] += other.bonuses[seat]
+
+    def win_rate(self, seat: int) -> float:
+        return self.wins[seat] / (self.tie_denominator * self.games)
+
+    def mean_score(self, seat: int) -> float:
+        return self.score_sums[seat] / self.games
+
+    def score_variance(self, seat: int) -> float:
+        """
+        Returns the population variance of the seat's final score.
+        """
+        return (self.score_squares[seat] * self.games - self.score_sums[seat] ** 2) / self.games ** 2
+
+    def bonus_rate(self, seat: int) -> float:
+        """
+        Returns the fraction of sets in which the seat earned the set bonus.
+        """
+        return self.bonuses[seat] / (self.games * NUMBER_OF_SETS)
+
+def game_seed(master_seed: int, game_index: int) -> int:
+    """
+    Derives the seed of a game from the master seed and the game's index, independently of how games are split between workers.
+    """
+    digest = hashlib.blake2b(f'{master_seed}:{game_index}'.encode(), digest_size = 8).digest()
+    return int.from_bytes(digest, 'big')
+
+def play_game(seed: int, policies: list, results_log: object = None) -> tuple[list, list]:
+    """
+    Plays one full headless game (four sets of four hands) with the given bot policy per seat.
+
+    Args:
+        seed (int): Seed of the game; the deal and every bot decision are drawn from it.
+        policies (list): Policy name (see POLICIES) of each seat.
+        results_log (ResultsLog): Optional results log the game's records are appended to.
+
+    Returns:
+        Tuple[list, list]: The final score and the number of set bonuses of each seat.
+    """
+    rng = random.Random(seed)
+    players = [Player(f'Seat {seat + 1}', POLICIES[policy](rng)) for seat, policy in enumerate(policies)]
+    bonus_counter = BonusCounter()
+    game = Game(players, bonus_counter, results_file = None, rng = rng, results_log = results_log)
+    game.play_set()
+    scores = [game.set_scores[player.name] for player in players]
+    bonuses = [bonus_counter.bonuses.get(player.name, 0) for player in players]
+    return scores, bonuses
+
+def play_games(master_seed: int, game_indices: range, policies: list, log_path: str = None) -> TournamentStats:
+    """
+    Plays a range of games of the tournament and returns their results. This is the unit of work of each worker process.
+    With 'log_path', the games are appended to that results log, which every worker shares.
+    """
+    stats = TournamentStats()
+    results_log = None
+    if log_path is not None:
+        from results_log import ResultsLog
+        results_log = ResultsLog(log_path)
+    try:
+        for game_index in game_indices:
+            stats.add_game(*play_game(game_seed(master_seed, game_index), policies, results_log))
+    finally:
+        if results_log is not None:
+            results_log.close()
+    return stats
+
+def default_chunk_size(n_games: int, workers: int) -> int:
+    """
+    Returns the number of games of a chunk that gives every worker CHUNKS_PER_WORKER chunks, at most MAX_CHUNK_SIZE.
+    """
+    return max(1, min(MAX_CHUNK_SIZE, n_games // (workers * CHUNKS_PER_WORKER)))
+
+def run_tournament(n_games: int, policies: list, master_seed: int = 0, workers: int = None, chunk_size: int = None, log_path: str = None) -> TournamentStats:
+    """
+    Plays a tournament, spreading the games across a pool of worker processes and merging their results.
+
+    Args:
+        n_games (int): The number of games to play.
+        policies (list): Policy name (see POLICIES) of each seat.
+        master_seed (int): The seed every game's seed is derived from.
+        workers (int): The number of worker processes (all cores when omitted); with one worker, games are played in this process.
+        chunk_size (int): The number of games sent to a worker at a time (see default_chunk_size when omitted). The
+            results do not depend on it, as every game has its own seed.
+        log_path (str): Optional results log every game is appended to (see results_log.py).
+
+    Returns:
+        TournamentStats: The merged results.
+    """
+    if chunk_size is None:
+        chunk_size = default_chunk_size(n_games, workers or os.cpu_count())
+    chunks = [range(start, min(start + chunk_size, n_games)) for start in range(0, n_games, chunk_size)]
+    stats = TournamentStats()
+    if workers == 1:
+        for chunk in chunks:
+            stats.merge(play_games(master_seed, chunk, policies, log_path))
+        return stats
+
+    # Imported here, as worker processes started by 'spawn' import this module and never need the pool themselves
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        for chunk_stats in executor.map(play_games, [master_seed] * len(chunks), chunks, [policies] * len(chunks), [log_path] * len(chunks)):
+            stats.merge(chunk_stats)
+    return stats
+
+def main():
+    """
+    Runs a tournament from the command line and prints the results of each seat.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description = 'Play many headless games between bot policies.')
+    parser.add_argument('--games', type = int, default = 1000, help = 'number of games to play')
+    parser.add_argument('--seed', type = int, default = 0, help = 'master seed of the tournament')
+    parser.add_argument('--workers', type = int, default = os.cpu_count(), help = 'number of worker processes')
+    parser.add_argument('--seats', nargs = NUMBER_OF_PLAYERS, default = ['simple', 'random', 'simple', 'random'], choices = sorted(POLICIES), help = 'policy of each seat')
+    parser.add_argument('--log', default = None, help = 'append every game to this results log (JSON Lines)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = run_tournament(args.games, args.seats, args.seed, args.workers, log_path = args.log)
+    elapsed = time.perf_counter() - start
+
+    print(f'{stats.games} games in {elapsed:.2f} s ({stats.games / elapsed:.0f} games/s) with {args.workers} workers.')
+    for seat, policy in enumerate(args.seats):
+        print(f'Seat {seat + 1} ({policy}): win rate {stats.win_rate(seat):.1%}, mean score {stats.mean_score(seat):.1f}, '
+              f'variance {stats.score_variance(seat):.1f}, set bonus in {stats.bonus_rate(seat):.1%} of sets')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Table-driven trick resolution.
+
+Every play of a trick, a (card, Joker action) pair as stored in PlayHand.cards_played, has a rank key in the context of
+the trick (trump suit, and lead suit or Joker lead action and suit wanted): its strength, shifted left by two bits, with
+its position in the trick in the low bits. The key of every play is precomputed for every context and position, so the
+winner of a trick is the position of the largest of its four keys, with no branch on the rules. Strengths:
+
+- a Joker played after the lead ('Play'): 300, the later one winning if both are;
+- a trump suit card: 200 + its value;
+- a Joker lead: 250 for 'High' asking for the trump suit, 150 for 'High' asking for another suit, 50 for 'Low';
+- a card of the lead suit, or of the suit wanted after a 'Low' Joker lead: 100 + its value;
+- any other card (and a Joker given up): 0. The lead always has a positive strength, so it wins when no other card does.
+
+The same strengths are used on card ids by the solver, the ISMCTS playouts and the batch simulator (see card_strength,
+joker_lead_strength, CARD_STRENGTHS and leading_play).
+"""
+from constants import NUMBER_OF_PLAYERS
+from card_masks import NUMBER_OF_CARDS, SUIT_ORDER, JOKER_MASK, CARD_SUITS, CARD_VALUES
+from cards import CARDS
+from legal_moves import LEAD_JOKER_ACTIONS, FOLLOW_JOKER_ACTIONS
+
+# The Joker action stored with every play: 'NotApplicable' for the lead and for cards that are not Jokers
+PLAY_ACTIONS = ('NotApplicable',) + FOLLOW_JOKER_ACTIONS
+PLAYS = [(card, action) for card in CARDS for action in PLAY_ACTIONS]
+POSITION_BITS = (NUMBER_OF_PLAYERS - 1).bit_length()
+POSITION_MASK = (1 << POSITION_BITS) - 1
+# Strengths of the plays in a trick (see the module docstring)
+JOKER_PLAY_STRENGTH = 300
+TRUMP_STRENGTH = 200
+HIGH_TRUMP_JOKER_LEAD_STRENGTH = 250
+HIGH_JOKER_LEAD_STRENGTH = 150
+FOLLOW_STRENGTH = 100
+LOW_JOKER_LEAD_STRENGTH = 50
+
+def card_strength(card_id: int, trump_suit: str, suit_required: str) -> int:
+    """
+    Returns the strength of a card that is not played as a Joker (a Joker given up, or any other card) in a trick.
+
+    Args:
+        card_id (int): The id of the card.
+        trump_suit (str): The trump suit, or 'None'.
+        suit_required (str): The suit that beats a plain card in the trick: the lead suit, the suit wanted after a 'Low'
+            Joker lead, or None after a 'High' Joker lead (the cards of the suit wanted cannot beat the Joker).
+    """
+    suit = CARD_SUITS[card_id]
+    if suit == trump_suit:
+        return TRUMP_STRENGTH + CARD_VALUES[card_id]
+    if suit == suit_required:
+        return FOLLOW_STRENGTH + CARD_VALUES[card_id]
+    return 0
+
+def joker_lead_strength(lead_joker_action: str, suit_wanted: str, trump_suit: str) -> int:
+    """
+    Returns the strength of a Joker lead with its action ('High' or 'Low') and suit wanted.
+    """
+    if lead_joker_action == 'High':
+        return HIGH_TRUMP_JOKER_LEAD_STRENGTH if suit_wanted == trump_suit else HIGH_JOKER_LEAD_STRENGTH
+    return LOW_JOKER_LEAD_STRENGTH
+
+class CardStrengths(dict):
+    """
+    The strength of every card id not played as a Joker (see card_strength), by (trump suit, suit required). The
+    strengths of a context are built the first time it is used, for the search loops that look them up per card.
+    """
+
+    def __missing__(self, context: tuple) -> tuple:
+        trump_suit, suit_required = context
+        strengths = self[context] = tuple(card_strength(card_id, trump_suit, suit_required) for card_id in range(NUMBER_OF_CARDS))
+        return strengths
+
+CARD_STRENGTHS = CardStrengths()
+
+def leading_play(plays: list, trump_suit: str, suit_wanted: str, lead_joker_action: str) -> tuple[int, int, object]:
+    """
+    Returns the strength of the card winning a trick so far, its position in the trick, and the suit that beats a plain
+    card in the trick (see card_strength).
+
+    Args:
+        plays (list): (card id, Joker action) of the cards played so far, in playing order (at least the lead).
+        trump_suit (str): The trump suit, or 'None'.
+        suit_wanted (str): The suit asked for by a Joker lead.
+        lead_joker_action (str): 'High' or 'Low' after a Joker lead.
+    """
+    lead_card_id = plays[0][0]
+    if (1 << lead_card_id) & JOKER_MASK:
+        best = joker_lead_strength(lead_joker_action, suit_wanted, trump_suit)
+        suit_required = None if lead_joker_action == 'High' else suit_wanted
+        first = 1
+    else:
+        best, suit_required = -1, CARD_SUITS[lead_card_id]
+        first = 0
+    best_position = 0
+    for position in range(first, len(plays)):
+        card_id, action = plays[position]
+        # A Joker played after another is stronger, so that the last one played wins
+        if (1 << card_id) & JOKER_MASK and action == 'Play':
+            strength = JOKER_PLAY_STRENGTH + position
+        else:
+            strength = card_strength(card_id, trump_suit, suit_required)
+        if strength > best:
+            best, best_position = strength, position
+    return best, best_position, suit_required
+
+def play_strength(card: object, action: str, position: int, trump_suit: str, lead_suit: str, lead_joker_action: str = None) -> int:
+    """
+    Returns the strength of a play in a trick (see the module docstring).
+
+    Args:
+        card (Card): The card played.
+        action (str): The Joker action of the play ('Play', 'Give up' or 'NotApplicable').
+        position (int): The position of the play in the trick (0 for the lead).
+        trump_suit (str): The trump suit, or 'None'.
+        lead_suit (str): The suit of the lead card, or after a Joker lead the suit wanted.
+        lead_joker_action (str): 'High' or 'Low' after a Joker lead, otherwise None.
+    """
+    if card.bit & JOKER_MASK:
+        if position and action == 'Play':
+            return JOKER_PLAY_STRENGTH
+        if position or lead_joker_action is None:
+            return 0
+        return joker_lead_strength(lead_joker_action, lead_suit, trump_suit)
+    # After a 'High' Joker lead, the cards of the suit wanted cannot beat the Joker
+    return card_strength(card.card_id, trump_suit, None if lead_joker_action == 'High' else lead_suit)
+
+def rank_keys(trump_suit: str, lead_suit: str, lead_joker_action: str = None) -> tuple:
+    """
+    Returns the rank keys of every play in a trick context, as one dict per position: (card, Joker action) -> key.
+    """
+    return tuple({play: play_strength(*play, position, trump_suit, lead_suit, lead_joker_action) << POSITION_BITS | position for play in PLAYS}
+                 for position in range(NUMBER_OF_PLAYERS))
+
+class ContextKeys(dict):
+    """
+    The rank keys of the trick contexts sharing a trump suit (and Joker lead action), by lead suit or suit wanted. The
+    keys of a context are built the first time it is used, so that importing the module costs nothing.
+
+    Attributes:
+        1) trump_suit (str): The trump suit of the contexts, or 'None'.
+        2) lead_joker_action (str): 'High' or 'Low' for the contexts of a Joker lead, otherwise None.
+    """
+
+    def __init__(self, trump_suit: str, lead_joker_action: str = None):
+        super().__init__()
+        self.trump_suit = trump_suit
+        self.lead_joker_action = lead_joker_action
+
+    def __missing__(self, lead_suit: str) -> tuple:
+        if lead_suit not in SUIT_ORDER:
+            raise KeyError(lead_suit)
+        keys = self[lead_suit] = rank_keys(self.trump_suit, lead_suit, self.lead_joker_action)
+        return keys
+
+# Rank keys by trump suit and lead suit, and by trump suit, Joker lead action and suit wanted
+TRUMP_SUITS = SUIT_ORDER + ['None']
+LEAD_KEYS = {trump_suit: ContextKeys(trump_suit) for trump_suit in TRUMP_SUITS}
+JOKER_LEAD_KEYS = {trump_suit: {action: ContextKeys(trump_suit, action) for action in LEAD_JOKER_ACTIONS} for trump_suit in TRUMP_SUITS}
+
+def winning_position(keys: tuple, plays: object) -> int:
+    """
+    Returns the position in the trick of the winning play.
+
+    Args:
+        keys (tuple): The rank keys of the trick's context (see LEAD_KEYS and JOKER_LEAD_KEYS).
+        plays (iterable): The (card, Joker action) of the four plays, in playing order.
+    """
+    # Unrolled for the four seats: this runs once per trick of every game
+    first, second, third, fourth = plays
+    first_keys, second_keys, third_keys, fourth_keys = keys
+    best = first_keys[first]
+    key = second_keys[second]
+    if key > best:
+        best = key
+    key = third_keys[third]
+    if key > best:
+        best = key
+    key = fourth_keys[fourth]
+    if key > best:
+        best = key
+    return best & POSITION_MASK
@@ -0,0 +1,257 @@
+"""
+Precomputed trump-selection table over every three-card opening.
+
+The lead player chooses the trump suit from their first three cards, and there are only C(36, 3) = 7140 such openings.
+Each one is evaluated offline for every trump choice (the four suits and no trump) by playing out deals consistent with
+it (see ismcts.estimate_tricks, with the opening player leading the first trick), and the table stores per choice:
+
+- the mean number of tricks the opening player takes;
+- the variance of that number;
+- the expected hand score of the best bid over that distribution of tricks (see ismcts.best_bid), which is what a
+  trump choice is ranked by.
+
+Suit symmetry cuts the work: ♦ and ♥ can be swapped, and so can ♠ and ♣ together with their Jokers (6♠ and 6♣), without
+changing the game. Only one opening of each symmetry class is simulated, and the others are filled in from it.
+
+File layout: a header (magic b'JKTT', format version, trump choices, fields per choice, samples per choice, seed), then
+7140 * 5 * 3 float32 (little-endian), by opening index, trump choice in TRUMP_CHOICES order and field. TrumpTable maps
+the file into memory, so loading it costs nothing and a lookup reads 60 bytes.
+
+    python trump_table.py generate --samples 2000 --seed 1
+    python trump_table.py suggest A♦ K♦ 7♣
+"""
+import argparse
+import hashlib
+import math
+import mmap
+import random
+import struct
+import sys
+import time
+from constants import RANKS
+from card_masks import NUMBER_OF_CARDS, SUIT_ORDER
+from cards import parse_card
+from decisions import TRUMP_CHOICES
+
+MAGIC = b'JKTT'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHIQ')
+VALUE = struct.Struct('<f')
+
+DEFAULT_TABLE_FILE = 'trump_table.bin'
+DEFAULT_SAMPLES = 2000
+
+OPENING_SIZE = 3
+OPENING_COUNT = math.comb(NUMBER_OF_CARDS, OPENING_SIZE)
+# Fields stored per trump choice, in file order
+FIELDS = ('mean_tricks', 'variance', 'expected_score')
+VALUES_PER_OPENING = len(TRUMP_CHOICES) * len(FIELDS)
+
+# Suit permutations (by suit index in card id order) that leave the game unchanged: ♦ <-> ♥, and ♠ <-> ♣ (which also
+# swaps the two Jokers, each taking the place of its suit's Six)
+SUIT_PERMUTATIONS = [(0, 1, 2, 3), (1, 0, 2, 3), (0, 1, 3, 2), (1, 0, 3, 2)]
+
+def opening_index(opening: int) -> int:
+    """
+    Returns the index of a three-card opening among the C(36, 3) openings (combinatorial number system).
+
+    Args:
+        opening (int): The bitmask of the three cards.
+
+    Raises:
+        ValueError: If the mask does not hold exactly three cards.
+    """
+    if opening.bit_count() != OPENING_SIZE or opening >> NUMBER_OF_CARDS:
+        raise ValueError(f'An opening is made of {OPENING_SIZE} cards of the deck.')
+    index = 0
+    chosen = 0
+    for card_id in range(NUMBER_OF_CARDS):
+        if opening >> card_id & 1:
+            chosen += 1
+            index += math.comb(card_id, chosen)
+    return index
+
+def opening_from_index(index: int) -> int:
+    """
+    Returns the bitmask of the opening with the given index (see opening_index).
+
+    Raises:
+        ValueError: If the index is out of range.
+    """
+    if not 0 <= index < OPENING_COUNT:
+        raise ValueError(f'An opening index must be between 0 and {OPENING_COUNT - 1}, not {index}.')
+    opening = 0
+    card_id = NUMBER_OF_CARDS
+    for chosen in range(OPENING_SIZE, 0, -1):
+        card_id -= 1
+        while math.comb(card_id, chosen) > index:
+            card_id -= 1
+        index -= math.comb(card_id, chosen)
+        opening |= 1 << card_id
+    return opening
+
+def permute_mask(mask: int, permutation: tuple) -> int:
+    """
+    Returns a mask with the suits of its cards permuted (suit index i becomes permutation[i]).
+    """
+    permuted = 0
+    suit_mask = (1 << len(RANKS)) - 1
+    for suit_index, target in enumerate(permutation):
+        permuted |= (mask >> (suit_index * len(RANKS)) & suit_mask) << (target * len(RANKS))
+    return permuted
+
+def permute_trump(trump_suit: str, permutation: tuple) -> str:
+    if trump_suit == 'None':
+        return trump_suit
+    return SUIT_ORDER[permutation[SUIT_ORDER.index(trump_suit)]]
+
+def canonical_opening(opening: int) -> tuple[int, tuple]:
+    """
+    Returns the representative of an opening's symmetry class (the permuted opening with the lowest index), and the
+    permutation that maps the opening to it.
+    """
+    return min(((opening_index(permute_mask(opening, permutation)), permutation) for permutation in SUIT_PERMUTATIONS))
+
+def opening_seed(seed: int, index: int) -> int:
+    """
+    Derives the seed of an opening's simulations from the seed of the table, independently of how openings are split between workers.
+    """
+    digest = hashlib.blake2b(f'{seed}:{index}'.encode(), digest_size = 8).digest()
+    return int.from_bytes(digest, 'big')
+
+def evaluate_opening(index: int, samples: int, seed: int) -> list:
+    """
+    Simulates an opening for every trump choice.
+
+    Returns:
+        list: The FIELDS of every trump choice, in TRUMP_CHOICES order.
+    """
+    # Imported here, so that loading a table never imports the search
+    from ismcts import estimate_tricks, best_bid
+    tricks = estimate_tricks(0, opening_from_index(index), TRUMP_CHOICES, 0, random.Random(opening_seed(seed, index)), samples = samples)
+    values = []
+    for trump_suit in TRUMP_CHOICES:
+        taken = tricks[trump_suit]
+        mean = sum(taken) / len(taken)
+        values.extend((mean, sum((count - mean) ** 2 for count in taken) / len(taken), best_bid(taken)[1]))
+    return values
+
+def generate_table(samples: int = DEFAULT_SAMPLES, seed: int = 0, workers: int = 1) -> list:
+    """
+    Evaluates every opening: one per symmetry class is simulated, across a pool of worker processes.
+
+    Returns:
+        list: The table's values (see the module docstring), VALUES_PER_OPENING per opening.
+    """
+    canonical = [canonical_opening(opening_from_index(index)) for index in range(OPENING_COUNT)]
+    representatives = sorted({representative for representative, _ in canonical})
+    if workers == 1:
+        evaluated = [evaluate_opening(index, samples, seed) for index in representatives]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            evaluated = list(executor.map(evaluate_opening, representatives, [samples] * len(representatives), [seed] * len(representatives), chunksize = 16))
+    by_representative = dict(zip(representatives, evaluated))
+
+    # The opening with trump t plays as its representative with trump permutation(t)
+    values = []
+    for representative, permutation in canonical:
+        source = by_representative[representative]
+        for trump_suit in TRUMP_CHOICES:
+            position = TRUMP_CHOICES.index(permute_trump(trump_suit, permutation)) * len(FIELDS)
+            values.extend(source[position:position + len(FIELDS)])
+    return values
+
+def write_table(path: str, values: list, samples: int, seed: int):
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(TRUMP_CHOICES), len(FIELDS), samples, seed))
+        file.write(struct.pack(f'<{len(values)}f', *values))
+
+class TrumpTable:
+    """
+    A trump-selection table file mapped into memory.
+
+    Attributes:
+        1) path (str): The path of the table file.
+        2) samples (int): The deals simulated per opening and trump choice.
+        3) seed (int): The seed the table was generated from.
+        4) file (file): The open table file.
+        5) mapping (mmap.mmap): The memory map of the file.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLE_FILE):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mapping = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        if len(self.mapping) != HEADER.size + OPENING_COUNT * VALUES_PER_OPENING * VALUE.size:
+            self.close()
+            raise ValueError(f'{path} is not a complete trump table.')
+        magic, version, trump_choices, fields, self.samples, self.seed = HEADER.unpack_from(self.mapping)
+        if magic != MAGIC or version != VERSION or trump_choices != len(TRUMP_CHOICES) or fields != len(FIELDS):
+            self.close()
+            raise ValueError(f'{path} is not a trump table of version {VERSION}.')
+
+    def close(self):
+        self.mapping.close()
+        self.file.close()
+
+    def lookup(self, opening: int) -> dict:
+        """
+        Returns the statistics of every trump choice for an opening.
+
+        Args:
+            opening (int): The bitmask of the first three cards (see card_masks.hand_mask).
+
+        Returns:
+            dict: (mean tricks, variance, expected score of the best bid) by trump choice.
+        """
+        offset = HEADER.size + opening_index(opening) * VALUES_PER_OPENING * VALUE.size
+        values = struct.unpack_from(f'<{VALUES_PER_OPENING}f', self.mapping, offset)
+        return {trump_suit: values[i * len(FIELDS):(i + 1) * len(FIELDS)] for i, trump_suit in enumerate(TRUMP_CHOICES)}
+
+    def best_trump(self, opening: int) -> str:
+        """
+        Returns the trump choice with the best expected score for an opening.
+        """
+        statistics = self.lookup(opening)
+        return max(TRUMP_CHOICES, key = lambda trump_suit: statistics[trump_suit][2])
+
+def main():
+    """
+    Generates a table, or prints the suggestion of a table for an opening, from the command line.
+    """
+    parser = argparse.ArgumentParser(description = 'Generate or query the trump-selection table.')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+    generate = subparsers.add_parser('generate', help = 'simulate every opening and write the table')
+    generate.add_argument('--samples', type = int, default = DEFAULT_SAMPLES, help = 'deals simulated per opening and trump choice')
+    generate.add_argument('--seed', type = int, default = 0, help = 'seed of the simulations')
+    generate.add_argument('--workers', type = int, default = 1, help = 'number of worker processes')
+    generate.add_argument('--output', default = DEFAULT_TABLE_FILE, help = 'path of the table file')
+    suggest = subparsers.add_parser('suggest', help = 'print the statistics of every trump choice for an opening')
+    suggest.add_argument('cards', nargs = OPENING_SIZE, help = 'the first three cards, e.g. A♦ KD "RED JOKER"')
+    suggest.add_argument('--table', default = DEFAULT_TABLE_FILE, help = 'path of the table file')
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        start = time.perf_counter()
+        values = generate_table(args.samples, args.seed, args.workers)
+        write_table(args.output, values, args.samples, args.seed)
+        print(f'{OPENING_COUNT} openings in {time.perf_counter() - start:.1f} s, written to {args.output}.')
+        return
+
+    opening = 0
+    for text in args.cards:
+        card = parse_card(text)
+        if card is None:
+            sys.exit(f'Unknown card: {text}')
+        opening |= card.bit
+    table = TrumpTable(args.table)
+    try:
+        for trump_suit, (mean, variance, expected_score) in table.lookup(opening).items():
+            print(f'{trump_suit:>4}: {mean:.2f} tricks (variance {variance:.2f}), expected score {expected_score:.1f}')
+        print(f'Suggested trump: {table.best_trump(opening)}')
+    finally:
+        table.close()
+
+if __name__ == '__main__':
+    main()